@@ -7,13 +7,23 @@ Usage:
     python main.py [commande]
 
 Commandes disponibles:
-    explore     - Lancer les analyses exploratoires
+    explore     - Profil de tous les fichiers d'entrée (types, vides, cardinalités,
+                  statistiques ; fichiers et plages en parallèle, --workers N)
     classify    - Classifier les candidats (Gauche/Droite)
     visualize   - Générer tous les graphiques
     etl         - Pipeline ETL : filtrer Hérault (34), charger SQLite
+                  (--departements 34,30 ou all : une base par département)
+    parquet     - Conversion unique de candidats_results.txt en Parquet partitionné
+    scan        - Scan unique de candidats_results.txt (table elections,
+                  classification, exploration et graphiques nationaux)
     analyse     - Analyse exploratoire Phase 3 (10 graphiques depuis SQLite)
     predict     - Modèle prédictif Phase 4 (2 modèles, 7 graphiques, prédiction municipales 2026)
-    all         - Exécuter toutes les étapes
+    all         - Exploration, classification et graphiques nationaux, en une
+                  lecture du fichier élections (bases SQLite inchangées)
+
+Les options placées après la commande sont transmises au script, par ex. :
+    python main.py etl --sans-elections && python main.py scan
+construit la base en ne lisant le fichier élections qu'une seule fois.
 """
 
 import os
@@ -26,10 +36,13 @@ SCRIPTS_DIR = "scripts"
 SCRIPTS = {
     "explore_candidats": os.path.join(SCRIPTS_DIR, "exploration", "explore_candidats.py"),
     "explore_revenus": os.path.join(SCRIPTS_DIR, "exploration", "explore_revenus.py"),
+    "profil_fichiers": os.path.join(SCRIPTS_DIR, "exploration", "profil_fichiers.py"),
     "classify": os.path.join(SCRIPTS_DIR, "classification", "classify_candidats_v2.py"),
     "viz_presidentielles": os.path.join(SCRIPTS_DIR, "visualisation", "visualize_presidentielles.py"),
     "viz_comparatifs": os.path.join(SCRIPTS_DIR, "visualisation", "visualize_revenus_vs_votes.py"),
     "etl": os.path.join(SCRIPTS_DIR, "etl", "etl_pipeline.py"),
+    "scan": os.path.join(SCRIPTS_DIR, "etl", "scan_partage.py"),
+    "parquet": os.path.join(SCRIPTS_DIR, "etl", "elections_parquet.py"),
     "analyse": os.path.join(SCRIPTS_DIR, "analyse", "analyse_exploratoire.py"),
     "predict": os.path.join(SCRIPTS_DIR, "prediction", "modele_predictif.py"),
 }
@@ -66,13 +79,13 @@ Structure du projet:
 """)
 
 
-def run_script(script_path, description):
+def run_script(script_path, description, args=()):
     """Exécute un script Python"""
     print(f"\n{'─' * 50}")
     print(f"▶ {description}")
     print(f"{'─' * 50}")
 
-    result = subprocess.run([sys.executable, script_path],
+    result = subprocess.run([sys.executable, script_path, *args],
                           capture_output=False)
 
     if result.returncode != 0:
@@ -84,14 +97,14 @@ def run_script(script_path, description):
 def cmd_explore():
     """Lancer les analyses exploratoires"""
     print("\n📊 ANALYSES EXPLORATOIRES")
-    run_script(SCRIPTS["explore_candidats"], "Analyse du fichier candidats")
-    run_script(SCRIPTS["explore_revenus"], "Analyse du fichier revenus")
+    # Tous les fichiers d'entrée profilés en un pool de processus (fichiers et plages en parallèle)
+    run_script(SCRIPTS["profil_fichiers"], "Profil de tous les fichiers d'entrée", sys.argv[2:])
 
 
 def cmd_classify():
     """Classifier les candidats"""
     print("\n🏷️  CLASSIFICATION GAUCHE/DROITE")
-    run_script(SCRIPTS["classify"], "Classification des candidats")
+    run_script(SCRIPTS["classify"], "Classification des candidats", sys.argv[2:])
 
 
 def cmd_visualize():
@@ -104,7 +117,21 @@ def cmd_visualize():
 def cmd_etl():
     """Lancer le pipeline ETL (Phase 2)"""
     print("\n🔄 PIPELINE ETL — HÉRAULT (34)")
-    run_script(SCRIPTS["etl"], "Pipeline ETL : extraction, transformation, chargement SQLite")
+    run_script(SCRIPTS["etl"], "Pipeline ETL : extraction, transformation, chargement SQLite",
+               sys.argv[2:])
+
+
+def cmd_parquet():
+    """Convertir le fichier élections en dataset Parquet partitionné"""
+    print("\n🗂️  CONVERSION PARQUET — candidats_results.txt")
+    run_script(SCRIPTS["parquet"], "Dataset Parquet partitionné (type / année / département)")
+
+
+def cmd_scan():
+    """Scan unique du fichier élections pour tous les consommateurs"""
+    print("\n🔁 SCAN PARTAGÉ — candidats_results.txt")
+    run_script(SCRIPTS["scan"], "Lecture unique : elections, classification, exploration, graphiques",
+               sys.argv[2:])
 
 
 def cmd_analyse():
@@ -121,9 +148,14 @@ def cmd_predict():
 
 def cmd_all():
     """Exécuter toutes les étapes"""
-    cmd_explore()
-    cmd_classify()
-    cmd_visualize()
+    # Le fichier élections (2 GB) n'est lu qu'une fois pour l'exploration, la
+    # classification et les graphiques nationaux ; comme explore + classify +
+    # visualize, all n'écrit ni la table elections ni le cube (--sans-bases)
+    print("\n📊 ANALYSES EXPLORATOIRES")
+    run_script(SCRIPTS["explore_revenus"], "Analyse du fichier revenus")
+    print("\n🔁 SCAN PARTAGÉ — candidats_results.txt")
+    run_script(SCRIPTS["scan"], "Lecture unique : classification, exploration, graphiques",
+               ["--sans-bases", *sys.argv[2:]])
 
 
 def cmd_help():
@@ -150,6 +182,8 @@ def main():
         "visualize": cmd_visualize,
         "viz": cmd_visualize,
         "etl": cmd_etl,
+        "scan": cmd_scan,
+        "parquet": cmd_parquet,
         "analyse": cmd_analyse,
         "predict": cmd_predict,
         "all": cmd_all,
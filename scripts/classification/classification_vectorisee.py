@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Briques vectorisées de la classification Gauche/Droite
+
+Les fonctions classify_* des scripts s'appliquent ligne par ligne ; ces
+briques traitent des colonnes entières (Series pandas, tableaux Arrow ou
+listes). Chaque test n'est évalué qu'une fois par valeur distincte de la
+colonne (factorisation), puis propagé aux lignes par indexation numpy.
+
+Le résultat est une colonne catégorielle camp ('Droite' / 'Gauche').
+
+Une liste de mots est cherchée en une seule expression régulière compilée
+(alternative des mots) : un passage par valeur au lieu d'un par mot.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES_CAMP = ['Droite', 'Gauche']
+
+
+def colonne(valeurs):
+    """Série de chaînes (valeurs manquantes → '') depuis pandas, Arrow ou une liste."""
+    if hasattr(valeurs, 'to_pandas'):  # pyarrow Array / ChunkedArray
+        valeurs = valeurs.to_pandas()
+    serie = pd.Series(np.asarray(valeurs, dtype=object), dtype=object)
+    return serie.where(serie.notna(), '')
+
+
+def par_valeur(serie, test):
+    """Évalue test (Series → booléens) sur les valeurs distinctes et le propage aux lignes."""
+    codes, uniques = pd.factorize(serie)
+    resultat = np.asarray(test(pd.Series(uniques, dtype=object)), dtype=bool)
+    return resultat[codes]
+
+
+def compiler_mots(mots):
+    """Expression compilée trouvant l'un des mots dans une chaîne (= any(mot in chaine))."""
+    if not mots:
+        return re.compile(r'(?!)')  # ne trouve rien
+    # Ordre fixe (les ensembles n'en ont pas) : le résultat n'en dépend pas
+    return re.compile('|'.join(re.escape(mot) for mot in sorted(set(mots))))
+
+
+def contient_un(serie, mots):
+    """Vrai si la chaîne contient au moins un des mots (recherche de sous-chaîne)."""
+    if not isinstance(mots, re.Pattern):
+        mots = compiler_mots(mots)
+    return serie.str.contains(mots, regex=True).to_numpy(dtype=bool)
+
+
+def sous_chaines(mots):
+    """Ensemble des sous-chaînes non vides des mots : `x in mot` devient `x in ensemble`."""
+    return {mot[i:j] for mot in mots
+            for i in range(len(mot)) for j in range(i + 1, len(mot) + 1)}
+
+
+def categorie_camp(gauche):
+    """Colonne catégorielle camp à partir d'un masque booléen Gauche."""
+    return pd.Categorical.from_codes(np.asarray(gauche, dtype=np.int8),
+                                     categories=CATEGORIES_CAMP)
@@ -3,16 +3,50 @@
 Script de classification des candidats en Gauche/Droite - VERSION 2
 Gère les présidentielles (classification par nom de candidat)
 LREM et la majorité présidentielle Macron sont classés à droite
+
+Le camp est stocké dans un fichier annexe d'un octet par ligne du fichier
+source (b'G' / b'D', même ordre que les lignes), lisible par mmap : les
+visualisations relisent le fichier d'origine et y associent le camp par
+numéro de ligne. La copie complète avec colonne Camp (2 GB) n'est écrite
+qu'avec --fichier-complet.
+
+Usage :
+    python scripts/classification/classify_candidats_v2.py
+    python scripts/classification/classify_candidats_v2.py --fichier-complet
+    python scripts/classification/classify_candidats_v2.py --fichier-complet --workers 4
 """
 
+import argparse
 import csv
+import io
+import json
+import mmap
+import os
 import sys
 
+import numpy as np
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/classification/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.elections_scan import ScanElections
+from scripts.etl.sources_compressees import est_compresse, signature_source
+from scripts.etl.index_elections import IndexElections, index_disponible
+from scripts.classification.classification_vectorisee import (
+    categorie_camp, colonne, compiler_mots, contient_un, par_valeur, sous_chaines)
+from scripts.classification.table_camps import TableCamps, empreinte_regles
+
 # Configuration
 INPUT_FILE = "data/input/elections/candidats_results.txt"
 OUTPUT_FILE = "data/output/candidats_classified.txt"
+CAMPS_FILE = "data/output/candidats_camps.bin"
+CAMPS_META = "data/output/candidats_camps.json"
 SEPARATOR = ";"
 
+# Octet du fichier annexe par camp
+CODES_CAMP = {"Gauche": b'G', "Droite": b'D'}
+GAUCHE = CODES_CAMP["Gauche"][0]
+TAMPON_CAMPS = 1024 * 1024  # octets accumulés avant écriture
+
 # Classification par NOM DE CANDIDAT (pour les présidentielles)
 CANDIDATS_GAUCHE = {
     # 2002
@@ -84,6 +118,23 @@ DROITE_NUANCES = {
     'VILL', 'NIHO', 'VOYN', 'BOUT', 'MADE', 'CHEV', 'SAIN', 'MAME',
 }
 
+# Mots-clés du libellé de liste (classification de secours)
+LISTE_GAUCHE_KW = ['insoumis', 'communiste', 'socialiste', 'écologi', 'vert',
+                   'lutte ouvrière', 'npa', 'gauche', 'ouvrier', 'pcf', 'eelv',
+                   'nupes', 'front de gauche']
+LISTE_DROITE_KW = ['national', 'républicain', 'marche', 'renaissance', 'ensemble',
+                   'modem', 'horizons', 'reconquête', 'zemmour', 'droite', 'ump',
+                   'frexit', 'patriote', 'udi', 'centriste', 'fillon']
+
+
+# Règles compilées une fois : un candidat contenu dans le nom (une expression
+# pour tous les candidats), ou le nom contenu dans un candidat (ensemble de
+# toutes les sous-chaînes des noms de candidats)
+_GAUCHE_NOMS_RE = compiler_mots([c.upper() for c in CANDIDATS_GAUCHE_ALL])
+_GAUCHE_FRAGMENTS = sous_chaines([c.upper() for c in CANDIDATS_GAUCHE_ALL])
+_DROITE_NOMS_RE = compiler_mots([c.upper() for c in CANDIDATS_DROITE])
+_DROITE_FRAGMENTS = sous_chaines([c.upper() for c in CANDIDATS_DROITE])
+
 
 def classify_by_candidate_name(nom):
     """Classifie par nom de candidat (pour présidentielles)"""
@@ -93,14 +144,12 @@ def classify_by_candidate_name(nom):
         return None
 
     # Vérifier les noms de gauche
-    for candidat in CANDIDATS_GAUCHE_ALL:
-        if candidat.upper() in nom or nom in candidat.upper():
-            return "Gauche"
+    if nom in _GAUCHE_FRAGMENTS or _GAUCHE_NOMS_RE.search(nom):
+        return "Gauche"
 
     # Vérifier les noms de droite
-    for candidat in CANDIDATS_DROITE:
-        if candidat.upper() in nom or nom in candidat.upper():
-            return "Droite"
+    if nom in _DROITE_FRAGMENTS or _DROITE_NOMS_RE.search(nom):
+        return "Droite"
 
     return None
 
@@ -128,124 +177,338 @@ def classify_by_liste(libelle):
     if not libelle:
         return None
 
-    gauche_kw = ['insoumis', 'communiste', 'socialiste', 'écologi', 'vert',
-                 'lutte ouvrière', 'npa', 'gauche', 'ouvrier', 'pcf', 'eelv',
-                 'nupes', 'front de gauche']
-    droite_kw = ['national', 'républicain', 'marche', 'renaissance', 'ensemble',
-                 'modem', 'horizons', 'reconquête', 'zemmour', 'droite', 'ump',
-                 'frexit', 'patriote', 'udi', 'centriste', 'fillon']
-
-    for kw in gauche_kw:
+    # Boucle `in` gardée : sur des libellés courts, plus rapide qu'une expression
+    # compilée (arrêt au premier mot-clé trouvé)
+    for kw in LISTE_GAUCHE_KW:
         if kw in libelle:
             return "Gauche"
-    for kw in droite_kw:
+    for kw in LISTE_DROITE_KW:
         if kw in libelle:
             return "Droite"
     return None
 
 
-def main():
-    print("=" * 70)
-    print("CLASSIFICATION DES CANDIDATS V2 - GAUCHE / DROITE")
-    print("(Gère les présidentielles par nom de candidat)")
-    print("(LREM/Macron classé à DROITE)")
-    print("=" * 70)
+def classify_row(election, nuance, libelle, nom):
+    """Classifie une ligne du fichier élections (présidentielles par nom, sinon nuance/liste)."""
+    camp = None
 
-    total = 0
-    gauche_count = 0
-    droite_count = 0
-    col_idx = {}
+    # 1. Pour les présidentielles, utiliser le nom du candidat
+    if '_pres_' in election and nom:
+        camp = classify_by_candidate_name(nom)
 
-    # Stats par type d'élection
-    stats = {}
+    # 2. Sinon, utiliser la nuance
+    if camp is None and nuance:
+        camp = classify_nuance(nuance)
 
-    print(f"\nLecture de {INPUT_FILE}...")
-    print(f"Écriture vers {OUTPUT_FILE}...")
+    # 3. Sinon, utiliser le libellé de liste
+    if camp is None and libelle:
+        camp = classify_by_liste(libelle)
 
-    with open(INPUT_FILE, 'r', encoding='utf-8') as infile, \
-         open(OUTPUT_FILE, 'w', encoding='utf-8', newline='') as outfile:
+    # 4. Défaut: Droite
+    if camp is None:
+        camp = "Droite"
 
-        reader = csv.reader(infile, delimiter=SEPARATOR)
-        writer = csv.writer(outfile, delimiter=SEPARATOR)
+    return camp
 
-        headers = next(reader)
-        for i, h in enumerate(headers):
-            col_idx[h] = i
 
-        new_headers = headers + ["Camp"]
-        writer.writerow(new_headers)
+def cle_camp(election, nuance, libelle, nom):
+    """Clé de classify_row : présidentielle ou non, nuance, liste, et le nom pour les présidentielles."""
+    if '_pres_' in election:
+        return ('pres', nuance, libelle, nom)
+    return ('', nuance, libelle, '')
 
-        for row in reader:
-            total += 1
 
-            if total % 2_000_000 == 0:
-                print(f"  {total:,} lignes traitées...")
+def classify_cle(cle):
+    """classify_row appliquée à une clé de cle_camp."""
+    type_election, nuance, libelle, nom = cle
+    return classify_row('_pres_' if type_election == 'pres' else '', nuance, libelle, nom)
 
-            def get_val(col):
-                if col in col_idx and len(row) > col_idx[col]:
-                    return row[col_idx[col]].strip()
-                return ""
 
-            election = get_val('id_election')
-            nuance = get_val('Nuance')
-            libelle = get_val('Libellé Abrégé Liste')
-            nom = get_val('Nom')
+def empreinte_camps():
+    """Empreinte des règles de classify_row : un résultat dérivé est périmé si elle change."""
+    return empreinte_regles(GAUCHE_NUANCES, DROITE_NUANCES, CANDIDATS_GAUCHE_ALL,
+                            CANDIDATS_DROITE, LISTE_GAUCHE_KW, LISTE_DROITE_KW)
 
-            # Classification
-            camp = None
 
-            # 1. Pour les présidentielles, utiliser le nom du candidat
-            if '_pres_' in election and nom:
-                camp = classify_by_candidate_name(nom)
+def table_camps():
+    """Classifieur par table de clés distinctes (persistée, invalidée si les règles changent)."""
+    return TableCamps('classify_v2', cle_camp, classify_cle, empreinte_camps())
 
-            # 2. Sinon, utiliser la nuance
-            if camp is None and nuance:
-                camp = classify_nuance(nuance)
 
-            # 3. Sinon, utiliser le libellé de liste
-            if camp is None and libelle:
-                camp = classify_by_liste(libelle)
+def _test_noms(noms_re, fragments):
+    """Test vectorisé de classify_by_candidate_name pour un ensemble de candidats."""
+    def test(noms):
+        noms = noms.str.strip().str.upper()
+        # candidat in nom (expression compilée) ou nom in candidat (sous-chaîne connue)
+        return (noms != '') & (contient_un(noms, noms_re) | noms.isin(fragments))
+    return test
 
-            # 4. Défaut: Droite
-            if camp is None:
-                camp = "Droite"
 
-            # Compteurs
-            if camp == "Gauche":
-                gauche_count += 1
-            else:
-                droite_count += 1
+_NOM_GAUCHE = _test_noms(_GAUCHE_NOMS_RE, _GAUCHE_FRAGMENTS)
+_NOM_DROITE = _test_noms(_DROITE_NOMS_RE, _DROITE_FRAGMENTS)
 
-            # Stats par élection
-            year_type = election.split('_')[0] + '_' + election.split('_')[1] if '_' in election else election
-            if year_type not in stats:
-                stats[year_type] = {'gauche': 0, 'droite': 0}
-            if camp == "Gauche":
-                stats[year_type]['gauche'] += 1
-            else:
-                stats[year_type]['droite'] += 1
 
-            new_row = row + [camp]
-            writer.writerow(new_row)
+def classify_columns(election, nuance, libelle, nom):
+    """Version vectorisée de classify_row sur des colonnes entières.
+
+    Accepte des Series pandas, tableaux Arrow ou listes (valeurs manquantes
+    = chaîne vide) et retourne une colonne catégorielle 'Droite'/'Gauche',
+    identique à classify_row appliquée ligne par ligne.
+    """
+    election, nuance, libelle, nom = map(colonne, (election, nuance, libelle, nom))
+
+    # 1. Présidentielles : nom de candidat reconnu
+    pres = par_valeur(election, lambda e: e.str.contains('_pres_', regex=False))
+    nom_gauche = par_valeur(nom, _NOM_GAUCHE)
+    par_nom = pres & (nom_gauche | par_valeur(nom, _NOM_DROITE))
+
+    # 2. Nuance non vide (toujours concluante : Droite par défaut)
+    avec_nuance = par_valeur(nuance, lambda n: n.str.strip() != '')
+    nuance_gauche = par_valeur(nuance, lambda n: n.str.strip().str.upper().isin(GAUCHE_NUANCES))
+
+    # 3. Libellé de liste (un mot-clé de gauche l'emporte), 4. défaut Droite
+    liste_gauche = par_valeur(libelle, lambda lib: contient_un(lib.str.lower(), LISTE_GAUCHE_KW))
+
+    gauche = np.where(par_nom, nom_gauche,
+                      np.where(avec_nuance, nuance_gauche, liste_gauche))
+    return categorie_camp(gauche)
+
+
+def classify_frame(df):
+    """Camp de chaque ligne d'un DataFrame (id_election, Nuance, Libellé Abrégé Liste, Nom)."""
+    return classify_columns(df['id_election'], df['Nuance'],
+                            df['Libellé Abrégé Liste'], df['Nom'])
+
+
+def charger_camps(source=INPUT_FILE, camps_file=CAMPS_FILE, meta_file=CAMPS_META):
+    """Camps du fichier annexe (octet b'G'/b'D' par ligne), projetés en mémoire.
+
+    Retourne None si l'annexe est absente ou ne correspond plus à la source
+    (fichier source modifié depuis, ou nombre de lignes différent) ou aux
+    règles de classification (empreinte_camps différente).
+    """
+    if not os.path.exists(camps_file) or not os.path.exists(meta_file):
+        return None
+    with open(meta_file, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('source') != signature_source(source):
+        return None
+    if meta.get('empreinte') != empreinte_camps():
+        return None
+    if os.path.getsize(camps_file) != meta.get('lignes'):
+        return None
+    if not meta['lignes']:
+        return b''
+    with open(camps_file, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ConsommateurClassification:
+    """Consommateur du scan partagé : camp de chaque ligne et comptes par élection.
+
+    Le camp est écrit dans camps_file (un octet par ligne, cf. charger_camps) ;
+    output_file, s'il est donné, reçoit en plus la copie complète du fichier
+    avec la colonne Camp. Avec None pour les deux, seules les statistiques
+    sont calculées.
+
+    Picklable et fusionnable (mode parallèle) : les copies des workers
+    gardent leur texte classifié et leurs camps en mémoire, écrits dans
+    l'ordre du fichier par fusionner ; les compteurs sont additionnés.
+    """
+
+    def __init__(self, output_file=None, classifier=classify_row,
+                 camps_file=CAMPS_FILE, meta_file=CAMPS_META, source=INPUT_FILE):
+        self.output_file = output_file
+        self.classifier = classifier
+        self.camps_file = camps_file
+        self.meta_file = meta_file
+        self.source = source
+        self.outfile = None
+        self.writer = None
+        self.campsfile = None
+        self.camps = bytearray()
+        self.lignes_camps = 0
+        self.col_idx = {}
+        self.total = 0
+        self.gauche_count = 0
+        self.droite_count = 0
+        # Stats par type d'élection
+        self.stats = {}
+        # Vrai pour une copie envoyée à un worker (sorties en mémoire)
+        self.copie = False
+        self.texte = ''
+
+    def debut(self, headers):
+        self.col_idx = {h: i for i, h in enumerate(headers)}
+        if self.copie:
+            # Copie d'un worker : sorties en mémoire, écrites par fusionner
+            if self.output_file:
+                self.outfile = io.StringIO(newline='')
+                self.writer = csv.writer(self.outfile, delimiter=SEPARATOR)
+            self.camps = bytearray()
+            return
+        if self.output_file:
+            self.outfile = open(self.output_file, 'w', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.outfile, delimiter=SEPARATOR)
+            self.writer.writerow(headers + ["Camp"])
+        if self.camps_file:
+            os.makedirs(os.path.dirname(self.camps_file) or '.', exist_ok=True)
+            # Annexe invalide tant que fin() n'a pas réécrit sa signature
+            if os.path.exists(self.meta_file):
+                os.remove(self.meta_file)
+            self.campsfile = open(self.camps_file, 'wb')
+            self.camps = bytearray()
+            self.lignes_camps = 0
+
+    def traiter(self, row):
+        self.total += 1
+        col_idx = self.col_idx
+
+        def get_val(col):
+            if col in col_idx and len(row) > col_idx[col]:
+                return row[col_idx[col]].strip()
+            return ""
+
+        election = get_val('id_election')
+        camp = self.classifier(election, get_val('Nuance'),
+                               get_val('Libellé Abrégé Liste'), get_val('Nom'))
+
+        # Compteurs
+        if camp == "Gauche":
+            self.gauche_count += 1
+        else:
+            self.droite_count += 1
+
+        # Stats par élection
+        year_type = election.split('_')[0] + '_' + election.split('_')[1] if '_' in election else election
+        if year_type not in self.stats:
+            self.stats[year_type] = {'gauche': 0, 'droite': 0}
+        if camp == "Gauche":
+            self.stats[year_type]['gauche'] += 1
+        else:
+            self.stats[year_type]['droite'] += 1
+
+        if self.writer is not None:
+            self.writer.writerow(row + [camp])
+
+        # Toutes les lignes arrivent ici, dans l'ordre du fichier : l'octet
+        # ajouté est celui de la ligne courante
+        if self.camps_file:
+            self.camps += CODES_CAMP["Gauche"] if camp == "Gauche" else CODES_CAMP["Droite"]
+            if self.campsfile is not None and len(self.camps) >= TAMPON_CAMPS:
+                self._vider_camps()
+
+    def __getstate__(self):
+        # Les fichiers restent dans le processus principal ; une copie revenant
+        # d'un worker emporte son texte classifié
+        etat = self.__dict__.copy()
+        if self.copie and self.outfile is not None:
+            etat['texte'] = self.outfile.getvalue()
+        etat.update(outfile=None, writer=None, campsfile=None, copie=True)
+        return etat
+
+    def fusionner(self, autre):
+        """Ajoute le résultat d'une plage traitée par un worker (mode parallèle)."""
+        self.total += autre.total
+        self.gauche_count += autre.gauche_count
+        self.droite_count += autre.droite_count
+        for year_type, compte in autre.stats.items():
+            stats = self.stats.setdefault(year_type, {'gauche': 0, 'droite': 0})
+            stats['gauche'] += compte['gauche']
+            stats['droite'] += compte['droite']
+
+        if self.outfile is not None:
+            self.outfile.write(autre.texte)
+        if self.campsfile is not None:
+            self.camps += autre.camps
+            if len(self.camps) >= TAMPON_CAMPS:
+                self._vider_camps()
+        if isinstance(self.classifier, TableCamps):
+            self.classifier.fusionner(autre.classifier)
+
+    def _vider_camps(self):
+        self.campsfile.write(self.camps)
+        self.lignes_camps += len(self.camps)
+        self.camps = bytearray()
+
+    def fin(self):
+        if self.outfile is not None:
+            self.outfile.close()
+            self.outfile = None
+            self.writer = None
+        # Clés distinctes vues pendant le scan : ajoutées à la table persistée
+        if isinstance(self.classifier, TableCamps):
+            self.classifier.enregistrer()
+        if self.campsfile is not None:
+            self._vider_camps()
+            self.campsfile.close()
+            self.campsfile = None
+            # Signature de la source et empreinte des règles : l'annexe est ignorée
+            # si l'une ou l'autre change
+            meta = {'source': signature_source(self.source), 'lignes': self.lignes_camps,
+                    'empreinte': empreinte_camps()}
+            with open(self.meta_file, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+
+    def resume(self):
+        """Affiche le résumé de la classification."""
+        total = self.total
+        print("\n" + "=" * 70)
+        print("RÉSUMÉ DE LA CLASSIFICATION")
+        print("=" * 70)
+        print(f"  Total de lignes: {total:,}")
+        if total:
+            print(f"  Gauche: {self.gauche_count:,} ({100*self.gauche_count/total:.1f}%)")
+            print(f"  Droite: {self.droite_count:,} ({100*self.droite_count/total:.1f}%)")
+
+        print("\n  Par élection présidentielle:")
+        for key in sorted(self.stats.keys()):
+            if 'pres' in key:
+                g = self.stats[key]['gauche']
+                d = self.stats[key]['droite']
+                t = g + d
+                print(f"    {key}: Gauche {100*g/t:.1f}% / Droite {100*d/t:.1f}%")
+
+        if self.camps_file:
+            print(f"\n  Camps: {self.camps_file} ({self.lignes_camps:,} octets)")
+        if self.output_file:
+            print(f"\n  Fichier créé: {self.output_file}")
+        print("=" * 70)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Classification Gauche/Droite des candidats")
+    parser.add_argument("--fichier-complet", action="store_true",
+                        help=f"écrire aussi la copie complète avec colonne Camp ({OUTPUT_FILE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processus de classification (plages du fichier en parallèle, "
+                             "sortie écrite dans l'ordre)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
-    print("\n" + "=" * 70)
-    print("RÉSUMÉ DE LA CLASSIFICATION")
     print("=" * 70)
-    print(f"  Total de lignes: {total:,}")
-    print(f"  Gauche: {gauche_count:,} ({100*gauche_count/total:.1f}%)")
-    print(f"  Droite: {droite_count:,} ({100*droite_count/total:.1f}%)")
-
-    print("\n  Par élection présidentielle:")
-    for key in sorted(stats.keys()):
-        if 'pres' in key:
-            g = stats[key]['gauche']
-            d = stats[key]['droite']
-            t = g + d
-            print(f"    {key}: Gauche {100*g/t:.1f}% / Droite {100*d/t:.1f}%")
-
-    print(f"\n  Fichier créé: {OUTPUT_FILE}")
+    print("CLASSIFICATION DES CANDIDATS V2 - GAUCHE / DROITE")
+    print("(Gère les présidentielles par nom de candidat)")
+    print("(LREM/Macron classé à DROITE)")
     print("=" * 70)
 
+    output_file = OUTPUT_FILE if args.fichier_complet else None
+    print(f"\nLecture de {INPUT_FILE}...")
+    print(f"Écriture vers {CAMPS_FILE}...")
+    if output_file:
+        print(f"Écriture vers {output_file}...")
+
+    classification = ConsommateurClassification(output_file, table_camps())
+    scan = ScanElections(INPUT_FILE, SEPARATOR, progression=2_000_000).ajouter(classification)
+    # Passage complet : l'index des blocs est reconstruit au passage s'il n'est plus à jour
+    if not est_compresse(scan.chemin) and not index_disponible(INPUT_FILE):
+        scan.ajouter(IndexElections(INPUT_FILE))
+    scan.executer(workers=args.workers)
+    classification.resume()
+
 
 if __name__ == "__main__":
     main()
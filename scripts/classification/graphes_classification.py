@@ -30,6 +30,11 @@ from sklearn.metrics import (
 )
 from sklearn.preprocessing import label_binarize
 
+# Racine du dépôt dans le path (script lancé directement : python scripts/classification/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.classification.classification_vectorisee import (
+    categorie_camp, colonne, contient_un, par_valeur)
+
 # ─────────────────────────────────────────────
 # CONFIG
 # ─────────────────────────────────────────────
@@ -62,17 +67,28 @@ DROITE_NUANCES = {
     'MDM','LMDM','DVC','LDVC','DIV','LDIV','REG','LREG',
 }
 
+LISTE_GAUCHE_KW = ['socialiste','communiste','gauche','écologi','insoumis']
+LISTE_DROITE_KW = ['national','républicain','droite','renaissance','ensemble','libéral']
+
 def classify_camp(nuance, libelle=""):
     n = (nuance or "").strip().upper()
     l = (libelle or "").strip().lower()
     if n in GAUCHE_NUANCES: return "Gauche"
     if n in DROITE_NUANCES: return "Droite"
-    for kw in ['socialiste','communiste','gauche','écologi','insoumis']:
+    for kw in LISTE_GAUCHE_KW:
         if kw in l: return "Gauche"
-    for kw in ['national','républicain','droite','renaissance','ensemble','libéral']:
+    for kw in LISTE_DROITE_KW:
         if kw in l: return "Droite"
     return "Droite"
 
+def classify_camps(nuance, libelle):
+    """classify_camp sur des colonnes entières → colonne catégorielle Droite/Gauche."""
+    nuance, libelle = colonne(nuance), colonne(libelle)
+    n_gauche = par_valeur(nuance, lambda n: n.str.strip().str.upper().isin(GAUCHE_NUANCES))
+    n_droite = par_valeur(nuance, lambda n: n.str.strip().str.upper().isin(DROITE_NUANCES))
+    l_gauche = par_valeur(libelle, lambda l: contient_un(l.str.lower(), LISTE_GAUCHE_KW))
+    return categorie_camp(n_gauche | (~n_droite & l_gauche))
+
 
 # ─────────────────────────────────────────────
 # HELPERS API
@@ -253,16 +269,16 @@ def charger_elections():
                 libelle = (get_val('Libellé Abrégé Liste')
                            or get_val('libelle_liste')
                            or get_val('libelle'))
-                camp    = classify_camp(nuance, libelle)
 
                 try:
                     voix = int(get_val('Voix') or get_val('voix') or get_val('nb_voix') or 0)
                 except Exception:
                     voix = 0
 
+                # Camp calculé en fin de lecture sur les colonnes entières
                 rows.append({
                     'codgeo': codgeo, 'annee': annee,
-                    'tour': tour, 'camp': camp, 'voix': voix
+                    'tour': tour, 'nuance': nuance, 'libelle': libelle, 'voix': voix
                 })
 
         print(f"  ✅ {total:,} lignes lues — {len(rows):,} conservées (muni + dept 34)")
@@ -276,7 +292,11 @@ def charger_elections():
         if not rows:
             return pd.DataFrame()
 
-    return pd.DataFrame(rows)
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows)
+    df.insert(3, 'camp', np.asarray(classify_camps(df.pop('nuance'), df.pop('libelle'))))
+    return df
 
 
 def charger_population():
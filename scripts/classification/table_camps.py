@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Table des camps par clé distincte, persistée dans SQLite
+
+Le camp d'une ligne ne dépend que d'une clé (type d'élection, nuance,
+libellé de liste, nom), beaucoup moins variée que les lignes. Chaque
+classifieur garde sa table clé → camp dans data/output/classification_camps.db :
+un scan ne fait plus qu'une recherche dans un dictionnaire par ligne, les
+règles ne sont appliquées qu'aux clés jamais vues.
+
+La table d'un classifieur est associée à l'empreinte de ses règles
+(ensembles de nuances, mots-clés, noms) : si elles changent, elle est
+vidée et recalculée automatiquement.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+
+CAMPS_DB = "data/output/classification_camps.db"
+
+DDL = """
+CREATE TABLE IF NOT EXISTS regles_camps (
+    classifieur TEXT PRIMARY KEY,
+    empreinte TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS camps (
+    classifieur TEXT NOT NULL,
+    type_election TEXT NOT NULL,
+    nuance TEXT NOT NULL,
+    libelle TEXT NOT NULL,
+    nom TEXT NOT NULL,
+    camp TEXT NOT NULL,
+    PRIMARY KEY (classifieur, type_election, nuance, libelle, nom)
+);
+"""
+
+
+def empreinte_regles(*regles):
+    """Empreinte des règles d'un classifieur (ensembles triés, listes dans l'ordre)."""
+    normalisees = [sorted(r) if isinstance(r, (set, frozenset)) else list(r) for r in regles]
+    return hashlib.sha256(json.dumps(normalisees, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class TableCamps:
+    """Classifieur mémoïsé par clé distincte, utilisable comme une fonction.
+
+    classifieur : nom de la table (un jeu de règles)
+    cle         : fonction(election, nuance, libelle, nom) → clé (4 chaînes)
+    calcul      : fonction(clé) → camp, appelée pour les clés absentes
+    empreinte   : empreinte des règles (voir empreinte_regles)
+
+    table(election, nuance, libelle, nom) retourne le camp ; enregistrer()
+    ajoute à la base les clés calculées depuis le chargement. Picklable et
+    fusionnable : les clés nouvelles des workers sont reprises par fusionner().
+    """
+
+    def __init__(self, classifieur, cle, calcul, empreinte, chemin=CAMPS_DB):
+        self.classifieur = classifieur
+        self.cle = cle
+        self.calcul = calcul
+        self.empreinte = empreinte
+        self.chemin = chemin
+        self.camps = {}
+        self.nouvelles = {}
+        self.perimee = True
+        self.charger()
+
+    def charger(self):
+        """Charge la table si elle a été calculée avec les mêmes règles."""
+        if not os.path.exists(self.chemin):
+            return
+        conn = sqlite3.connect(self.chemin)
+        try:
+            conn.executescript(DDL)
+            ligne = conn.execute("SELECT empreinte FROM regles_camps WHERE classifieur = ?",
+                                 (self.classifieur,)).fetchone()
+            if ligne is None:
+                return
+            if ligne[0] != self.empreinte:
+                print(f"  Règles de classification modifiées : table {self.classifieur} recalculée")
+                return
+            lignes = conn.execute("SELECT type_election, nuance, libelle, nom, camp FROM camps "
+                                  "WHERE classifieur = ?", (self.classifieur,))
+            self.camps = {tuple(row[:4]): row[4] for row in lignes}
+        finally:
+            conn.close()
+        self.perimee = False
+
+    def __call__(self, election, nuance, libelle, nom):
+        cle = self.cle(election, nuance, libelle, nom)
+        camp = self.camps.get(cle)
+        if camp is None:
+            camp = self.calcul(cle)
+            self.camps[cle] = camp
+            self.nouvelles[cle] = camp
+        return camp
+
+    def fusionner(self, autre):
+        """Reprend les clés calculées par une copie (worker)."""
+        for cle, camp in autre.nouvelles.items():
+            if cle not in self.camps:
+                self.camps[cle] = camp
+                self.nouvelles[cle] = camp
+
+    def enregistrer(self):
+        """Ajoute les clés nouvelles à la base (et remplace une table périmée)."""
+        if not self.nouvelles and not self.perimee:
+            return
+        os.makedirs(os.path.dirname(self.chemin) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.chemin)
+        try:
+            conn.executescript(DDL)
+            if self.perimee:
+                conn.execute("DELETE FROM camps WHERE classifieur = ?", (self.classifieur,))
+                conn.execute("INSERT OR REPLACE INTO regles_camps VALUES (?, ?)",
+                             (self.classifieur, self.empreinte))
+            conn.executemany(
+                "INSERT OR REPLACE INTO camps VALUES (?, ?, ?, ?, ?, ?)",
+                ((self.classifieur, *cle, camp) for cle, camp in self.nouvelles.items()))
+            conn.commit()
+        finally:
+            conn.close()
+        self.nouvelles = {}
+        self.perimee = False
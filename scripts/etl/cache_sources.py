@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Cache des sources parsées (onglets xlsx, CSV, classeurs INSEE)
+
+Chaque source n'est parsée qu'une fois par exécution : les étapes de
+l'ETL qui lisent la même source (communes et population) reçoivent
+chacune une copie des mêmes DataFrames.
+
+Une copie Parquet typée des DataFrames est aussi écrite dans data/cache/ :
+les exécutions suivantes la relisent sans ouvrir le classeur ni reparser
+le CSV. Une entrée est identifiée par la source (chemin) et la variante
+de lecture (onglet, séparateur, encodage, départements…), et reste
+valable tant que la taille et la date de la source n'ont pas changé. Si
+seule la date a changé (copie, git checkout), l'empreinte SHA-256 du
+contenu, enregistrée avec l'entrée, décide.
+
+Les entrées sont décrites dans data/cache/index.json. Au-delà de
+TAILLE_MAX_CACHE octets, les entrées les moins récemment lues sont
+supprimées (LRU).
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/etl/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.sources_compressees import ouvrir_source, resoudre_source
+
+CACHE_DIR = "data/cache"
+INDEX_CACHE = "index.json"
+TAILLE_MAX_CACHE = 2 * 1024 ** 3  # octets de copies Parquet gardées au plus
+TAILLE_BLOC = 1024 * 1024  # octets lus par bloc pour l'empreinte
+
+# Copies Parquet écrites et relues (False : sources reparsées à chaque exécution,
+# option --sans-cache de l'ETL)
+ACTIF = True
+
+# Sources lues plusieurs fois pendant l'exécution (garder=True) :
+# (chemin, variante, taille, date) → {nom: DataFrame}
+_memoire = {}
+
+# Index, copies et mémoire partagés par les étapes de l'ETL exécutées en
+# parallèle (threads, voir ordonnanceur) ; le parsing se fait hors verrou
+_verrou = threading.Lock()
+
+
+def empreinte_fichier(chemin):
+    """SHA-256 du contenu du fichier (hexadécimal)."""
+    h = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(TAILLE_BLOC), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def _nom_entree(chemin, variante):
+    """Nom de base des copies d'une entrée : <source>.<hachage de la source et de la variante>."""
+    nom = re.sub(r'[^\w-]', '_', os.path.basename(chemin).split('.')[0])
+    cle = hashlib.sha256(f"{chemin}\0{variante}".encode('utf-8')).hexdigest()[:16]
+    return f"{nom}.{cle}"
+
+
+def _lire_index():
+    chemin = os.path.join(CACHE_DIR, INDEX_CACHE)
+    if not os.path.exists(chemin):
+        return {}
+    try:
+        with open(chemin, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}  # index illisible : les copies seront réécrites
+
+
+def _ecrire_index(index):
+    """Écrit l'index (fichier temporaire puis renommage)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    chemin = os.path.join(CACHE_DIR, INDEX_CACHE)
+    with open(chemin + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(chemin + ".tmp", chemin)
+
+
+def _normaliser(df):
+    """Colonnes texte mêlant nombres et chaînes → chaînes (un type par colonne pour Parquet).
+
+    Les valeurs manquantes restent manquantes ; le DataFrame servi est le
+    même au premier parsing et à la relecture du cache.
+    """
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) in (
+                'mixed', 'mixed-integer'):
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+def _colonnes_objet(df):
+    """Colonnes de type object : Parquet les relit typées (int64, float64, texte)."""
+    return [col for col in df.columns if df[col].dtype == object]
+
+
+def _restaurer_objets(df, colonnes):
+    """Colonnes object relues d'une copie Parquet remises comme au parsing.
+
+    Dans une colonne object, read_excel et les lecteurs INSEE rendent les
+    nombres entiers en int : un entier relu en float (colonne avec des
+    valeurs manquantes) redevient un int, une valeur manquante redevient NaN.
+    """
+    for col in colonnes:
+        if df[col].dtype != object:
+            df[col] = pd.Series(
+                [np.nan if pd.isna(v) else int(v) if isinstance(v, float) and v.is_integer() else v
+                 for v in df[col].tolist()],
+                index=df.index, dtype=object)
+    return df
+
+
+def _ecrire_copie(df, destination):
+    """Écrit la copie Parquet (fichier temporaire puis renommage) ; False si impossible."""
+    if not all(isinstance(c, str) for c in df.columns):
+        return False  # Parquet n'accepte que des noms de colonnes texte
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    temporaire = destination + ".tmp"
+    try:
+        df.to_parquet(temporaire, index=False)
+    except (pa.ArrowException, OSError) as e:
+        print(f"  ⚠ Copie Parquet impossible ({os.path.basename(destination)}) : {e}")
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        return False
+    os.replace(temporaire, destination)
+    return True
+
+
+def _supprimer_copies(entree):
+    for fichier in entree.get('tables', {}).values():
+        chemin = os.path.join(CACHE_DIR, fichier)
+        if os.path.exists(chemin):
+            os.remove(chemin)
+
+
+def _entree_valide(index, nom, source, st):
+    """Vrai si l'entrée correspond à la source : même taille et même date, ou même contenu.
+
+    Une entrée dont seule la date diffère est mise à jour si l'empreinte
+    du contenu est la même.
+    """
+    entree = index.get(nom)
+    if entree is None or entree['taille'] != st.st_size:
+        return False
+    if not all(os.path.exists(os.path.join(CACHE_DIR, f)) for f in entree['tables'].values()):
+        return False
+    if entree['mtime'] != st.st_mtime:
+        if entree.get('empreinte') != empreinte_fichier(source):
+            return False
+        entree['mtime'] = st.st_mtime
+    return True
+
+
+def _evincer(index, garder):
+    """Supprime les entrées les moins récemment lues au-delà de TAILLE_MAX_CACHE,
+    ainsi que les copies qu'aucune entrée ne référence."""
+    total = sum(entree['octets'] for entree in index.values())
+    for nom, entree in sorted(index.items(), key=lambda kv: kv[1]['acces']):
+        if total <= TAILLE_MAX_CACHE:
+            break
+        if nom == garder:
+            continue
+        _supprimer_copies(entree)
+        total -= entree['octets']
+        del index[nom]
+        print(f"  Cache : entrée {os.path.basename(entree['source'])} ({entree['variante']}) "
+              f"supprimée (cache limité à {TAILLE_MAX_CACHE / (1024 * 1024):,.0f} MB)")
+
+    referencees = {f for entree in index.values() for f in entree['tables'].values()}
+    for chemin in glob.glob(os.path.join(glob.escape(CACHE_DIR), "*.parquet*")):
+        if os.path.basename(chemin) not in referencees:
+            os.remove(chemin)
+
+
+def cache_valide(chemin, variante):
+    """Vrai si le cache (mémoire ou copie Parquet) sert déjà cette lecture de la source."""
+    source = resoudre_source(chemin)
+    st = os.stat(source)
+    with _verrou:
+        if (os.path.abspath(source), variante, st.st_size, st.st_mtime) in _memoire:
+            return True
+        if not ACTIF:
+            return False
+        index = _lire_index()
+        valide = _entree_valide(index, _nom_entree(os.path.abspath(source), variante),
+                                source, st)
+        if valide:
+            _ecrire_index(index)  # date éventuellement mise à jour
+        return valide
+
+
+def tables_en_cache(chemin, variante, lire, garder=False):
+    """DataFrames {nom: DataFrame} lus d'une source par lire(), parsés une seule fois.
+
+    variante décrit la lecture (onglet, options…) : deux lectures différentes
+    d'une même source sont deux entrées du cache. Ordre de lecture : mémoire
+    de l'exécution, copies Parquet de l'entrée si la source n'a pas changé,
+    puis lire() (copies écrites au passage). garder : DataFrames gardés en
+    mémoire pour les étapes suivantes qui relisent la source ; chaque appel
+    reçoit alors ses propres copies.
+    """
+    source = resoudre_source(chemin)
+    st = os.stat(source)
+    abs_source = os.path.abspath(source)
+    cle = (abs_source, variante, st.st_size, st.st_mtime)
+    nom_entree = _nom_entree(abs_source, variante)
+    tables = None
+    with _verrou:
+        if cle in _memoire:
+            return {nom: df.copy() for nom, df in _memoire[cle].items()}
+        index = _lire_index() if ACTIF else {}
+        if ACTIF and _entree_valide(index, nom_entree, source, st):
+            entree = index[nom_entree]
+            print(f"  {os.path.basename(source)} ({variante}) relu depuis le cache")
+            tables = {nom: _restaurer_objets(pd.read_parquet(os.path.join(CACHE_DIR, fichier)),
+                                             entree['objets'][nom])
+                      for nom, fichier in entree['tables'].items()}
+            entree['acces'] = time.time()
+            _ecrire_index(index)
+
+    if tables is None:
+        tables = {nom: _normaliser(df) for nom, df in lire().items()}
+        if ACTIF:
+            with _verrou:
+                _enregistrer(_lire_index(), nom_entree, abs_source, source, variante, st,
+                             tables)
+
+    if not garder:
+        return tables
+    with _verrou:
+        _memoire[cle] = tables
+    return {nom: df.copy() for nom, df in tables.items()}
+
+
+def _enregistrer(index, nom_entree, abs_source, source, variante, st, tables):
+    """Écrit les copies Parquet d'une entrée puis l'index (entrée absente si une copie échoue)."""
+    if nom_entree in index:
+        _supprimer_copies(index.pop(nom_entree))
+    fichiers = {}
+    for i, (nom, df) in enumerate(tables.items()):
+        fichier = f"{nom_entree}.{i}.parquet"
+        if not _ecrire_copie(df, os.path.join(CACHE_DIR, fichier)):
+            _supprimer_copies({'tables': fichiers})
+            return
+        fichiers[nom] = fichier
+
+    index[nom_entree] = {
+        'source': abs_source,
+        'variante': variante,
+        'taille': st.st_size,
+        'mtime': st.st_mtime,
+        'empreinte': empreinte_fichier(source),
+        'tables': fichiers,
+        'objets': {nom: _colonnes_objet(df) for nom, df in tables.items()},
+        'octets': sum(os.path.getsize(os.path.join(CACHE_DIR, f)) for f in fichiers.values()),
+        'acces': time.time(),
+    }
+    _evincer(index, garder=nom_entree)
+    _ecrire_index(index)
+    print(f"  {os.path.basename(source)} ({variante}) mis en cache : "
+          f"{index[nom_entree]['octets'] / (1024 * 1024):.1f} MB")
+
+
+def lire_feuille(chemin, feuille, header=0):
+    """DataFrame d'un onglet xlsx (comme pd.read_excel), parsé une seule fois par exécution."""
+    variante = f"onglet {feuille}, en-tête {header}"
+    return tables_en_cache(chemin, variante, lambda: {
+        'onglet': pd.read_excel(chemin, sheet_name=feuille, header=header)}, garder=True)['onglet']
+
+
+def lire_csv(chemin, **options):
+    """DataFrame d'un CSV (comme pd.read_csv avec ces options), parsé une seule fois.
+
+    La source peut être compressée (décompression au vol, voir sources_compressees).
+    """
+    variante = "csv " + json.dumps(options, sort_keys=True, ensure_ascii=False,
+                                   default=lambda v: getattr(v, '__name__', str(v)))
+
+    def lire():
+        with ouvrir_source(chemin) as f:
+            return {'csv': pd.read_csv(f, **options)}
+
+    return tables_en_cache(chemin, variante, lire)['csv']
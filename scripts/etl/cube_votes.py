@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Cube national des voix Gauche/Droite, construit pendant l'ETL
+
+Somme des voix par (élection, département, commune, camp) pour tous les
+types d'élection et tous les départements, stockée dans
+data/output/votes_national.db (table votes_camps, quelques MB). Les
+graphiques nationaux (présidentielles, revenus vs votes) l'interrogent en
+quelques millisecondes au lieu de relire le fichier élections.
+
+Le camp est celui de classify_candidats_v2 (présidentielles par nom de
+candidat). Le cube est ignoré par les lecteurs si le fichier élections ou
+les règles de classification ont changé depuis sa construction.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/etl/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.elections_scan import ELECTIONS_FILE
+from scripts.etl.sources_compressees import signature_source, source_existe
+from scripts.classification.classify_candidats_v2 import (
+    classify_frame, empreinte_camps, table_camps)
+
+CUBE_DB = "data/output/votes_national.db"
+
+DDL = """
+CREATE TABLE IF NOT EXISTS votes_camps (
+    id_election TEXT NOT NULL,
+    type_election TEXT NOT NULL,
+    tour INTEGER NOT NULL,
+    departement TEXT NOT NULL,
+    commune TEXT NOT NULL,
+    camp TEXT NOT NULL,
+    voix INTEGER NOT NULL,
+    PRIMARY KEY (id_election, departement, commune, camp)
+);
+CREATE INDEX IF NOT EXISTS idx_votes_camps_type ON votes_camps(type_election, tour);
+CREATE TABLE IF NOT EXISTS cube_source (
+    signature TEXT NOT NULL,
+    empreinte TEXT NOT NULL
+);
+"""
+
+
+def type_et_tour(id_election):
+    """'2022_pres_t1' → ('pres', 1) ; tour 1 par défaut, comme la table elections."""
+    parts = id_election.split('_')
+    type_election = parts[1] if len(parts) > 1 else ''
+    tour = int(parts[2][1]) if len(parts) > 2 and parts[2][1:2].isdigit() else 1
+    return type_election, tour
+
+
+class CubeVotes:
+    """Consommateur du scan partagé : voix par (élection, département, commune, camp).
+
+    Mêmes règles que les agrégats des graphiques : lignes incomplètes
+    ignorées, voix non entières comptées 0. Picklable et fusionnable
+    (mode parallèle).
+    """
+
+    COLONNES = ['id_election', 'Code du département', 'Code de la commune', 'Voix',
+                'Nuance', 'Libellé Abrégé Liste', 'Nom']
+
+    def __init__(self, classifier=None):
+        self.classifier = table_camps() if classifier is None else classifier
+        self.voix = {}
+        self.indices = ()
+        self.n_cols = 0
+
+    def debut(self, headers):
+        col_idx = {h: i for i, h in enumerate(headers)}
+        manquantes = [c for c in self.COLONNES if c not in col_idx]
+        if manquantes:
+            raise ValueError(f"Colonnes manquantes dans le fichier élections : {manquantes}")
+        self.indices = tuple(col_idx[c] for c in self.COLONNES)
+        self.n_cols = len(headers)
+
+    def traiter(self, row):
+        if len(row) < self.n_cols:
+            return
+        i_election, i_dep, i_commune, i_voix, i_nuance, i_liste, i_nom = self.indices
+
+        election = row[i_election].strip()
+        try:
+            voix = int(row[i_voix])
+        except ValueError:
+            voix = 0
+        camp = self.classifier(election, row[i_nuance].strip(), row[i_liste].strip(),
+                               row[i_nom].strip())
+
+        cle = (election, row[i_dep].strip(), row[i_commune].strip(), camp)
+        self.voix[cle] = self.voix.get(cle, 0) + voix
+
+    def fusionner(self, autre):
+        """Ajoute le résultat d'une plage traitée par un worker (mode parallèle)."""
+        voix = self.voix
+        for cle, n in autre.voix.items():
+            voix[cle] = voix.get(cle, 0) + n
+        if hasattr(self.classifier, 'fusionner'):
+            self.classifier.fusionner(autre.classifier)
+
+    def fin(self):
+        if hasattr(self.classifier, 'enregistrer'):
+            self.classifier.enregistrer()
+
+
+def enregistrer_cube(voix, source=ELECTIONS_FILE, chemin=CUBE_DB):
+    """Écrit {(élection, département, commune, camp): voix} dans la base du cube.
+
+    L'ancien cube est remplacé d'un coup (fichier temporaire puis renommage).
+    """
+    os.makedirs(os.path.dirname(chemin) or '.', exist_ok=True)
+    temporaire = chemin + ".tmp"
+    if os.path.exists(temporaire):
+        os.remove(temporaire)
+
+    conn = sqlite3.connect(temporaire)
+    conn.executescript(DDL)
+    conn.executemany(
+        "INSERT INTO votes_camps VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((election, *type_et_tour(election), dep, commune, camp, n)
+         for (election, dep, commune, camp), n in voix.items()))
+    conn.execute("INSERT INTO cube_source VALUES (?, ?)",
+                 (json.dumps(signature_source(source)), empreinte_camps()))
+    conn.commit()
+    conn.close()
+    os.replace(temporaire, chemin)
+
+    print(f"  ✓ cube national : {len(voix):,} agrégats → {chemin}")
+
+
+def construire_depuis_parquet(destination=None):
+    """Cube calculé depuis le dataset Parquet, lot par lot (toutes les partitions)."""
+    import pyarrow.dataset as ds
+    from scripts.etl import elections_parquet
+
+    dataset = ds.dataset(destination or elections_parquet.PARQUET_DIR, format='parquet',
+                         partitioning=elections_parquet.PARTITIONNEMENT)
+    colonnes = ['id_election', 'departement', 'Code de la commune', 'Voix',
+                'Nuance', 'Libellé Abrégé Liste', 'Nom']
+
+    voix = {}
+    for batch in dataset.to_batches(columns=colonnes):
+        df = batch.to_pandas()
+        if df.empty:
+            continue
+        df['camp'] = classify_frame(df)
+        df['Voix'] = df['Voix'].fillna(0).astype('int64')
+        for col in ('id_election', 'departement', 'Code de la commune'):
+            df[col] = df[col].fillna('')
+        sommes = df.groupby(['id_election', 'departement', 'Code de la commune', 'camp'],
+                            observed=True)['Voix'].sum()
+        for cle, n in sommes.items():
+            voix[cle] = voix.get(cle, 0) + int(n)
+    return voix
+
+
+def cube_disponible(source=ELECTIONS_FILE, chemin=CUBE_DB):
+    """Vrai si le cube existe et correspond au fichier élections et aux règles actuelles."""
+    if not os.path.exists(chemin) or not source_existe(source):
+        return False
+    conn = sqlite3.connect(chemin)
+    try:
+        ligne = conn.execute("SELECT signature, empreinte FROM cube_source").fetchone()
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        conn.close()
+    if ligne is None:
+        return False
+    return (json.loads(ligne[0]) == signature_source(source)
+            and ligne[1] == empreinte_camps())
+
+
+def voix_par_departement(filtre, chemin=CUBE_DB):
+    """[(id_election, département, camp, voix)] des élections dont l'id contient filtre."""
+    conn = sqlite3.connect(chemin)
+    try:
+        return conn.execute(
+            "SELECT id_election, departement, camp, SUM(voix) FROM votes_camps "
+            "WHERE instr(id_election, ?) > 0 "
+            "GROUP BY id_election, departement, camp", (filtre,)).fetchall()
+    finally:
+        conn.close()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Conversion unique de candidats_results.txt en dataset Parquet partitionné
+
+Le fichier texte (2.3 GB) est converti une fois en un dataset Parquet
+partitionné par type d'élection, année et département (partitionnement
+« hive » : type_election=muni/annee=2020/departement=34/…), avec des
+colonnes typées (Voix en entier, pourcentages en flottant).
+
+Les lecteurs ne chargent ensuite que les partitions et colonnes utiles :
+les municipales du 34 ou les présidentielles représentent quelques MB.
+
+Le dataset est écrit dans un répertoire temporaire, avec un marqueur
+(_source.json) portant la signature du fichier source, puis mis en place
+par renommage : une conversion interrompue ne laisse pas de dataset
+tronqué, et le dataset n'est utilisé que si la source n'a pas changé.
+
+Usage :
+    python scripts/etl/elections_parquet.py
+    python main.py parquet
+"""
+
+import csv
+import json
+import os
+import shutil
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/etl/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.elections_scan import ELECTIONS_FILE, SEPARATOR
+from scripts.etl.sources_compressees import (
+    ouvrir_source, resoudre_source, signature_source, source_existe)
+
+PARQUET_DIR = "data/output/elections_parquet"
+MARQUEUR = "_source.json"  # préfixe _ : ignoré par la découverte des fichiers du dataset
+
+COLS_ENTIERES = ['Voix']
+COLS_POURCENTAGES = ['% Voix/Ins', '% Voix/Exp']
+
+# Colonnes de partition (dérivées de id_election et Code du département)
+PARTITIONNEMENT = ds.partitioning(
+    pa.schema([
+        ('type_election', pa.string()),
+        ('annee', pa.int16()),
+        ('departement', pa.string()),
+    ]),
+    flavor='hive',
+)
+
+BLOCK_SIZE = 64 * 1024 * 1024
+TAILLE_LOT = 50_000  # lignes par lot lu (lire_elections_par_lots)
+
+
+def _typer_batch(batch):
+    """Nettoie et type un batch texte, puis ajoute les colonnes de partition."""
+    df = batch.to_pandas()
+
+    for col in df.columns:
+        df[col] = df[col].str.strip()
+
+    for col in COLS_ENTIERES:
+        if col in df.columns:
+            # Comme int() : une valeur non entière ('12.5') devient nulle
+            valeurs = pd.to_numeric(df[col], errors='coerce')
+            df[col] = valeurs.where(valeurs == valeurs.round()).astype('Int64')
+    for col in COLS_POURCENTAGES:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    parts = df['id_election'].str.split('_', expand=True)
+    df['type_election'] = parts[1] if parts.shape[1] > 1 else ''
+    df['annee'] = pd.to_numeric(parts[0], errors='coerce').fillna(0).astype('int16')
+    df['departement'] = df['Code du département']
+
+    return pa.RecordBatch.from_pandas(df, preserve_index=False)
+
+
+def convertir(source=ELECTIONS_FILE, destination=PARQUET_DIR):
+    """Convertit le fichier texte en dataset Parquet partitionné (lecture en streaming).
+
+    Écriture dans destination.tmp, marqueur de la source, puis renommage.
+    """
+    source = resoudre_source(source)
+    signature = signature_source(source)  # avant la lecture : source modifiée pendant = périmé
+    print(f"Conversion de {source} → {destination}/")
+    temporaire = destination.rstrip('/') + ".tmp"
+    if os.path.exists(temporaire):
+        shutil.rmtree(temporaire)  # conversion précédente interrompue
+
+    # Tout lire en texte : le typage est fait explicitement dans _typer_batch
+    with ouvrir_source(source) as f:
+        colonnes = next(csv.reader([f.readline().decode('utf-8')], delimiter=SEPARATOR))
+
+    # Lignes incomplètes ignorées, comme dans les lecteurs csv historiques
+    def ignorer_ligne(ligne_invalide):
+        return 'skip'
+
+    # Source éventuellement compressée : décompression dans un thread
+    flux = ouvrir_source(source)
+    reader = pacsv.open_csv(
+        flux,
+        read_options=pacsv.ReadOptions(block_size=BLOCK_SIZE),
+        parse_options=pacsv.ParseOptions(delimiter=SEPARATOR,
+                                          invalid_row_handler=ignorer_ligne),
+        convert_options=pacsv.ConvertOptions(column_types={c: pa.string() for c in colonnes}),
+    )
+
+    # Le schéma de sortie est celui du premier batch typé
+    premier = _typer_batch(reader.read_next_batch())
+    total = [premier.num_rows]
+
+    def batches():
+        yield premier
+        for batch in reader:
+            total[0] += batch.num_rows
+            print(f"    {total[0]:,} lignes converties...")
+            yield _typer_batch(batch)
+
+    try:
+        ds.write_dataset(
+            batches(),
+            temporaire,
+            schema=premier.schema,
+            format='parquet',
+            partitioning=PARTITIONNEMENT,
+            max_partitions=100_000,
+        )
+    finally:
+        flux.close()
+
+    with open(os.path.join(temporaire, MARQUEUR), 'w', encoding='utf-8') as f:
+        json.dump(signature, f)
+    _remplacer(temporaire, destination)
+
+    print(f"  ✓ {total[0]:,} lignes écrites dans {destination}/")
+    return total[0]
+
+
+def _remplacer(temporaire, destination):
+    """Met le dataset écrit en place ; l'ancien n'est supprimé qu'après le renommage."""
+    ancien = destination.rstrip('/') + ".ancien"
+    if os.path.exists(ancien):
+        shutil.rmtree(ancien)
+    if os.path.exists(destination):
+        os.replace(destination, ancien)
+    os.replace(temporaire, destination)
+    if os.path.exists(ancien):
+        shutil.rmtree(ancien)
+
+
+def dataset_disponible(source=ELECTIONS_FILE, destination=PARQUET_DIR):
+    """Vrai si le dataset est complet et converti depuis la source actuelle.
+
+    Le marqueur n'est écrit qu'en fin de conversion : il porte la signature
+    (chemin, taille, date) de la source convertie. Sans fichier source, un
+    dataset complet est utilisé tel quel.
+    """
+    marqueur = os.path.join(destination, MARQUEUR)
+    if not os.path.exists(marqueur):
+        return False
+    if not source_existe(source):
+        return True  # dataset complet utilisé sans le fichier texte
+    try:
+        with open(marqueur, encoding='utf-8') as f:
+            signature = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return signature == signature_source(source)
+
+
+def _filtre_partitions(types, departements):
+    filtre = None
+    if types is not None:
+        filtre = ds.field('type_election').isin(list(types))
+    if departements is not None:
+        cond = ds.field('departement').isin(list(departements))
+        filtre = cond if filtre is None else filtre & cond
+    return filtre
+
+
+def lire_elections(types=None, departements=None, colonnes=None, destination=PARQUET_DIR):
+    """Lit les partitions demandées et retourne un DataFrame.
+
+    types        : types d'élection à garder ('muni', 'pres', …), None = tous
+    departements : codes département à garder, None = tous
+    colonnes     : colonnes à lire, None = toutes
+    """
+    dataset = ds.dataset(destination, format='parquet', partitioning=PARTITIONNEMENT)
+    table = dataset.to_table(columns=colonnes, filter=_filtre_partitions(types, departements))
+    return table.to_pandas()
+
+
+def lire_elections_par_lots(types=None, departements=None, colonnes=None,
+                            destination=PARQUET_DIR, taille_lot=TAILLE_LOT):
+    """Comme lire_elections, mais itère des DataFrames d'au plus taille_lot lignes.
+
+    La mémoire reste bornée par la taille d'un lot, quel que soit le
+    nombre de partitions retenues (tous départements).
+    """
+    dataset = ds.dataset(destination, format='parquet', partitioning=PARTITIONNEMENT)
+    for batch in dataset.to_batches(columns=colonnes, batch_size=taille_lot,
+                                    filter=_filtre_partitions(types, departements)):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def main():
+    print("=" * 70)
+    print("CONVERSION PARQUET - candidats_results.txt")
+    print("=" * 70)
+
+    if not source_existe(ELECTIONS_FILE):
+        print(f"  ⚠ Fichier manquant : {ELECTIONS_FILE}")
+        return
+
+    convertir()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Moteur de scan unique du fichier candidats_results.txt (2.1–2.3 GB)
+
+Le fichier est lu et parsé une seule fois ; chaque ligne est distribuée à
+tous les consommateurs enregistrés. Ajouter un consommateur coûte du CPU,
+pas un nouveau passage de 2 GB sur le disque.
+
+Un consommateur est un objet exposant trois méthodes :
+    debut(headers)  — appelée une fois, avec la liste des colonnes
+    traiter(row)    — appelée pour chaque ligne (liste de str)
+    fin()           — appelée une fois le fichier entièrement lu
+
+Préfiltre (optionnel) : un consommateur peut déclarer un attribut
+`prefiltre`, liste de groupes de jetons. Une ligne brute (octets) ne lui
+est utile que si, pour chaque groupe, au moins un jeton y apparaît. Ex. :
+    [('_muni_',), (';34;', ';"34";')]
+Les lignes rejetées par tous les consommateurs ne sont ni décodées ni
+parsées par csv. Le préfiltre est une condition nécessaire : le
+consommateur refait le filtrage exact sur la ligne parsée.
+
+Numérotation (optionnelle) : un consommateur qui déclare `numerote = True`
+reçoit traiter(row, numero), numero étant l'indice de la ligne dans le
+fichier (0 = première ligne après l'en-tête), préfiltre ou non. Sert à
+relire une donnée alignée par ligne (ex. : camps classifiés). Lecture en
+série uniquement.
+
+Position (optionnelle) : un consommateur qui déclare `positionne = True`
+reçoit traiter(row, debut, fin), offsets d'octets [debut, fin) de la ligne
+brute (ex. : index des blocs du fichier, voir index_elections). Fonctionne
+aussi en mode parallèle.
+
+Plages (executer(plages=…)) : seules les plages d'octets données sont
+lues, triées et alignées sur les débuts de ligne, chacune sous la forme
+(debut, fin, numero), numero étant le numéro de sa première ligne (None
+si inconnu : les consommateurs numérotés demandent alors tout le fichier).
+Les plages viennent en général de l'index (index_elections.plages_index).
+
+Mode parallèle (executer(workers=N)) : le fichier est découpé en plages
+d'octets alignées sur les fins de ligne, chaque plage est parsée dans un
+processus séparé par une copie des consommateurs, puis les copies sont
+fusionnées dans l'ordre du fichier. Les consommateurs doivent alors être
+picklables et exposer en plus :
+    fusionner(autre) — ajoute le résultat partiel d'une copie
+et, s'ils en tirent de l'aléa (esquisses), peuvent exposer :
+    plage(debut) — appelé avant debut(headers) avec l'offset de la plage,
+                   pour une graine propre à chaque copie
+Les champs ne doivent pas contenir de retour à la ligne (cas du fichier
+élections).
+
+Source compressée : si le fichier n'existe pas mais qu'une version .zst,
+.gz ou .xz est présente, elle est lue directement (décompression dans un
+thread, voir sources_compressees). Les offsets sont alors ceux du texte
+décompressé ; le mode parallèle, qui repose sur des seek, passe en série.
+
+Reprise (executer(depuis=…, fin_tranche=…)) : le fichier est traité par
+tranches (N lignes en série, une plage en parallèle) ; après chaque
+tranche, fin_tranche(debut, fin, lignes_lues) reçoit les offsets d'octets
+de la tranche, ce qui permet de valider les lignes gardées et d'enregistrer
+un point de reprise. Un scan relancé avec depuis=<offset> repart de là.
+"""
+
+import csv
+import itertools
+import os
+import pickle
+import sys
+from multiprocessing import Pool
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/etl/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.sources_compressees import est_compresse, ouvrir_source, resoudre_source
+
+ELECTIONS_FILE = "data/input/elections/candidats_results.txt"
+SEPARATOR = ";"
+
+# Taille maximale d'une plage en mode parallèle : borne ce qu'un worker
+# accumule et renvoie au processus principal
+PLAGE_MAX = 64 * 1024 * 1024
+
+
+def jetons_champ(valeur, separateur=SEPARATOR):
+    """Jetons d'un champ égal à `valeur` au milieu d'une ligne (avec ou sans guillemets)."""
+    return (f'{separateur}{valeur}{separateur}', f'{separateur}"{valeur}"{separateur}')
+
+
+def compiler_prefiltre(consommateurs):
+    """Fonction (ligne en octets → bool) combinant les préfiltres, ou None si aucun filtrage.
+
+    Une ligne est gardée si au moins un consommateur la juge utile ; un
+    consommateur sans préfiltre a besoin de toutes les lignes.
+    """
+    filtres = []
+    for consommateur in consommateurs:
+        prefiltre = getattr(consommateur, 'prefiltre', None)
+        if not prefiltre:
+            return None
+        filtres.append([tuple(j.encode('utf-8') for j in groupe) for groupe in prefiltre])
+
+    def accepte(ligne):
+        for groupes in filtres:
+            for groupe in groupes:
+                for jeton in groupe:
+                    if jeton in ligne:
+                        break
+                else:
+                    break  # aucun jeton du groupe : consommateur suivant
+            else:
+                return True
+        return False
+
+    return accepte
+
+
+class ScanElections:
+    """Lit le fichier élections une fois et alimente tous les consommateurs."""
+
+    def __init__(self, chemin=ELECTIONS_FILE, separateur=SEPARATOR, progression=5_000_000):
+        self.chemin = resoudre_source(chemin)
+        self.separateur = separateur
+        self.progression = progression
+        self.consommateurs = []
+        self.headers = []
+        self.total_lignes = 0
+        self.lignes_parsees = 0
+
+    def ajouter(self, consommateur):
+        """Enregistre un consommateur (chaînable)."""
+        self.consommateurs.append(consommateur)
+        return self
+
+    def executer(self, workers=1, depuis=None, tranche=0, bornes=(), fin_tranche=None,
+                 plages=None):
+        """Parcourt le fichier et retourne le nombre de lignes lues (hors en-tête).
+
+        depuis      : offset d'un début de ligne où reprendre (None = après l'en-tête)
+        tranche     : en série, nombre de lignes par tranche (0 = une seule tranche)
+        bornes      : offsets où une tranche doit se terminer
+        fin_tranche : fonction(debut, fin, lignes_lues) appelée après chaque tranche
+        plages      : [(debut, fin, numero)] à lire au lieu du fichier entier (None = tout)
+        """
+        if not self.consommateurs:
+            return 0
+        numerotes = any(getattr(c, 'numerote', False) for c in self.consommateurs)
+        if plages is not None and depuis is not None:
+            # Reprise : plages entamées raccourcies (numéro de leur première ligne perdu)
+            plages = [(max(debut, depuis), fin, numero if debut >= depuis else None)
+                      for debut, fin, numero in plages if fin > depuis]
+        if plages is not None and numerotes and any(p[2] is None for p in plages):
+            print("  ⚠ Consommateur numéroté sans numéros de ligne des plages : fichier entier")
+            plages = None
+
+        if workers > 1 and est_compresse(self.chemin):
+            print(f"  ⚠ Source compressée ({os.path.basename(self.chemin)}) : "
+                  "lecture en série, le découpage par plages demande un fichier décompressé")
+        elif workers > 1 and numerotes:
+            print("  ⚠ Consommateur numéroté : lecture en série")
+        elif workers > 1:
+            return self._executer_parallele(workers, depuis, bornes, fin_tranche, plages)
+
+        with ouvrir_source(self.chemin) as f:
+            self.headers = next(csv.reader([f.readline().decode('utf-8')],
+                                           delimiter=self.separateur))
+            position = f.tell()
+            if depuis is not None:
+                position = f.seek(depuis)  # en avant seulement si la source est compressée
+
+            for consommateur in self.consommateurs:
+                consommateur.debut(self.headers)
+
+            accepte = compiler_prefiltre(self.consommateurs)
+            positionnes = any(getattr(c, 'positionne', False) for c in self.consommateurs)
+            bornes = sorted(b for b in bornes if b > position)
+
+            total = 0
+            parsees = 0
+            debut_tranche, dernier = position, 0  # tranche en cours : offset et lignes lues avant
+            # Zones lues : le fichier à partir de position, ou les plages demandées
+            for debut_zone, fin_zone, numero in (plages if plages is not None
+                                                 else [(position, None, 0)]):
+                if debut_zone > position:
+                    # Rien d'utile avant debut_zone : une borne sautée clôt la tranche à
+                    # debut_zone (le point de reprise ne doit pas rester en deçà)
+                    if fin_tranche is not None and any(position < b <= debut_zone for b in bornes):
+                        fin_tranche(debut_tranche, debut_zone, total)
+                        debut_tranche, dernier = debut_zone, total
+                    position = f.seek(debut_zone)  # plages triées : seek en avant
+                decalage = numero - total if numero is not None else 0
+                while True:
+                    limite = next((b for b in bornes if b > position), None)
+                    if fin_zone is not None and (limite is None or limite > fin_zone):
+                        limite = fin_zone
+                    # Les tranches comptent les lignes lues d'une zone à l'autre
+                    reste = tranche - (total - dernier) if tranche else 0
+                    plage = _PlageLignes(f, position, limite, reste)
+                    lignes = _LignesFiltrees(plage, accepte, self.progression, total,
+                                             decalage, position if positionnes else None)
+                    # Méthodes liées résolues une fois par tranche (boucle chaude)
+                    traitements = _traitements(self.consommateurs, lignes)
+                    for row in csv.reader(lignes, delimiter=self.separateur):
+                        parsees += 1
+                        for traiter in traitements:
+                            traiter(row)
+                    if plage.position == position:
+                        break  # fin du fichier ou de la zone
+                    total = lignes.total
+                    position = plage.position
+                    if fin_tranche is not None and (plages is None or position in bornes
+                                                    or (tranche and total - dernier >= tranche)):
+                        fin_tranche(debut_tranche, position, total)
+                        debut_tranche, dernier = position, total
+            if fin_tranche is not None and total > dernier:
+                fin_tranche(debut_tranche, position, total)  # dernière tranche des plages
+
+        self.total_lignes = total
+        self.lignes_parsees = parsees
+        for consommateur in self.consommateurs:
+            consommateur.fin()
+        return self.total_lignes
+
+    def _executer_parallele(self, workers, depuis=None, bornes=(), fin_tranche=None,
+                            zones=None):
+        """Parse des plages d'octets en parallèle et fusionne les résultats dans l'ordre."""
+        for consommateur in self.consommateurs:
+            if not hasattr(consommateur, 'fusionner'):
+                raise TypeError(f"{type(consommateur).__name__} ne supporte pas le mode parallèle "
+                                "(méthode fusionner manquante)")
+
+        taille = (os.path.getsize(self.chemin) if zones is None
+                  else sum(fin - debut for debut, fin, _ in zones))
+        n_plages = max(workers * 4, -(-taille // PLAGE_MAX))
+        self.headers, plages = decouper_plages(
+            self.chemin, n_plages, depuis, bornes,
+            dans=None if zones is None else [(debut, fin) for debut, fin, _ in zones])
+        for consommateur in self.consommateurs:
+            consommateur.debut(self.headers)
+
+        # Copies figées avant toute fusion : imap sérialise les tâches au fil de l'eau,
+        # les consommateurs passés par référence porteraient déjà les plages fusionnées
+        copies = pickle.dumps(self.consommateurs)
+        taches = [(self.chemin, self.separateur, debut, fin, self.headers, copies)
+                  for debut, fin in plages]
+        print(f"    {len(plages)} plages réparties sur {workers} processus...")
+
+        total = 0
+        parsees = 0
+        with Pool(workers) as pool:
+            # imap conserve l'ordre des plages : les lignes restent dans l'ordre du fichier
+            for i, (n_lignes, n_parsees, partiels) in enumerate(pool.imap(_scanner_plage, taches), 1):
+                total += n_lignes
+                parsees += n_parsees
+                for consommateur, partiel in zip(self.consommateurs, partiels):
+                    consommateur.fusionner(partiel)
+                print(f"    plage {i}/{len(plages)} — {total:,} lignes lues...")
+                if fin_tranche is not None:
+                    debut, fin = plages[i - 1]
+                    if i < len(plages):
+                        fin = plages[i][0]  # rien d'utile entre deux zones de l'index
+                    fin_tranche(debut, fin, total)
+
+        self.total_lignes = total
+        self.lignes_parsees = parsees
+        for consommateur in self.consommateurs:
+            consommateur.fin()
+        return total
+
+
+class _LignesFiltrees:
+    """Itère les lignes brutes d'un fichier binaire, décode celles qui passent le préfiltre.
+
+    `total` compte toutes les lignes lues, filtrées ou non (à partir de `depart`) ;
+    `numero` est l'indice dans le fichier de la dernière ligne transmise
+    (total - 1 + decalage, decalage non nul quand seules des plages sont lues).
+    Avec `octet` (offset de la première ligne), `bornes_ligne` donne les
+    offsets [debut, fin) de la dernière ligne transmise.
+    """
+
+    def __init__(self, lignes_brutes, accepte=None, progression=0, depart=0, decalage=0,
+                 octet=None):
+        self.lignes_brutes = lignes_brutes
+        self.accepte = accepte
+        self.progression = progression
+        self.total = depart
+        self.decalage = decalage
+        self.numero = depart + decalage - 1
+        self.octet = octet
+        self.bornes_ligne = None
+
+    def __iter__(self):
+        accepte = self.accepte
+        progression = self.progression
+        total = self.total
+        decalage = self.decalage - 1
+        octet = self.octet
+        try:
+            for ligne in self.lignes_brutes:
+                total += 1
+                if progression and total % progression == 0:
+                    print(f"    {total:,} lignes lues...")
+                if octet is not None:
+                    debut = octet
+                    octet += len(ligne)
+                if accepte is None or accepte(ligne):
+                    self.numero = total + decalage
+                    if octet is not None:
+                        self.bornes_ligne = (debut, octet)
+                    yield ligne.decode('utf-8')
+        finally:
+            self.total = total
+            self.octet = octet
+
+
+def _numeroter(consommateur, lignes):
+    """traiter(row) → consommateur.traiter(row, numero de la ligne courante)."""
+    traiter = consommateur.traiter
+    return lambda row: traiter(row, lignes.numero)
+
+
+def _positionner(consommateur, lignes):
+    """traiter(row) → consommateur.traiter(row, debut, fin) en octets de la ligne courante."""
+    traiter = consommateur.traiter
+    return lambda row: traiter(row, *lignes.bornes_ligne)
+
+
+def _traitements(consommateurs, lignes):
+    """Fonctions traiter(row) des consommateurs (numérotés ou positionnés via lignes)."""
+    return [_numeroter(c, lignes) if getattr(c, 'numerote', False)
+            else _positionner(c, lignes) if getattr(c, 'positionne', False)
+            else c.traiter for c in consommateurs]
+
+
+class _PlageLignes:
+    """Lignes brutes lues à partir de la position courante de f (offset debut).
+
+    S'arrête à l'offset fin (None = fin du fichier) ou après max_lignes
+    lignes (0 = sans limite). `position` : offset atteint, début de la
+    première ligne non lue. Les tranches successives se suivent : aucun
+    seek, la lecture reste séquentielle (sources compressées).
+    """
+
+    def __init__(self, f, debut, fin=None, max_lignes=0):
+        self.f = f
+        self.position = debut
+        self.fin = fin
+        self.max_lignes = max_lignes
+
+    def __iter__(self):
+        f = self.f
+        if self.fin is None:
+            # Pas de borne en octets : itération native, position relue à la fin
+            yield from (itertools.islice(f, self.max_lignes) if self.max_lignes else f)
+            self.position = f.tell()
+            return
+
+        n = 0
+        while self.position < self.fin and not (self.max_lignes and n >= self.max_lignes):
+            ligne = f.readline()
+            if not ligne:
+                break
+            self.position += len(ligne)
+            n += 1
+            yield ligne
+
+
+def decouper_plages(chemin, n_plages, depuis=None, bornes=(), separateur=SEPARATOR,
+                    encodage='utf-8', dans=None):
+    """Découpe le fichier (hors en-tête) en plages [début, fin) alignées sur les fins de ligne.
+
+    depuis : offset d'un début de ligne où commencer (None = après l'en-tête)
+    bornes : offsets (débuts de ligne) où une plage doit se terminer
+    dans   : zones [(début, fin)] alignées sur les lignes à découper (None = tout le fichier)
+    Retourne (headers, plages).
+    """
+    taille = os.path.getsize(chemin)
+    plages = []
+    with open(chemin, 'rb') as f:
+        headers = next(csv.reader([f.readline().decode(encodage)], delimiter=separateur))
+        debut_donnees = f.tell() if depuis is None else depuis
+        zones = ([(debut_donnees, taille)] if dans is None
+                 else [(max(a, debut_donnees), b) for a, b in dans if b > debut_donnees])
+
+        pas = max(1, sum(b - a for a, b in zones) // max(1, n_plages))
+        for debut_zone, fin_zone in zones:
+            coupures = [debut_zone]
+            for i in range(1, n_plages):
+                f.seek(max(coupures[-1], debut_zone + i * pas))
+                if f.tell() >= fin_zone:
+                    break
+                f.readline()  # avancer jusqu'à la fin de la ligne courante
+                if f.tell() >= fin_zone:
+                    break
+                coupures.append(f.tell())
+            coupures.append(fin_zone)
+
+            coupures = sorted(set(coupures) | {b for b in bornes if debut_zone < b < fin_zone})
+            plages.extend((a, b) for a, b in zip(coupures, coupures[1:]) if b > a)
+    return headers, plages
+
+
+def _lignes_plage(f, debut, fin):
+    """Lignes brutes (octets) de la plage [debut, fin) d'un fichier ouvert en binaire."""
+    f.seek(debut)
+    position = debut
+    for ligne in f:
+        if position >= fin:
+            break
+        position += len(ligne)
+        yield ligne
+
+
+def _scanner_plage(tache):
+    """Worker : parse une plage avec des copies fraîches des consommateurs."""
+    chemin, separateur, debut, fin, headers, copies = tache
+    consommateurs = pickle.loads(copies)
+    for consommateur in consommateurs:
+        if hasattr(consommateur, 'plage'):
+            consommateur.plage(debut)
+        consommateur.debut(headers)
+    positionnes = any(getattr(c, 'positionne', False) for c in consommateurs)
+
+    parsees = 0
+    with open(chemin, 'rb') as f:
+        lignes = _LignesFiltrees(_lignes_plage(f, debut, fin), compiler_prefiltre(consommateurs),
+                                 octet=debut if positionnes else None)
+        traitements = _traitements(consommateurs, lignes)
+        for row in csv.reader(lignes, delimiter=separateur):
+            parsees += 1
+            for traiter in traitements:
+                traiter(row)
+    return lignes.total, parsees, consommateurs
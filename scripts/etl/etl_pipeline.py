@@ -1,18 +1,54 @@
 #!/usr/bin/env python3
 """
 Pipeline ETL — Phase 2 Electio-Analytics
-Filtre sur le département 34 (Hérault), normalise et charge dans SQLite.
+Filtre sur un ou plusieurs départements (34 — Hérault par défaut), normalise
+et charge dans SQLite : une base par département.
+
+Chaque source est lue une seule fois pour tous les départements demandés,
+puis répartie entre les bases (data/output/electio_<dept>.db, l'Hérault
+gardant data/output/electio_herault.db).
+
+Le chargement de la table elections enregistre un point de reprise tous
+les TRANCHE_REPRISE lignes : un ETL interrompu puis relancé repart du
+dernier point au lieu de relire tout le fichier de 2 GB.
+
+Le même passage construit le cube national des voix par camp (toutes
+élections, tous départements : data/output/votes_national.db), lu par les
+graphiques nationaux (voir cube_votes), ainsi que l'index des blocs
+(élection, département) du fichier élections (voir index_elections) : les
+ETL suivants limités à quelques départements ne lisent plus que les
+plages d'octets de leurs municipales.
+
+Les autres sources parsées (xlsx, CSV) sont gardées en copies Parquet dans
+data/cache (voir cache_sources) : une source inchangée n'est pas reparsée.
+
+Chaque base enregistre dans sa table manifeste les sources de chaque table
+(voir manifeste) : avec --incremental, les bases existantes sont gardées et
+seules les tables dont une source a changé sont vidées puis rechargées.
 
 Usage :
     python scripts/etl_pipeline.py
+    python scripts/etl_pipeline.py --departements 34,30,11
+    python scripts/etl_pipeline.py --departements all
+    python scripts/etl_pipeline.py --repartir-de-zero
+    python scripts/etl_pipeline.py --sans-cube
+    python scripts/etl_pipeline.py --sans-cache
+    python scripts/etl_pipeline.py --incremental
     python main.py etl
 """
 
-import csv
+import argparse
+import glob
+import itertools
+import json
 import os
 import sqlite3
 import sys
-import glob as glob_module
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future
+from multiprocessing import Pool
 
 # Installer openpyxl si manquant (nécessaire pour lire les .xlsx)
 try:
@@ -21,16 +57,53 @@ except ImportError:
     import subprocess
     subprocess.check_call([sys.executable, "-m", "pip", "install", "openpyxl"])
 
+import numpy as np
 import pandas as pd
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.io.parsers import TextParser
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/etl/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.elections_scan import ScanElections, jetons_champ
+from scripts.etl.sources_compressees import (
+    est_compresse, lister_sources, ouvrir_source, signature_source, source_existe)
+from scripts.etl import elections_parquet
+from scripts.etl.cube_votes import (
+    CUBE_DB, CubeVotes, construire_depuis_parquet, cube_disponible, enregistrer_cube)
+from scripts.etl.index_elections import IndexElections, index_disponible, plages_index
+from scripts.etl import manifeste
+from scripts.etl.manifeste import (
+    enregistrer_manifeste, invalider_manifeste, lire_manifeste, signature_fichier,
+    sources_inchangees)
+from scripts.etl.ordonnanceur import Etape, executer_etapes
+from scripts.etl import cache_sources
+from scripts.etl.cache_sources import cache_valide, lire_csv, lire_feuille, tables_en_cache
+from scripts.classification.classification_vectorisee import (
+    categorie_camp, colonne, contient_un, par_valeur)
+from scripts.classification.table_camps import TableCamps, empreinte_regles
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
 DB_PATH = "data/output/electio_herault.db"
+DB_PATH_DEPT = "data/output/electio_{dept}.db"
 DEPT = "34"
 
-# Chemins des fichiers sources
+# Départements traités (--departements) ; None = tous les départements
+DEPARTEMENTS = {DEPT}
+
+# Reprise du chargement elections : point de reprise tous les N lignes lues
+REPRISE_FILE = "data/output/etl_reprise.json"
+TRANCHE_REPRISE = 2_000_000
+
+# Insertion en flux de la table elections : lignes par lot (executemany)
+TAILLE_LOT = 50_000
+
+# Étapes de l'ETL exécutées en même temps (option --etapes, voir ordonnanceur)
+ETAPES_PARALLELES = 4
+
+# Chemins des fichiers sources (elections et comptes : aussi acceptés en .zst/.gz/.xz)
 ELECTIONS_FILE = "data/input/elections/candidats_results.txt"
 POPULATION_FILE = "data/input/demographie/base-pop-historiques-1876-2023.xlsx"
 NAISSANCES_FILE = "data/input/demographie/DS_ETAT_CIVIL_NAIS_COMMUNES_data.csv"
@@ -43,7 +116,7 @@ CSP_DIPLOME_FILE = "data/input/education/pop-act2554-csp-dipl-cd-6822.xlsx"
 CATNAT_FILE = "data/input/environnement/catnat_gaspar.csv"
 RISQUES_FILE = "data/input/environnement/risq_gaspar.csv"
 
-COMPTES_FILES = sorted(glob_module.glob("data/input/economie/comptes_communes_*.csv"))
+COMPTES_FILES = lister_sources("data/input/economie/comptes_communes_*.csv")
 
 # ============================================================================
 # CLASSIFICATION GAUCHE / DROITE (par nuance, pour municipales)
@@ -79,6 +152,11 @@ DROITE_NUANCES = {
     'VILL', 'NIHO', 'VOYN', 'BOUT', 'MADE', 'CHEV', 'SAIN', 'MAME',
 }
 
+LISTE_GAUCHE_KW = ['socialiste', 'communiste', 'gauche', 'écologi', 'vert',
+                   'insoumis', 'ouvrier', 'citoyen', 'solidaire']
+LISTE_DROITE_KW = ['national', 'républicain', 'droite', 'marche', 'renaissance',
+                   'ensemble', 'majorité', 'libéral', 'conservat']
+
 
 def classify_camp(id_election, nom, nuance, libelle_liste):
     """Classifie une liste/candidat en Gauche ou Droite (par nuance puis mots-clés)."""
@@ -93,18 +171,46 @@ def classify_camp(id_election, nom, nuance, libelle_liste):
 
     # 2. Par mots-clés dans le libellé de liste
     if libelle:
-        for kw in ['socialiste', 'communiste', 'gauche', 'écologi', 'vert',
-                    'insoumis', 'ouvrier', 'citoyen', 'solidaire']:
+        for kw in LISTE_GAUCHE_KW:
             if kw in libelle:
                 return "Gauche"
-        for kw in ['national', 'républicain', 'droite', 'marche', 'renaissance',
-                    'ensemble', 'majorité', 'libéral', 'conservat']:
+        for kw in LISTE_DROITE_KW:
             if kw in libelle:
                 return "Droite"
 
     return "Droite"
 
 
+def cle_camp(election, nuance, libelle, nom):
+    """Clé de classify_camp : seuls la nuance et le libellé de liste comptent."""
+    return ('', nuance, libelle, '')
+
+
+def classify_cle(cle):
+    """classify_camp appliquée à une clé de cle_camp."""
+    _, nuance, libelle, _ = cle
+    return classify_camp('', '', nuance, libelle)
+
+
+def table_camps():
+    """classify_camp par table de clés distinctes (persistée, invalidée si les règles changent)."""
+    empreinte = empreinte_regles(GAUCHE_NUANCES, DROITE_NUANCES, LISTE_GAUCHE_KW, LISTE_DROITE_KW)
+    return TableCamps('etl_municipales', cle_camp, classify_cle, empreinte)
+
+
+def classify_camps(id_election, nom, nuance, libelle_liste):
+    """Version vectorisée de classify_camp sur des colonnes entières.
+
+    Retourne une colonne catégorielle 'Droite'/'Gauche' identique à
+    classify_camp appliquée ligne par ligne.
+    """
+    nuance, libelle = colonne(nuance), colonne(libelle_liste)
+    nuance_gauche = par_valeur(nuance, lambda n: n.str.strip().str.upper().isin(GAUCHE_NUANCES))
+    nuance_droite = par_valeur(nuance, lambda n: n.str.strip().str.upper().isin(DROITE_NUANCES))
+    liste_gauche = par_valeur(libelle, lambda lib: contient_un(lib.str.lower(), LISTE_GAUCHE_KW))
+    return categorie_camp(nuance_gauche | (~nuance_droite & liste_gauche))
+
+
 # ============================================================================
 # HELPERS
 # ============================================================================
@@ -126,6 +232,47 @@ def is_dept34(codgeo):
     return str(codgeo).startswith(DEPT)
 
 
+def departement_de(codgeo):
+    """Code département d'un codgeo (3 caractères en outre-mer : 971…, 2 sinon)."""
+    codgeo = str(codgeo)
+    return codgeo[:3] if codgeo.startswith('97') else codgeo[:2]
+
+
+def departements_de(codgeos):
+    """Version vectorisée de departement_de sur une Series de codgeo."""
+    codgeos = codgeos.astype(str)
+    return codgeos.str[:2].where(~codgeos.str.startswith('97'), codgeos.str[:3])
+
+
+def dans_departements(codgeos):
+    """Masque booléen : codgeo appartenant aux départements traités."""
+    if DEPARTEMENTS is None:
+        return pd.Series(True, index=codgeos.index)
+    return departements_de(codgeos).isin(DEPARTEMENTS)
+
+
+def libelle_departements():
+    """Libellé court des départements traités (titres de sections)."""
+    if DEPARTEMENTS is None:
+        return "tous départements"
+    return "dept " + ", ".join(sorted(DEPARTEMENTS))
+
+
+def chemin_base(dept):
+    """Chemin de la base SQLite d'un département."""
+    return DB_PATH if dept == DEPT else DB_PATH_DEPT.format(dept=dept)
+
+
+def departements_existants():
+    """Départements dont la base existe déjà (ETL incrémental en mode « tous »)."""
+    departements = {DEPT} if os.path.exists(DB_PATH) else set()
+    prefixe, suffixe = DB_PATH_DEPT.split('{dept}')
+    for chemin in glob.glob(glob.escape(prefixe) + '*' + glob.escape(suffixe)):
+        if os.path.abspath(chemin) != os.path.abspath(DB_PATH):
+            departements.add(chemin[len(prefixe):-len(suffixe)])
+    return departements
+
+
 def print_section(title):
     """Affiche un séparateur de section."""
     print(f"\n{'─' * 60}")
@@ -253,127 +400,597 @@ CREATE INDEX IF NOT EXISTS idx_risques_codgeo ON risques(codgeo);
 """
 
 
+# ============================================================================
+# BASES PAR DÉPARTEMENT
+# ============================================================================
+
+class Bases:
+    """Connexions SQLite, une base par département, ouvertes à la demande.
+
+    Les étapes ETL lisent chaque source une fois, puis répartissent les
+    lignes filtrées entre les bases selon le département du codgeo.
+    En mode « tous départements », une base est créée au premier codgeo
+    rencontré pour ce département.
+
+    Pendant l'ordonnancement des étapes (voir ordonnanceur), tout accès aux
+    bases passe par ecrire : il s'exécute sur le thread unique du Redacteur.
+
+    reinitialiser : supprimer la base existante avant de la recréer
+    preparation   : fonction(conn) appelée à l'ouverture de chaque base
+    conservees    : départements dont la base existante est gardée (reprise)
+    """
+
+    def __init__(self, departements=None, reinitialiser=True, preparation=None,
+                 conservees=()):
+        self.conns = {}
+        self.reinitialiser = reinitialiser
+        self.preparation = preparation
+        self.conservees = set(conservees)
+        self.redacteur = None  # Redacteur de l'ordonnanceur pendant l'exécution des étapes
+        for dept in sorted(set(departements or ()) | self.conservees):
+            self.conn(dept)
+
+    def conn(self, dept):
+        """Connexion de la base du département (créée au premier appel)."""
+        if dept not in self.conns:
+            chemin = chemin_base(dept)
+            os.makedirs(os.path.dirname(chemin), exist_ok=True)
+            if self.reinitialiser and dept not in self.conservees and os.path.exists(chemin):
+                os.remove(chemin)
+                print(f"  Base existante supprimée : {chemin}")
+
+            # Connexion utilisée par le thread du Redacteur, puis par le thread principal
+            conn = sqlite3.connect(chemin, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=OFF")
+            conn.executescript(DDL)
+            conn.executescript(manifeste.DDL)
+            if self.preparation is not None:
+                self.preparation(conn)
+            self.conns[dept] = conn
+        return self.conns[dept]
+
+    def ecrire(self, fonction):
+        """Exécute fonction() (accès aux bases) et rend un Future de son résultat.
+
+        Sur le thread du Redacteur pendant l'ordonnancement, dans l'ordre de
+        soumission et sans attendre ; immédiatement sinon.
+        """
+        if self.redacteur is not None:
+            return self.redacteur.soumettre(fonction)
+        futur = Future()
+        futur.set_result(fonction())
+        return futur
+
+    def en_transaction(self):
+        """Vrai si une base a une transaction ouverte (écritures non validées)."""
+        return any(conn.in_transaction for conn in self.conns.values())
+
+    def valider(self):
+        for conn in self.conns.values():
+            if conn.in_transaction:
+                conn.commit()
+
+    def annuler(self):
+        for conn in self.conns.values():
+            if conn.in_transaction:
+                conn.rollback()
+
+    def repartir(self, df, col='codgeo'):
+        """Itère (conn, sous-DataFrame) pour chaque département présent dans df."""
+        for dept, sous_df in df.groupby(departements_de(df[col]), sort=True):
+            yield self.conn(dept), sous_df
+
+    def repartir_lignes(self, rows):
+        """Itère (conn, lignes) par département ; le codgeo est le premier champ."""
+        groupes = {}
+        for row in rows:
+            groupes.setdefault(departement_de(row[0]), []).append(row)
+        for dept in sorted(groupes):
+            yield self.conn(dept), groupes[dept]
+
+    def print_count(self, table_name):
+        """Affiche le nombre de lignes d'une table, toutes bases confondues."""
+        count = sum(conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+                    for conn in self.conns.values())
+        detail = f" ({len(self.conns)} bases)" if len(self.conns) > 1 else ""
+        print(f"  ✓ {table_name} : {count:,} lignes{detail}")
+        return count
+
+    def close(self):
+        for conn in self.conns.values():
+            conn.close()
+
+
+class EcritureElections:
+    """Insertion en flux dans la table elections, par lots de taille fixe.
+
+    Les lignes sont mises en tampon par département ; dès que taille_lot
+    lignes sont en attente, elles sont insérées (executemany) dans la
+    transaction ouverte de chaque base. La mémoire reste bornée par la
+    taille d'un lot, quel que soit le nombre de lignes gardées.
+    valider() termine les transactions. Insertions et validations passent
+    par Bases.ecrire : pendant l'ordonnancement, le lot suivant se remplit
+    pendant l'insertion du précédent.
+    """
+
+    def __init__(self, bases, taille_lot=TAILLE_LOT):
+        self.bases = bases
+        self.taille_lot = taille_lot
+        self.tampons = {}
+        self.en_attente = 0
+        self.inserees = 0
+        self.modifiees = set()  # départements écrits depuis la dernière validation
+        self.chrono = time.perf_counter()
+
+    def ajouter(self, row, dept=None):
+        """Met une ligne en tampon (le codgeo est le premier champ)."""
+        if dept is None:
+            dept = departement_de(row[0])
+        tampon = self.tampons.get(dept)
+        if tampon is None:
+            tampon = self.tampons[dept] = []
+        tampon.append(row)
+        self.en_attente += 1
+        if self.en_attente >= self.taille_lot:
+            self.vider()
+
+    def vider(self):
+        """Insère les lignes en attente, sans valider la transaction."""
+        tampons = self.tampons
+        self.tampons = {}
+        self.en_attente = 0
+        self.inserees += sum(len(rows) for rows in tampons.values())
+
+        def inserer():
+            for dept, rows in tampons.items():
+                self.bases.conn(dept).executemany(
+                    "INSERT INTO elections VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
+                self.modifiees.add(dept)
+
+        self.bases.ecrire(inserer)
+
+    def valider(self):
+        """Insère le reste et valide la transaction de chaque base."""
+        self.vider()
+
+        def valider_bases():
+            for conn in self.bases.conns.values():
+                conn.commit()
+            self.modifiees = set()
+
+        self.bases.ecrire(valider_bases)
+
+    def debit(self):
+        """Lignes insérées par seconde depuis la création."""
+        return self.inserees / max(time.perf_counter() - self.chrono, 1e-9)
+
+
 # ============================================================================
 # ETL PAR TABLE
 # ============================================================================
 
-def etl_communes(conn):
-    """Table communes : référentiel depuis population historique."""
+def etl_communes(bases):
+    """Table communes : référentiel depuis population historique.
+
+    L'onglet est lu via le cache des sources, partagé avec etl_population
+    (un seul parsing du classeur par exécution, copie Parquet ensuite).
+    """
     print_section("1/12 — communes (référentiel)")
 
     if not os.path.exists(POPULATION_FILE):
         print(f"  ⚠ Fichier manquant : {POPULATION_FILE}")
         return
 
-    df = pd.read_excel(POPULATION_FILE, sheet_name='pop_1876_2023', header=5)
+    df = lire_feuille(POPULATION_FILE, 'pop_1876_2023', header=5)
 
-    # Filtrer département 34
+    # Filtrer les départements traités
     df['CODGEO'] = df['CODGEO'].astype(str).str.strip().str.zfill(5)
     df['codgeo'] = df['CODGEO']
-    df = df[df['codgeo'].str.startswith(DEPT)]
+    df = df[dans_departements(df['codgeo'])]
 
     communes = df[['codgeo', 'LIBGEO', 'DEP']].copy()
     communes.columns = ['codgeo', 'nom', 'departement']
     communes = communes.drop_duplicates(subset='codgeo')
 
     # Insérer dans la table DDL (déjà créée avec PRIMARY KEY)
-    conn.execute("DELETE FROM communes")
-    for _, row in communes.iterrows():
-        conn.execute("INSERT OR IGNORE INTO communes VALUES (?,?,?)",
-                     (row['codgeo'], row['nom'], row['departement']))
-    conn.commit()
-    print_count('communes', conn)
+    def charger():
+        for conn, communes_dept in bases.repartir(communes):
+            conn.execute("DELETE FROM communes")
+            for _, row in communes_dept.iterrows():
+                conn.execute("INSERT OR IGNORE INTO communes VALUES (?,?,?)",
+                             (row['codgeo'], row['nom'], row['departement']))
+            conn.commit()
+        bases.print_count('communes')
+
+    bases.ecrire(charger)
+
+
+class ExtraitMunicipal:
+    """Consommateur du scan partagé : lignes municipales des départements traités.
+
+    departements : codes département à garder (défaut : DEPARTEMENTS), None = tous
+    sortie       : fonction(ligne) recevant chaque ligne gardée (insertion en flux) ;
+                   None = lignes accumulées dans self.rows
+    camps        : classifieur (election, nuance, libelle, nom) → camp ; par défaut
+                   la table des clés distinctes, enregistrée en fin de scan
+    Picklable et fusionnable : utilisable en mode parallèle (--workers N) ;
+    les copies des workers accumulent leurs lignes, transmises à la sortie
+    lors de la fusion.
+    """
 
+    COLONNES = ['id_election', 'Code du département', 'Code de la commune', 'Nom',
+                'Prénom', 'Nuance', 'Libellé Abrégé Liste', 'Voix', '% Voix/Ins', '% Voix/Exp']
+
+    def __init__(self, departements=..., sortie=None, camps=None):
+        if departements is ...:
+            departements = DEPARTEMENTS
+        self.departements = None if departements is None else frozenset(departements)
+        self.sortie = sortie
+        self.camps = table_camps() if camps is None else camps
+        self.rows = []
+        self.indices = ()
+        self.n_cols = 0
+        # Rejet sur octets bruts avant parsing csv (filtrage exact dans traiter)
+        self.prefiltre = [('_muni_',)]
+        if self.departements is not None:
+            self.prefiltre.append(tuple(jeton for dep in sorted(self.departements)
+                                        for jeton in jetons_champ(dep)))
+
+    def debut(self, headers):
+        col_idx = {h: i for i, h in enumerate(headers)}
+        manquantes = [c for c in self.COLONNES if c not in col_idx]
+        if manquantes:
+            raise ValueError(f"Colonnes manquantes dans le fichier élections : {manquantes}")
+        # Positions résolues une fois pour toutes (pas de recherche par nom à chaque ligne)
+        self.indices = tuple(col_idx[c] for c in self.COLONNES)
+        self.n_cols = len(headers)
+
+    def traiter(self, row):
+        if len(row) < self.n_cols:
+            return
+
+        (i_election, i_dep, i_commune, i_nom, i_prenom, i_nuance,
+         i_liste, i_voix, i_ins, i_exp) = self.indices
+
+        id_election = row[i_election].strip()
+
+        # Filtrer : municipales uniquement
+        if '_muni_' not in id_election:
+            return
+
+        # Filtrer : départements traités
+        dep = row[i_dep].strip()
+        if self.departements is not None and dep not in self.departements:
+            return
+
+        codgeo = normalize_codgeo(dep, row[i_commune])
+
+        # Extraire année et tour
+        parts = id_election.split('_')
+        annee = int(parts[0]) if parts[0].isdigit() else 0
+        tour = int(parts[2][1]) if len(parts) > 2 and parts[2].startswith('t') else 1
+
+        nom = row[i_nom].strip()
+        prenom = row[i_prenom].strip()
+        nuance = row[i_nuance].strip()
+        libelle_liste = row[i_liste].strip()
+
+        val = row[i_voix].strip()
+        try:
+            voix = int(val) if val else 0
+        except ValueError:
+            voix = 0
 
-def etl_elections(conn):
-    """Table elections : fichier 2.3 GB, lecture ligne par ligne."""
-    print_section("2/12 — elections (municipales, dept 34)")
+        val = row[i_ins].strip()
+        try:
+            pct_ins = float(val) if val else None
+        except ValueError:
+            pct_ins = None
 
-    if not os.path.exists(ELECTIONS_FILE):
-        print(f"  ⚠ Fichier manquant : {ELECTIONS_FILE}")
-        return
+        val = row[i_exp].strip()
+        try:
+            pct_exp = float(val) if val else None
+        except ValueError:
+            pct_exp = None
 
-    rows = []
-    total_read = 0
-    total_kept = 0
-    col_idx = {}
-
-    with open(ELECTIONS_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f, delimiter=';')
-        headers = next(reader)
-        for i, h in enumerate(headers):
-            col_idx[h] = i
-
-        for row in reader:
-            total_read += 1
-            if total_read % 5_000_000 == 0:
-                print(f"    {total_read:,} lignes lues...")
-
-            if len(row) < len(headers):
-                continue
+        camp = self.camps(id_election, nuance, libelle_liste, nom)
 
-            def get_val(col):
-                if col in col_idx and len(row) > col_idx[col]:
-                    return row[col_idx[col]].strip()
-                return ""
+        ligne = (codgeo, annee, tour, nom, prenom, nuance, voix, pct_ins, pct_exp, camp)
+        if self.sortie is not None:
+            self.sortie(ligne)
+        else:
+            self.rows.append(ligne)
+
+    def __getstate__(self):
+        # La sortie (connexions SQLite) reste dans le processus principal
+        etat = self.__dict__.copy()
+        etat['sortie'] = None
+        return etat
+
+    def fusionner(self, autre):
+        """Ajoute le résultat d'une plage traitée par un worker (mode parallèle)."""
+        if self.sortie is not None:
+            for ligne in autre.rows:
+                self.sortie(ligne)
+        else:
+            self.rows.extend(autre.rows)
+        if isinstance(self.camps, TableCamps):
+            self.camps.fusionner(autre.camps)
 
-            id_election = get_val('id_election')
+    def fin(self):
+        # Clés distinctes vues pendant le scan : ajoutées à la table persistée
+        if isinstance(self.camps, TableCamps):
+            self.camps.enregistrer()
 
-            # Filtrer : municipales uniquement
-            if '_muni_' not in id_election:
-                continue
+    def charger(self, bases, total_lu):
+        """Insère les lignes accumulées (sans sortie) dans la table elections de chaque base."""
+        print(f"  Lignes lues : {total_lu:,}")
+        print(f"  Lignes conservées (muni + {libelle_departements()}) : {len(self.rows):,}")
 
-            # Filtrer : département 34
-            dep = get_val('Code du département')
-            if dep != DEPT:
-                continue
+        ecriture = EcritureElections(bases)
+        for ligne in self.rows:
+            ecriture.ajouter(ligne)
+        ecriture.valider()
 
-            commune = get_val('Code de la commune')
-            codgeo = normalize_codgeo(dep, commune)
+        bases.ecrire(lambda: bases.print_count('elections'))
 
-            # Extraire année et tour
-            parts = id_election.split('_')
-            annee = int(parts[0]) if parts[0].isdigit() else 0
-            tour = int(parts[2][1]) if len(parts) > 2 and parts[2].startswith('t') else 1
 
-            nom = get_val('Nom')
-            prenom = get_val('Prénom')
-            nuance = get_val('Nuance')
-            libelle_liste = get_val('Libellé Abrégé Liste')
+# ============================================================================
+# REPRISE DU CHARGEMENT ELECTIONS
+# ============================================================================
 
-            try:
-                voix = int(get_val('Voix')) if get_val('Voix') else 0
-            except ValueError:
-                voix = 0
+def nouvelle_reprise():
+    """Point de reprise vide pour la configuration actuelle."""
+    return {
+        'source': signature_source(ELECTIONS_FILE),
+        'departements': None if DEPARTEMENTS is None else sorted(DEPARTEMENTS),
+        'bases': [],
+        'octet': None,
+        'lignes_lues': 0,
+        'termine': False,
+    }
 
-            try:
-                pct_ins = float(get_val('% Voix/Ins')) if get_val('% Voix/Ins') else None
-            except ValueError:
-                pct_ins = None
 
-            try:
-                pct_exp = float(get_val('% Voix/Exp')) if get_val('% Voix/Exp') else None
-            except ValueError:
-                pct_exp = None
+def lire_reprise():
+    """Point de reprise enregistré, ou None s'il est absent ou ne correspond plus."""
+    if not os.path.exists(REPRISE_FILE) or not source_existe(ELECTIONS_FILE):
+        return None
+    try:
+        with open(REPRISE_FILE, 'r', encoding='utf-8') as f:
+            reprise = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    attendu = nouvelle_reprise()
+    if (reprise.get('source') != attendu['source']
+            or reprise.get('departements') != attendu['departements']):
+        return None
+    return reprise
+
 
-            camp = classify_camp(id_election, nom, nuance, libelle_liste)
+def ecrire_reprise(reprise):
+    """Écrit le point de reprise (remplacement atomique du fichier)."""
+    tmp = REPRISE_FILE + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(reprise, f)
+    os.replace(tmp, REPRISE_FILE)
 
-            rows.append((codgeo, annee, tour, nom, prenom, nuance, voix,
-                         pct_ins, pct_exp, camp))
-            total_kept += 1
 
-    print(f"  Lignes lues : {total_read:,}")
-    print(f"  Lignes conservées (muni + dept 34) : {total_kept:,}")
+def effacer_reprise():
+    """Supprime le point de reprise (ETL terminé ou repartant de zéro)."""
+    if os.path.exists(REPRISE_FILE):
+        os.remove(REPRISE_FILE)
 
-    if rows:
-        conn.executemany(
-            "INSERT INTO elections VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
-        conn.commit()
 
-    print_count('elections', conn)
+class ChargementReprise:
+    """Chargement de la table elections par tranches, avec points de reprise.
 
+    Les lignes gardées arrivent une à une (ajouter, sortie de
+    ExtraitMunicipal) et sont insérées en flux par lots. Après chaque
+    tranche du scan, chaque base valide ses lignes en même temps que
+    l'offset atteint (table reprise_elections), puis le point de reprise
+    global est écrit dans REPRISE_FILE.
 
-def etl_population(conn):
+    Une interruption entre deux bases laisse certaines bases en avance
+    d'une tranche sur le point global : à la reprise, le scan repart du
+    point global et ne réinsère pas dans une base les tranches qu'elle
+    avait déjà validées (les offsets de base sont des bornes de tranche).
+    """
+
+    def __init__(self, bases, reprise=None):
+        self.bases = bases
+        self.reprise = reprise or nouvelle_reprise()
+        self.depuis = self.reprise['octet']
+        self.deja_lues = self.reprise['lignes_lues']
+        self.ecriture = EcritureElections(bases)
+        # Début de la tranche en cours (les tranches se suivent dans l'ordre du fichier)
+        self.debut = self.depuis or 0
+
+        # Offsets déjà validés par chaque base gardée
+        def lire_points():
+            points = {}
+            for dept, conn in bases.conns.items():
+                conn.execute("CREATE TABLE IF NOT EXISTS reprise_elections "
+                             "(octet INTEGER, lignes_lues INTEGER)")
+                point = conn.execute("SELECT MAX(octet) FROM reprise_elections").fetchone()[0]
+                if point is not None:
+                    points[dept] = point
+            return points
+
+        self.points = bases.ecrire(lire_points).result()
+
+    def bornes(self):
+        """Offsets où le scan doit couper une tranche (points des bases en avance)."""
+        return sorted(set(self.points.values()))
+
+    def ajouter(self, row):
+        """Sortie de ExtraitMunicipal : une ligne gardée de la tranche en cours."""
+        dept = departement_de(row[0])
+        if self.debut < self.points.get(dept, 0):
+            return  # tranche déjà validée dans cette base avant l'interruption
+        self.ecriture.ajouter(row, dept)
+
+    def fin_tranche(self, debut, fin, lignes):
+        """Valide les lignes de la tranche [debut, fin) puis enregistre le point de reprise."""
+        lignes_lues = self.deja_lues + lignes
+
+        self.ecriture.vider()
+
+        def marquer_bases():
+            for dept in self.ecriture.modifiees:
+                conn = self.bases.conn(dept)
+                conn.execute("CREATE TABLE IF NOT EXISTS reprise_elections "
+                             "(octet INTEGER, lignes_lues INTEGER)")
+                conn.execute("DELETE FROM reprise_elections")
+                conn.execute("INSERT INTO reprise_elections VALUES (?,?)", (fin, lignes_lues))
+
+        self.bases.ecrire(marquer_bases)
+        self.ecriture.valider()
+        self.debut = fin
+
+        # Point global écrit après la validation des bases (même ordre d'écriture)
+        self.reprise.update(octet=fin, lignes_lues=lignes_lues)
+        reprise = dict(self.reprise)
+        inserees, debit = self.ecriture.inserees, self.ecriture.debit()
+
+        def enregistrer_point():
+            reprise['bases'] = sorted(self.bases.conns)
+            ecrire_reprise(reprise)
+            print(f"    point de reprise : {lignes_lues:,} lignes lues (offset {fin:,}) — "
+                  f"{inserees:,} lignes insérées, {debit:,.0f} lignes/s")
+
+        self.bases.ecrire(enregistrer_point)
+
+    def terminer(self):
+        """Marque le chargement terminé : un ETL relancé ne relira plus le fichier."""
+        def marquer_termine():
+            for conn in self.bases.conns.values():
+                conn.execute("DROP TABLE IF EXISTS reprise_elections")
+                conn.commit()
+            self.reprise.update(termine=True, bases=sorted(self.bases.conns))
+            ecrire_reprise(self.reprise)
+
+        self.bases.ecrire(marquer_termine).result()
+
+
+def etl_elections(bases, workers=1, reprise=None, cube=True):
+    """Table elections : fichier 2.3 GB, lecture ligne par ligne (ou par plages avec workers > 1).
+
+    reprise : point de reprise d'un ETL interrompu (voir lire_reprise)
+    cube    : construire aussi le cube national des voix par camp (CUBE_DB)
+
+    Avec un index des blocs à jour (INDEX_DB), des départements restreints
+    et un cube à jour (ou pas de cube), seules les plages des municipales
+    de ces départements sont lues.
+    """
+    print_section(f"2/12 — elections (municipales, {libelle_departements()})")
+
+    if not source_existe(ELECTIONS_FILE):
+        print(f"  ⚠ Fichier manquant : {ELECTIONS_FILE}")
+        return
+
+    if reprise is not None and reprise.get('termine'):
+        print("  Chargement déjà terminé avant l'interruption (point de reprise)")
+        bases.ecrire(lambda: bases.print_count('elections'))
+        return
+
+    if elections_parquet.dataset_disponible(ELECTIONS_FILE):
+        # Lecture courte : pas de reprise, on recharge la table entière
+        def vider_tables():
+            for conn in bases.conns.values():
+                conn.execute("DELETE FROM elections")
+
+        bases.ecrire(vider_tables)
+        _etl_elections_parquet(bases)
+        if cube:
+            print("  Cube national depuis le dataset Parquet...")
+            enregistrer_cube(construire_depuis_parquet())
+        return
+
+    chargement = ChargementReprise(bases, reprise)
+    extrait = ExtraitMunicipal(sortie=chargement.ajouter)
+    if chargement.depuis is not None:
+        print(f"  Reprise à l'offset {chargement.depuis:,} "
+              f"({chargement.deja_lues:,} lignes déjà lues)")
+
+    scan = ScanElections(ELECTIONS_FILE).ajouter(extrait)
+    plages = None
+    if DEPARTEMENTS is not None and (not cube or cube_disponible()):
+        plages = plages_index(DEPARTEMENTS, election='_muni_')
+    if plages is not None:
+        taille = sum(fin - debut for debut, fin, _ in plages)
+        print(f"  Index des blocs : {len(plages):,} plages, {taille / 1e6:,.1f} MB à lire")
+        if cube:
+            print(f"  Cube national à jour : {CUBE_DB} inchangé")
+            cube = False
+    elif chargement.depuis is None and not est_compresse(scan.chemin) and not index_disponible():
+        scan.ajouter(IndexElections())
+
+    # Le cube a besoin de toutes les lignes : pas de cube sur un scan repris
+    cube_votes = None
+    if cube and chargement.depuis is None:
+        cube_votes = CubeVotes()
+        scan.ajouter(cube_votes)
+    elif cube:
+        print(f"  ⚠ Cube national non reconstruit (reprise) : {CUBE_DB} inchangé")
+
+    scan.executer(workers, depuis=chargement.depuis, tranche=TRANCHE_REPRISE,
+                  bornes=chargement.bornes(), fin_tranche=chargement.fin_tranche,
+                  plages=plages)
+    chargement.terminer()
+    if cube_votes is not None:
+        enregistrer_cube(cube_votes.voix)
+
+    print(f"  Lignes lues : {chargement.deja_lues + scan.total_lignes:,}")
+    print(f"  Lignes parsées après préfiltre : {scan.lignes_parsees:,}")
+    print(f"  Lignes conservées (muni + {libelle_departements()}) : "
+          f"{chargement.ecriture.inserees:,} ({chargement.ecriture.debit():,.0f} lignes/s)")
+    bases.ecrire(lambda: bases.print_count('elections'))
+
+
+def _etl_elections_parquet(bases):
+    """Table elections depuis le dataset Parquet : seules les partitions muni/dept sont lues.
+
+    Les partitions sont lues par lots de TAILLE_LOT lignes, insérés au fil
+    de l'eau : la mémoire reste bornée, y compris avec tous les départements.
+    """
+    print(f"  Lecture du dataset Parquet : {elections_parquet.PARQUET_DIR}")
+
+    lots = elections_parquet.lire_elections_par_lots(
+        types=['muni'],
+        departements=None if DEPARTEMENTS is None else sorted(DEPARTEMENTS),
+        colonnes=['id_election', 'departement', 'annee', 'Code de la commune', 'Nom',
+                  'Prénom', 'Nuance', 'Libellé Abrégé Liste', 'Voix',
+                  '% Voix/Ins', '% Voix/Exp'],
+        taille_lot=TAILLE_LOT)
+
+    ecriture = EcritureElections(bases)
+    for df in lots:
+        # Extraire le tour (2008_muni_t1 → 1)
+        tour = df['id_election'].str.split('_').str[2]
+        tour = tour.where(tour.str.startswith('t', na=False)).str[1]
+        tour = pd.to_numeric(tour, errors='coerce').fillna(1).astype(int)
+
+        codgeo = df['departement'] + df['Code de la commune'].str.zfill(3)
+        voix = df['Voix'].fillna(0).astype(int)
+        pct_ins = df['% Voix/Ins'].astype(object).where(df['% Voix/Ins'].notna(), None)
+        pct_exp = df['% Voix/Exp'].astype(object).where(df['% Voix/Exp'].notna(), None)
+
+        camps = classify_camps(df['id_election'], df['Nom'], df['Nuance'],
+                               df['Libellé Abrégé Liste'])
+
+        for ligne in zip(codgeo, df['annee'].astype(int), tour, df['Nom'], df['Prénom'],
+                         df['Nuance'], voix, pct_ins, pct_exp, camps):
+            ecriture.ajouter(ligne)
+    ecriture.valider()
+    print(f"  Lignes conservées (muni + {libelle_departements()}) : "
+          f"{ecriture.inserees:,} ({ecriture.debit():,.0f} lignes/s)")
+
+    bases.ecrire(lambda: bases.print_count('elections'))
+
+
+def etl_population(bases):
     """Table population : pivoter PMUNxxxx en lignes."""
     print_section("3/12 — population")
 
@@ -381,33 +998,41 @@ def etl_population(conn):
         print(f"  ⚠ Fichier manquant : {POPULATION_FILE}")
         return
 
-    df = pd.read_excel(POPULATION_FILE, sheet_name='pop_1876_2023', header=5)
+    df = lire_feuille(POPULATION_FILE, 'pop_1876_2023', header=5)
     df['CODGEO'] = df['CODGEO'].astype(str).str.strip().str.zfill(5)
     df['codgeo'] = df['CODGEO']
-    df = df[df['codgeo'].str.startswith(DEPT)]
+    df = df[dans_departements(df['codgeo'])]
 
-    # Identifier les colonnes de population (PMUN, PSDC, PTOT)
+    # Colonnes de population (PMUN, PSDC, PTOT) et année de chacune, extraite une
+    # fois du nom de colonne (PMUN2023, PSDC1999, PTOT1936)
     pmun_cols = [c for c in df.columns if c.startswith(('PMUN', 'PSDC', 'PTOT'))]
-
-    rows = []
-    for _, row in df.iterrows():
-        codgeo = row['codgeo']
-        for col in pmun_cols:
-            # Extraire l'année du nom de colonne (PMUN2023, PSDC1999, PTOT1936)
-            annee_str = ''.join(c for c in col if c.isdigit())
-            annee = int(annee_str)
-            pop = row[col]
-            if pd.notna(pop):
-                rows.append((codgeo, annee, int(pop)))
-
-    if rows:
-        conn.executemany("INSERT INTO population VALUES (?,?,?)", rows)
-        conn.commit()
-
-    print_count('population', conn)
-
-
-def etl_naissances_deces(conn):
+    annees = np.array([int(''.join(c for c in col if c.isdigit())) for col in pmun_cols])
+
+    # Format large → long en bloc : matrice communes × colonnes aplatie ligne par
+    # ligne (même ordre que commune par commune), cases vides écartées
+    valeurs = df[pmun_cols].to_numpy(dtype='float64', na_value=np.nan)
+    renseignees = ~np.isnan(valeurs).ravel()
+    population = pd.DataFrame({
+        'codgeo': np.repeat(df['codgeo'].to_numpy(dtype=object), len(pmun_cols))[renseignees],
+        'annee': np.tile(annees, len(df))[renseignees],
+        'population': valeurs.ravel()[renseignees].astype('int64'),
+    })
+
+    def charger():
+        # Vider d'abord : les bases gardées lors d'une reprise ont pu être remplies
+        for conn in bases.conns.values():
+            conn.execute("DELETE FROM population")
+        for conn, pop_dept in bases.repartir(population):
+            conn.executemany("INSERT INTO population VALUES (?,?,?)",
+                             zip(pop_dept['codgeo'].tolist(), pop_dept['annee'].tolist(),
+                                 pop_dept['population'].tolist()))
+            conn.commit()
+        bases.print_count('population')
+
+    bases.ecrire(charger)
+
+
+def etl_naissances_deces(bases):
     """Table naissances_deces : joindre naissances + décès."""
     print_section("4/12 — naissances_deces")
 
@@ -418,10 +1043,10 @@ def etl_naissances_deces(conn):
             return {}
 
         data = {}
-        df = pd.read_csv(filepath, sep=';', dtype=str)
+        df = lire_csv(filepath, sep=';', dtype=str)
         # Filtrer sur communes uniquement
         df = df[df['GEO_OBJECT'] == 'COM']
-        df = df[df['GEO'].str.startswith(DEPT)]
+        df = df[dans_departements(df['GEO'])]
 
         for _, row in df.iterrows():
             codgeo = str(row['GEO']).strip()
@@ -445,14 +1070,18 @@ def etl_naissances_deces(conn):
         d = deces.get((codgeo, annee))
         rows.append((codgeo, annee, n, d))
 
-    if rows:
-        conn.executemany("INSERT INTO naissances_deces VALUES (?,?,?,?)", rows)
-        conn.commit()
+    def charger():
+        for conn in bases.conns.values():
+            conn.execute("DELETE FROM naissances_deces")
+        for conn, rows_dept in bases.repartir_lignes(rows):
+            conn.executemany("INSERT INTO naissances_deces VALUES (?,?,?,?)", rows_dept)
+            conn.commit()
+        bases.print_count('naissances_deces')
 
-    print_count('naissances_deces', conn)
+    bases.ecrire(charger)
 
 
-def etl_revenus(conn):
+def etl_revenus(bases):
     """Table revenus : revenu des Français à la commune."""
     print_section("5/12 — revenus")
 
@@ -466,7 +1095,7 @@ def etl_revenus(conn):
 
     sep = ';' if ';' in first_line and first_line.count(';') > 2 else ','
 
-    df = pd.read_csv(REVENUS_FILE, sep=sep, dtype={'Code géographique': str})
+    df = lire_csv(REVENUS_FILE, sep=sep, dtype={'Code géographique': str})
 
     # Identifier la colonne codgeo
     codgeo_col = None
@@ -484,7 +1113,7 @@ def etl_revenus(conn):
         print(f"  Colonne codgeo détectée par défaut : {codgeo_col}")
 
     df['codgeo'] = df[codgeo_col].apply(lambda x: str(x).strip().zfill(5))
-    df = df[df['codgeo'].str.startswith(DEPT)]
+    df = df[dans_departements(df['codgeo'])]
 
     # Supprimer la colonne source et renommer
     cols_to_drop = [c for c in df.columns if c != 'codgeo' and ('code' in c.lower() or 'commune' in c.lower() or 'nom' in c.lower() or 'libellé' in c.lower() or 'libelle' in c.lower())]
@@ -494,94 +1123,306 @@ def etl_revenus(conn):
     df.columns = [c.lower().strip().replace(' ', '_').replace("'", '').replace('é', 'e').replace('è', 'e') if c != 'codgeo' else c for c in df.columns]
 
     # Supprimer la table existante et recréer dynamiquement
-    conn.execute("DROP TABLE IF EXISTS revenus")
-    df.to_sql('revenus', conn, if_exists='replace', index=False)
-
-    print_count('revenus', conn)
-
+    def charger():
+        for conn, df_dept in bases.repartir(df):
+            conn.execute("DROP TABLE IF EXISTS revenus")
+            df_dept.to_sql('revenus', conn, if_exists='replace', index=False)
+        bases.print_count('revenus')
+
+    bases.ecrire(charger)
+
+
+def _valeur_cellule(valeur):
+    """Valeur d'une cellule telle que pd.read_excel la lit (vide → '', nombre entier → int,
+    erreur Excel → NaN)."""
+    if valeur is None:
+        return ''
+    if isinstance(valeur, float) and valeur.is_integer():
+        return int(valeur)
+    if isinstance(valeur, str) and valeur in ERROR_CODES:
+        return np.nan
+    return valeur
+
+
+def _ligne_excel(row):
+    """Ligne d'onglet convertie comme par pd.read_excel, cellules vides de fin retirées."""
+    ligne = [_valeur_cellule(v) for v in row]
+    while ligne and ligne[-1] == '':
+        ligne.pop()
+    return ligne
+
+
+def _lire_onglet_insee(ws, header_row, departements):
+    """Lit un onglet COM_ en flux et ne garde que les lignes des départements traités.
+
+    departements : codes des départements gardés (None = tous).
+    Retourne (lignes, i_dep, i_com) : les lignes jusqu'à l'en-tête, la ligne
+    des codes internes, puis les lignes de données retenues, au format de
+    pd.read_excel (même largeur pour toutes, celle de la plus longue ligne
+    de l'onglet) ; i_dep / i_com sont les colonnes département et commune
+    (None si introuvables). Les autres lignes ne sont jamais converties.
+    """
+    ws.reset_dimensions()  # dimensions déclarées souvent fausses : lire les lignes réelles
+    rows = ws.iter_rows(values_only=True)
+    lignes = [_ligne_excel(row) for row in itertools.islice(rows, header_row + 1)]
+    if len(lignes) <= header_row:
+        raise ValueError(f"ligne d'en-tête {header_row + 1} absente ({len(lignes)} lignes)")
+
+    # Colonnes département et commune (mêmes critères que sur les noms du DataFrame)
+    i_dep = i_com = None
+    for i, nom in enumerate(lignes[header_row]):
+        nom = str(nom).lower().replace('\n', ' ')
+        if 'département' in nom and 'géographie courante' in nom and i_dep is None:
+            i_dep = i
+        elif 'commune' in nom and 'géographie courante' in nom and i_com is None:
+            i_com = i
+    if i_dep is None or i_com is None:
+        return lignes, i_dep, i_com
+
+    largeur = max(len(ligne) for ligne in lignes)
+    vides = []  # lignes vides gardées seulement si une ligne non vide suit (comme pandas)
+    premiere = True
+    for row in rows:
+        n = len(row)
+        if n > largeur:
+            while n and (row[n - 1] is None or row[n - 1] == ''):
+                n -= 1
+            largeur = max(largeur, n)
+
+        if premiere:
+            # Première ligne de données (codes internes, sautée après analyse) : toujours
+            # gardée, elle fixe les types des colonnes comme dans l'onglet entier
+            premiere = False
+        elif departements is not None:
+            # codgeo calculé comme sur le DataFrame (cellule vide → NaN → 'nan')
+            dep, com = (_valeur_cellule(row[i]) if i < len(row) else '' for i in (i_dep, i_com))
+            codgeo = (str(dep if dep != '' else np.nan).strip().zfill(2)
+                      + str(com if com != '' else np.nan).strip().zfill(3))
+            if departement_de(codgeo) not in departements:
+                continue
 
-def _read_insee_xlsx(filepath, sheet_prefix='COM_', header_row=14):
-    """Lit un fichier INSEE xlsx avec onglets COM_xxxx, retourne un dict {annee: DataFrame}.
+        ligne = _ligne_excel(row)
+        if not ligne:
+            vides.append(ligne)
+            continue
+        lignes.extend(vides)
+        vides = []
+        lignes.append(ligne)
 
-    Ces fichiers INSEE ont une structure spécifique :
-    - header_row contient les noms de colonnes (avec retours à la ligne)
-    - La ligne suivante (row 0 des données) contient des codes internes → à sauter
-    - Les colonnes 'Département' et 'Commune' sont séparées (dep 2 car + commune 3 car)
-    """
-    if not os.path.exists(filepath):
-        print(f"  ⚠ Fichier manquant : {filepath}")
-        return {}
+    return [ligne + [''] * (largeur - len(ligne)) for ligne in lignes], i_dep, i_com
 
-    xl = pd.ExcelFile(filepath)
-    results = {}
 
-    for sheet in xl.sheet_names:
+def _onglets_annuels(sheetnames, sheet_prefix):
+    """[(onglet, annee)] des onglets <prefixe><année> (ex. : COM_2019), dans l'ordre du classeur."""
+    onglets = []
+    for sheet in sheetnames:
         if not sheet.startswith(sheet_prefix):
             continue
-
         annee_str = sheet.replace(sheet_prefix, '')
         try:
-            annee = int(annee_str)
+            onglets.append((sheet, int(annee_str)))
         except ValueError:
             continue
+    return onglets
 
-        try:
-            df = pd.read_excel(filepath, sheet_name=sheet, header=header_row)
-        except Exception as e:
-            print(f"    ⚠ Impossible de lire l'onglet {sheet}: {e}")
-            continue
 
-        # Sauter la première ligne de données (codes internes)
-        if len(df) > 0:
-            first_val = str(df.iloc[0, 0]).strip()
-            if first_val in ('RR', 'REG', 'CR', '') or not first_val[0].isdigit():
-                df = df.iloc[1:].reset_index(drop=True)
-
-        # Trouver les colonnes département et commune
-        dep_col = None
-        com_col = None
-        for c in df.columns:
-            c_lower = str(c).lower().replace('\n', ' ')
-            if 'département' in c_lower and 'géographie courante' in c_lower and dep_col is None:
-                dep_col = c
-            elif 'commune' in c_lower and 'géographie courante' in c_lower and com_col is None:
-                com_col = c
-
-        if dep_col is None or com_col is None:
-            print(f"    ⚠ Colonnes dep/commune non trouvées dans {sheet}")
-            print(f"      Colonnes disponibles: {list(df.columns[:6])}")
+def _onglet_insee(ws, sheet, annee, header_row, departements):
+    """Un onglet COM_ lu et filtré : (DataFrame ou None, messages à afficher).
+
+    Les messages sont rendus plutôt qu'affichés : un onglet lu dans un
+    processus du pool les fait afficher par l'étape qui l'utilise.
+    """
+    try:
+        lignes, i_dep, i_com = _lire_onglet_insee(ws, header_row, departements)
+    except Exception as e:
+        return None, [f"    ⚠ Impossible de lire l'onglet {sheet}: {e}"]
+
+    if i_dep is None or i_com is None:
+        noms = [nom if nom != '' else f"Unnamed: {i}" for i, nom in enumerate(lignes[header_row])]
+        return None, [f"    ⚠ Colonnes dep/commune non trouvées dans {sheet}",
+                      f"      Colonnes disponibles: {noms[:6]}"]
+
+    if len(lignes) == header_row + 1:
+        return None, []  # onglet sans données
+
+    df = TextParser(lignes, header=header_row, skip_blank_lines=False).read()
+    dep_col, com_col = df.columns[i_dep], df.columns[i_com]
+
+    # Sauter la première ligne de données (codes internes)
+    if len(df) > 0:
+        first_val = str(df.iloc[0, 0]).strip()
+        if first_val in ('RR', 'REG', 'CR', '') or not first_val[0].isdigit():
+            df = df.iloc[1:].reset_index(drop=True)
+
+    # Construire codgeo = dep (2 car.) + commune (3 car.)
+    df['codgeo'] = [str(dep).strip().zfill(2) + str(com).strip().zfill(3)
+                    for dep, com in zip(df[dep_col], df[com_col])]
+
+    # Filtrer les départements traités
+    if departements is not None:
+        df = df[departements_de(df['codgeo']).isin(departements)]
+
+    if len(df) == 0:
+        return None, []
+
+    # Supprimer les colonnes non numériques (métadonnées)
+    cols_to_drop = []
+    for c in df.columns:
+        if c in ('codgeo', 'annee'):
             continue
+        c_lower = str(c).lower().replace('\n', ' ')
+        if any(kw in c_lower for kw in ['libellé', 'libelle', 'commune', 'région', 'region',
+                                          'département', 'departement', 'indicateur', 'stabilité']):
+            cols_to_drop.append(c)
+    df = df.drop(columns=cols_to_drop, errors='ignore')
 
-        # Construire codgeo = dep (2 car.) + commune (3 car.)
-        df['codgeo'] = df.apply(
-            lambda r: str(r[dep_col]).strip().zfill(2) + str(r[com_col]).strip().zfill(3),
-            axis=1
-        )
+    df['annee'] = annee
+    return df, []
 
-        # Filtrer dept 34
-        df = df[df['codgeo'].str.startswith(DEPT)]
 
-        if len(df) == 0:
-            continue
+def _ouvrir_classeur(filepath):
+    """Classeur xlsx en lecture seule (onglets lus en flux)."""
+    return openpyxl.load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
+
+
+# Espaces de noms XML d'un classeur xlsx (workbook.xml et ses relations)
+_NS_XLSX = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+
+
+def _tailles_onglets(filepath):
+    """{onglet: taille du XML de sa feuille dans l'archive}, dans l'ordre du classeur.
+
+    Lu dans xl/workbook.xml et ses relations, sans charger le classeur :
+    estimation du travail de lecture de chaque onglet (0 si introuvable).
+    """
+    with zipfile.ZipFile(filepath) as archive:
+        classeur = ET.fromstring(archive.read('xl/workbook.xml'))
+        relations = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        cibles = {rel.get('Id'): rel.get('Target')
+                  for rel in relations.iterfind('rel:Relationship', _NS_XLSX)}
+        tailles = {}
+        for feuille in classeur.iterfind('main:sheets/main:sheet', _NS_XLSX):
+            cible = cibles.get(feuille.get(f"{{{_NS_XLSX['r']}}}id"), '')
+            # Cible relative à xl/ (worksheets/sheet1.xml) ou absolue (/xl/…)
+            chemin_xml = cible.lstrip('/') if cible.startswith('/') else f"xl/{cible}"
+            try:
+                tailles[feuille.get('name')] = archive.getinfo(chemin_xml).file_size
+            except KeyError:
+                tailles[feuille.get('name')] = 0
+    return tailles
+
+
+# Classeurs ouverts par un processus du pool : un seul chargement par classeur et
+# par processus, quel que soit le nombre d'onglets qu'il y lit
+_classeurs_worker = {}
+
+
+def _tache_onglet_insee(tache):
+    """Worker : lit un onglet (chemin, onglet, année, ligne d'en-tête, départements)."""
+    filepath, sheet, annee, header_row, departements = tache
+    if filepath not in _classeurs_worker:
+        _classeurs_worker[filepath] = _ouvrir_classeur(filepath)
+    df, messages = _onglet_insee(_classeurs_worker[filepath][sheet], sheet, annee,
+                                 header_row, departements)
+    return filepath, sheet, annee, df, messages
+
+
+# Onglets lus d'avance par prelire_classeurs_insee : chemin → [(onglet, année, df, messages)]
+_onglets_prelus = {}
 
-        # Supprimer les colonnes non numériques (métadonnées)
-        cols_to_drop = []
-        for c in df.columns:
-            if c in ('codgeo', 'annee'):
-                continue
-            c_lower = str(c).lower().replace('\n', ' ')
-            if any(kw in c_lower for kw in ['libellé', 'libelle', 'commune', 'région', 'region',
-                                              'département', 'departement', 'indicateur', 'stabilité']):
-                cols_to_drop.append(c)
-        df = df.drop(columns=cols_to_drop, errors='ignore')
 
-        df['annee'] = annee
-        results[annee] = df
+def _variante_insee(sheet_prefix, header_row):
+    """Variante de lecture d'un classeur INSEE pour le cache des sources (onglets filtrés)."""
+    departements = 'tous' if DEPARTEMENTS is None else ','.join(sorted(DEPARTEMENTS))
+    return f"onglets {sheet_prefix}*, en-tête {header_row}, départements {departements}"
 
-    return results
 
+def prelire_classeurs_insee(fichiers, workers, sheet_prefix='COM_', header_row=14):
+    """Lit d'avance les onglets COM_ de plusieurs classeurs INSEE sur un pool de processus.
 
-def etl_csp(conn):
+    L'analyse xlsx (openpyxl, pur Python) occupe un cœur par onglet : les
+    onglets de tous les classeurs sont répartis entre workers processus,
+    les plus gros en premier. Chaque processus rend des DataFrames déjà
+    filtrés et typés, repris ensuite par _read_insee_xlsx.
+    """
+    taches = []
+    tailles = {}
+    rangs = {}
+    for filepath in fichiers:
+        if not os.path.exists(filepath):
+            continue  # signalé par l'étape qui le lit
+        if cache_valide(filepath, _variante_insee(sheet_prefix, header_row)):
+            continue  # relu depuis le cache par l'étape
+        tailles_xml = _tailles_onglets(filepath)
+        for rang, (sheet, annee) in enumerate(_onglets_annuels(list(tailles_xml), sheet_prefix)):
+            rangs[filepath, sheet] = rang
+            tailles[filepath, sheet] = tailles_xml[sheet]
+            taches.append((filepath, sheet, annee, header_row, DEPARTEMENTS))
+        _onglets_prelus[filepath] = []
+    if not taches:
+        return
+
+    taches.sort(key=lambda tache: tailles[tache[:2]], reverse=True)
+    print(f"\n  Lecture des classeurs INSEE : {len(taches)} onglets sur "
+          f"{min(workers, len(taches))} processus...")
+    debut = time.time()
+    with Pool(min(workers, len(taches))) as pool:
+        for filepath, sheet, annee, df, messages in pool.imap_unordered(_tache_onglet_insee, taches):
+            _onglets_prelus[filepath].append((sheet, annee, df, messages))
+    # Onglets remis dans l'ordre du classeur (messages affichés comme en série)
+    for filepath, onglets in _onglets_prelus.items():
+        onglets.sort(key=lambda onglet: rangs.get((filepath, onglet[0]), 0))
+    print(f"  ✓ {len(taches)} onglets lus en {time.time() - debut:.1f} s")
+
+
+def _read_insee_xlsx(filepath, sheet_prefix='COM_', header_row=14):
+    """Lit un fichier INSEE xlsx avec onglets COM_xxxx, retourne un dict {annee: DataFrame}.
+
+    Ces fichiers INSEE ont une structure spécifique :
+    - header_row contient les noms de colonnes (avec retours à la ligne)
+    - La ligne suivante (row 0 des données) contient des codes internes → à sauter
+    - Les colonnes 'Département' et 'Commune' sont séparées (dep 2 car + commune 3 car)
+
+    Le classeur (23–52 MB) est ouvert une seule fois, en lecture seule : chaque
+    onglet est lu en flux et seules les lignes des départements traités sont
+    converties en DataFrame (même analyse des types que pd.read_excel, faite
+    sur les lignes retenues). Un classeur lu d'avance en parallèle
+    (prelire_classeurs_insee) n'est pas relu, un classeur inchangé depuis
+    l'exécution précédente est relu depuis le cache des sources.
+    """
+    if not os.path.exists(filepath):
+        print(f"  ⚠ Fichier manquant : {filepath}")
+        return {}
+
+    def lire():
+        if filepath in _onglets_prelus:
+            onglets = _onglets_prelus.pop(filepath)
+        else:
+            wb = _ouvrir_classeur(filepath)
+            try:
+                onglets = [(sheet, annee, *_onglet_insee(wb[sheet], sheet, annee, header_row,
+                                                         DEPARTEMENTS))
+                           for sheet, annee in _onglets_annuels(wb.sheetnames, sheet_prefix)]
+            finally:
+                wb.close()
+
+        tables = {}
+        for sheet, annee, df, messages in onglets:
+            for message in messages:
+                print(message)
+            if df is not None:
+                tables[str(annee)] = df
+        return tables
+
+    tables = tables_en_cache(filepath, _variante_insee(sheet_prefix, header_row), lire)
+    return {int(annee): df for annee, df in tables.items()}
+
+
+def etl_csp(bases):
     """Table csp : population active par CSP."""
     print_section("6/12 — csp")
 
@@ -599,13 +1440,17 @@ def etl_csp(conn):
         # Nettoyer les noms de colonnes
         combined.columns = [c.lower().strip().replace(' ', '_') if c not in ('codgeo', 'annee') else c for c in combined.columns]
 
-        conn.execute("DROP TABLE IF EXISTS csp")
-        combined.to_sql('csp', conn, if_exists='replace', index=False)
+    def charger():
+        if all_dfs:
+            for conn, combined_dept in bases.repartir(combined):
+                conn.execute("DROP TABLE IF EXISTS csp")
+                combined_dept.to_sql('csp', conn, if_exists='replace', index=False)
+        bases.print_count('csp')
 
-    print_count('csp', conn)
+    bases.ecrire(charger)
 
 
-def etl_secteurs_activite(conn):
+def etl_secteurs_activite(bases):
     """Table secteurs_activite : actifs par secteur d'activité × sexe."""
     print_section("7/12 — secteurs_activite")
 
@@ -622,13 +1467,17 @@ def etl_secteurs_activite(conn):
         combined = pd.concat(all_dfs, ignore_index=True)
         combined.columns = [c.lower().strip().replace(' ', '_') if c not in ('codgeo', 'annee') else c for c in combined.columns]
 
-        conn.execute("DROP TABLE IF EXISTS secteurs_activite")
-        combined.to_sql('secteurs_activite', conn, if_exists='replace', index=False)
+    def charger():
+        if all_dfs:
+            for conn, combined_dept in bases.repartir(combined):
+                conn.execute("DROP TABLE IF EXISTS secteurs_activite")
+                combined_dept.to_sql('secteurs_activite', conn, if_exists='replace', index=False)
+        bases.print_count('secteurs_activite')
 
-    print_count('secteurs_activite', conn)
+    bases.ecrire(charger)
 
 
-def etl_diplomes(conn):
+def etl_diplomes(bases):
     """Table diplomes : niveaux de diplôme par commune."""
     print_section("8/12 — diplomes")
 
@@ -647,9 +1496,9 @@ def etl_diplomes(conn):
         print("  ⚠ Impossible de lire le fichier diplômes")
         return
 
-    df = pd.read_csv(DIPLOMES_FILE, sep=';', encoding=enc, dtype={'CODGEO': str})
+    df = lire_csv(DIPLOMES_FILE, sep=';', encoding=enc, dtype={'CODGEO': str})
     df['codgeo'] = df['CODGEO'].apply(codgeo_from_single)
-    df = df[df['codgeo'].str.startswith(DEPT)]
+    df = df[dans_departements(df['codgeo'])]
 
     # Supprimer colonnes non numériques inutiles
     cols_to_drop = [c for c in df.columns if c != 'codgeo' and any(kw in c.upper() for kw in ['CODGEO', 'LIBGEO', 'REG', 'DEP', 'COM', 'ARR'])]
@@ -658,13 +1507,16 @@ def etl_diplomes(conn):
     # Nettoyer les noms de colonnes
     df.columns = [c.lower().strip() if c != 'codgeo' else c for c in df.columns]
 
-    conn.execute("DROP TABLE IF EXISTS diplomes")
-    df.to_sql('diplomes', conn, if_exists='replace', index=False)
+    def charger():
+        for conn, df_dept in bases.repartir(df):
+            conn.execute("DROP TABLE IF EXISTS diplomes")
+            df_dept.to_sql('diplomes', conn, if_exists='replace', index=False)
+        bases.print_count('diplomes')
 
-    print_count('diplomes', conn)
+    bases.ecrire(charger)
 
 
-def etl_csp_diplome(conn):
+def etl_csp_diplome(bases):
     """Table csp_diplome : croisement CSP × diplôme."""
     print_section("9/12 — csp_diplome")
 
@@ -681,13 +1533,17 @@ def etl_csp_diplome(conn):
         combined = pd.concat(all_dfs, ignore_index=True)
         combined.columns = [c.lower().strip().replace(' ', '_') if c not in ('codgeo', 'annee') else c for c in combined.columns]
 
-        conn.execute("DROP TABLE IF EXISTS csp_diplome")
-        combined.to_sql('csp_diplome', conn, if_exists='replace', index=False)
+    def charger():
+        if all_dfs:
+            for conn, combined_dept in bases.repartir(combined):
+                conn.execute("DROP TABLE IF EXISTS csp_diplome")
+                combined_dept.to_sql('csp_diplome', conn, if_exists='replace', index=False)
+        bases.print_count('csp_diplome')
 
-    print_count('csp_diplome', conn)
+    bases.ecrire(charger)
 
 
-def etl_comptes_communes(conn):
+def etl_comptes_communes(bases):
     """Table comptes_communes : finances locales."""
     print_section("10/12 — comptes_communes")
 
@@ -719,7 +1575,8 @@ def etl_comptes_communes(conn):
         # Détecter encodage
         for enc in ['utf-8', 'latin-1', 'cp1252']:
             try:
-                df = pd.read_csv(filepath, sep=';', encoding=enc, dtype=str, nrows=5)
+                with ouvrir_source(filepath) as f:
+                    df = pd.read_csv(f, sep=';', encoding=enc, dtype=str, nrows=5)
                 break
             except Exception:
                 continue
@@ -727,24 +1584,23 @@ def etl_comptes_communes(conn):
             print(f"    ⚠ Impossible de lire {filepath}")
             continue
 
-        df = pd.read_csv(filepath, sep=';', encoding=enc, dtype=str, low_memory=False)
+        # Source éventuellement compressée : décompression dans un thread
+        df = lire_csv(filepath, sep=';', encoding=enc, dtype=str, low_memory=False)
 
-        # Filtrer département 34 (dep peut être '34' ou '034')
-        if 'dep' in df.columns:
-            df = df[df['dep'].str.strip().str.lstrip('0') == DEPT]
-        else:
+        if 'dep' not in df.columns:
             print(f"    ⚠ Colonne 'dep' non trouvée dans {filepath}")
             continue
 
+        # Construire codgeo = dep (sans zéro initial : '034' → '34', '001' → '01') + icom (3 car.)
+        dep = df['dep'].str.strip().str.lstrip('0').str.zfill(2)
+        df['codgeo'] = dep + df['icom'].astype(str).str.strip().str.zfill(3)
+
+        # Filtrer les départements traités
+        df = df[dans_departements(df['codgeo'])]
+
         if len(df) == 0:
             continue
 
-        # Construire codgeo = dep (sans zéro initial) + icom (3 car.)
-        df['codgeo'] = df.apply(
-            lambda r: str(r['dep']).strip().lstrip('0') + str(r['icom']).strip().zfill(3),
-            axis=1
-        )
-
         # Sélectionner et renommer les colonnes disponibles
         cols_available = {k: v for k, v in colonnes_renommage.items() if k in df.columns}
         cols_to_keep = ['codgeo'] + list(cols_available.keys())
@@ -762,13 +1618,18 @@ def etl_comptes_communes(conn):
 
     if all_dfs:
         combined = pd.concat(all_dfs, ignore_index=True)
-        conn.execute("DROP TABLE IF EXISTS comptes_communes")
-        combined.to_sql('comptes_communes', conn, if_exists='replace', index=False)
 
-    print_count('comptes_communes', conn)
+    def charger():
+        if all_dfs:
+            for conn, combined_dept in bases.repartir(combined):
+                conn.execute("DROP TABLE IF EXISTS comptes_communes")
+                combined_dept.to_sql('comptes_communes', conn, if_exists='replace', index=False)
+        bases.print_count('comptes_communes')
+
+    bases.ecrire(charger)
 
 
-def etl_catnat(conn):
+def etl_catnat(bases):
     """Table catnat : arrêtés de catastrophe naturelle."""
     print_section("11/12 — catnat")
 
@@ -776,19 +1637,23 @@ def etl_catnat(conn):
         print(f"  ⚠ Fichier manquant : {CATNAT_FILE}")
         return
 
-    df = pd.read_csv(CATNAT_FILE, sep=';', dtype={'cod_commune': str})
+    df = lire_csv(CATNAT_FILE, sep=';', dtype={'cod_commune': str})
 
     df['codgeo'] = df['cod_commune'].apply(lambda x: str(x).strip())
-    df = df[df['codgeo'].str.startswith(DEPT)]
+    df = df[dans_departements(df['codgeo'])]
 
     result = df[['codgeo', 'lib_risque_jo', 'dat_deb', 'dat_fin', 'dat_pub_arrete']].copy()
     result.columns = ['codgeo', 'risque', 'date_debut', 'date_fin', 'date_arrete']
 
-    result.to_sql('catnat', conn, if_exists='replace', index=False)
-    print_count('catnat', conn)
+    def charger():
+        for conn, result_dept in bases.repartir(result):
+            result_dept.to_sql('catnat', conn, if_exists='replace', index=False)
+        bases.print_count('catnat')
 
+    bases.ecrire(charger)
 
-def etl_risques(conn):
+
+def etl_risques(bases):
     """Table risques : inventaire des risques par commune."""
     print_section("12/12 — risques")
 
@@ -796,25 +1661,29 @@ def etl_risques(conn):
         print(f"  ⚠ Fichier manquant : {RISQUES_FILE}")
         return
 
-    df = pd.read_csv(RISQUES_FILE, sep=';', dtype=str)
+    df = lire_csv(RISQUES_FILE, sep=';', dtype=str)
 
     df['codgeo'] = df['cod_commune'].apply(lambda x: codgeo_from_single(str(x).strip()))
-    df = df[df['codgeo'].str.startswith(DEPT)]
+    df = df[dans_departements(df['codgeo'])]
 
     result = df[['codgeo', 'lib_risque', 'num_risque']].copy()
     result.columns = ['codgeo', 'libelle_risque', 'code_risque']
 
-    result.to_sql('risques', conn, if_exists='replace', index=False)
-    print_count('risques', conn)
+    def charger():
+        for conn, result_dept in bases.repartir(result):
+            result_dept.to_sql('risques', conn, if_exists='replace', index=False)
+        bases.print_count('risques')
+
+    bases.ecrire(charger)
 
 
 # ============================================================================
 # VALIDATION
 # ============================================================================
 
-def validate(conn):
-    """Validation finale : comptages et cohérence."""
-    print_section("VALIDATION FINALE")
+def validate(conn, dept=DEPT):
+    """Validation finale d'une base départementale : comptages et cohérence."""
+    print_section(f"VALIDATION FINALE — {chemin_base(dept)}")
 
     tables = [
         'communes', 'elections', 'population', 'naissances_deces',
@@ -837,7 +1706,7 @@ def validate(conn):
     # Vérifier les communes
     try:
         n_communes = conn.execute("SELECT COUNT(*) FROM communes").fetchone()[0]
-        print(f"\n  Communes du 34 : {n_communes}")
+        print(f"\n  Communes du {dept} : {n_communes}")
     except Exception:
         pass
 
@@ -869,52 +1738,205 @@ def validate(conn):
 # MAIN
 # ============================================================================
 
-def main():
+def lire_departements(valeur):
+    """Option --departements : '34,30,11' → {'34', '30', '11'} ; 'all' → None (tous)."""
+    if valeur.strip().lower() in ('all', 'tous'):
+        return None
+    departements = {d.strip().upper().zfill(2) for d in valeur.split(',') if d.strip()}
+    if not departements:
+        raise argparse.ArgumentTypeError("aucun département indiqué")
+    return departements
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline ETL → SQLite (une base par département)")
+    parser.add_argument("--departements", type=lire_departements, default={DEPT},
+                        metavar="LISTE",
+                        help=f"départements séparés par des virgules, ou 'all' (défaut : {DEPT})")
+    parser.add_argument("--sans-elections", action="store_true",
+                        help="ne pas scanner candidats_results.txt "
+                             "(table elections alimentée par le scan partagé)")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="processus pour parser candidats_results.txt par plages d'octets "
+                             "et les onglets des classeurs INSEE")
+    parser.add_argument("--repartir-de-zero", action="store_true",
+                        help=f"ignorer le point de reprise ({REPRISE_FILE}) et tout recharger")
+    parser.add_argument("--sans-cube", action="store_true",
+                        help=f"ne pas construire le cube national des voix ({CUBE_DB})")
+    parser.add_argument("--etapes", type=int, default=ETAPES_PARALLELES, metavar="N",
+                        help="étapes exécutées en même temps (threads, écritures SQLite sur "
+                             f"un thread unique ; 1 = en série, défaut : {ETAPES_PARALLELES})")
+    parser.add_argument("--sans-cache", action="store_true",
+                        help="reparser les sources sans lire ni écrire leurs copies Parquet "
+                             f"({cache_sources.CACHE_DIR})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="garder les bases existantes et ne recharger que les tables "
+                             "dont une source a changé (table manifeste)")
+    return parser.parse_args(argv)
+
+
+def etape_avec_manifeste(bases, etape, connues, a_jour=False, vider=False):
+    """Fonction de l'étape, suivie de l'enregistrement de ses sources au manifeste.
+
+    Les signatures des sources sont prises avant leur lecture (connues :
+    signatures déjà calculées, empreinte reprise si taille et date n'ont
+    pas changé). a_jour : sources inchangées depuis le chargement des
+    tables (--incremental), l'étape est sautée et seules les dates du
+    manifeste sont mises à jour. vider : tables de l'étape vidées avant le
+    rechargement (bases gardées par --incremental).
+
+    Les chargements valident eux-mêmes (to_sql) : les entrées des tables
+    sont supprimées et validées avec le vidage, avant le chargement, puis
+    réécrites après lui. Une étape interrompue reste ainsi à refaire.
+    """
+    charger = etape.fonction
+    tables = sorted(etape.produit)
+
+    def enregistrer(signatures):
+        for conn in bases.conns.values():
+            for table in tables:
+                enregistrer_manifeste(conn, table, signatures)
+        bases.valider()
+
+    def fonction():
+        signatures = {source: signature_fichier(source, connues.get(source))
+                      for source in etape.lit}
+        if a_jour:
+            print_section(f"{etape.nom} — inchangée (sources identiques au manifeste)")
+            for table in tables:
+                bases.ecrire(lambda table=table: bases.print_count(table))
+            bases.ecrire(lambda: enregistrer(signatures))
+            return
+
+        def invalider():
+            for conn in bases.conns.values():
+                for table in tables:
+                    invalider_manifeste(conn, table)
+                    if vider:
+                        conn.execute(f"DELETE FROM {table}")
+            bases.valider()
+
+        bases.ecrire(invalider)
+        charger()
+        bases.ecrire(lambda: enregistrer(signatures))
+
+    return fonction
+
+
+def etapes_etl(bases, args, reprise):
+    """Étapes de l'ETL dans l'ordre logique, avec les sources lues et les tables produites.
+
+    Avec --incremental, les étapes dont les sources n'ont pas changé depuis
+    le chargement de leurs tables (manifeste de chaque base) sont sautées.
+    """
+    if args.sans_elections:
+        elections = Etape('elections', lambda: print_section(
+            "2/12 — elections (ignorée : --sans-elections)"))
+    else:
+        elections = Etape('elections', lambda: etl_elections(
+            bases, args.workers, reprise, cube=not args.sans_cube),
+            lit=[ELECTIONS_FILE], produit=['elections'])
+    classeurs_insee = [CSP_FILE, SECTEURS_FILE, CSP_DIPLOME_FILE]
+
+    etapes = [
+        Etape('communes', lambda: etl_communes(bases), lit=[POPULATION_FILE],
+              produit=['communes']),
+        elections,
+        Etape('population', lambda: etl_population(bases), lit=[POPULATION_FILE],
+              produit=['population']),
+        Etape('naissances_deces', lambda: etl_naissances_deces(bases),
+              lit=[NAISSANCES_FILE, DECES_FILE], produit=['naissances_deces']),
+        Etape('revenus', lambda: etl_revenus(bases), lit=[REVENUS_FILE], produit=['revenus']),
+        Etape('csp', lambda: etl_csp(bases), lit=[CSP_FILE], produit=['csp']),
+        Etape('secteurs_activite', lambda: etl_secteurs_activite(bases), lit=[SECTEURS_FILE],
+              produit=['secteurs_activite']),
+        Etape('diplomes', lambda: etl_diplomes(bases), lit=[DIPLOMES_FILE],
+              produit=['diplomes']),
+        Etape('csp_diplome', lambda: etl_csp_diplome(bases), lit=[CSP_DIPLOME_FILE],
+              produit=['csp_diplome']),
+        Etape('comptes_communes', lambda: etl_comptes_communes(bases), lit=COMPTES_FILES,
+              produit=['comptes_communes']),
+        Etape('catnat', lambda: etl_catnat(bases), lit=[CATNAT_FILE], produit=['catnat']),
+        Etape('risques', lambda: etl_risques(bases), lit=[RISQUES_FILE], produit=['risques']),
+    ]
+
+    manifestes = [lire_manifeste(conn) for conn in bases.conns.values()]
+    connues = {source: signature for manifeste_base in manifestes
+               for sources in manifeste_base.values()
+               for source, signature in sources.items() if signature[0] is not None}
+    actuelles = {}
+    a_jour = {etape.nom: args.incremental and all(
+                  sources_inchangees(manifestes, table, etape.lit, actuelles)
+                  for table in etape.produit)
+              for etape in etapes if etape.produit}
+    connues.update((source, signature) for source, signature in actuelles.items()
+                   if signature is not None)
+    for etape in etapes:
+        if etape.produit:
+            # Chargement repris (elections) : les lignes déjà chargées sont gardées
+            vider = args.incremental and not (etape is elections and reprise is not None)
+            etape.fonction = etape_avec_manifeste(bases, etape, connues,
+                                                  a_jour[etape.nom], vider)
+
+    if args.workers > 1 and not all(a_jour[etape.nom] for etape in etapes
+                                    if etape.lit & set(classeurs_insee)):
+        # Onglets des trois classeurs INSEE analysés en parallèle, repris par leurs étapes
+        etapes.insert(5, Etape('classeurs INSEE', lambda: prelire_classeurs_insee(
+            classeurs_insee, args.workers), lit=classeurs_insee))
+    return etapes
+
+
+def main(argv=None):
+    global DEPARTEMENTS
+
+    args = parse_args(argv)
+    DEPARTEMENTS = args.departements
+    cache_sources.ACTIF = not args.sans_cache
+
     print("=" * 60)
     print("  PIPELINE ETL — ELECTIO-ANALYTICS")
-    print("  Département : Hérault (34)")
+    if DEPARTEMENTS == {DEPT}:
+        print("  Département : Hérault (34)")
+    else:
+        print(f"  Départements : {libelle_departements()}")
     print("=" * 60)
 
-    # Créer le répertoire de sortie
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-
-    # Supprimer la base existante
-    if os.path.exists(DB_PATH):
-        os.remove(DB_PATH)
-        print(f"\n  Base existante supprimée : {DB_PATH}")
-
-    # Connexion SQLite
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=OFF")
-
-    # Créer les tables
-    print("\n  Création des tables...")
-    conn.executescript(DDL)
-
-    # ETL par table (ordre logique)
-    etl_communes(conn)
-    etl_elections(conn)
-    etl_population(conn)
-    etl_naissances_deces(conn)
-    etl_revenus(conn)
-    etl_csp(conn)
-    etl_secteurs_activite(conn)
-    etl_diplomes(conn)
-    etl_csp_diplome(conn)
-    etl_comptes_communes(conn)
-    etl_catnat(conn)
-    etl_risques(conn)
+    # Reprise d'un ETL interrompu pendant le chargement elections
+    reprise = None
+    if not (args.repartir_de_zero or args.sans_elections):
+        reprise = lire_reprise()
+    if reprise is not None:
+        print(f"\n  Reprise de l'ETL interrompu : {reprise['lignes_lues']:,} lignes "
+              f"d'élections déjà chargées, bases conservées")
+    else:
+        effacer_reprise()
+
+    # Une base par département (les bases existantes sont supprimées et
+    # recréées avec les tables ; en mode « all », à la première ligne du département)
+    conservees = reprise['bases'] if reprise else ()
+    if args.incremental:
+        print("\n  Bases existantes gardées (--incremental)...")
+        departements = DEPARTEMENTS if DEPARTEMENTS is not None else departements_existants()
+        bases = Bases(departements, reinitialiser=False, conservees=conservees)
+    else:
+        print("\n  Création des tables...")
+        bases = Bases(DEPARTEMENTS, conservees=conservees)
+
+    # ETL par table : chaque source est lue une fois, étapes indépendantes en parallèle
+    executer_etapes(etapes_etl(bases, args, reprise), args.etapes, bases)
 
     # Validation
-    validate(conn)
+    for dept in sorted(bases.conns):
+        validate(bases.conns[dept], dept)
 
-    conn.close()
+    bases.close()
+    effacer_reprise()
 
     print(f"\n{'=' * 60}")
-    print(f"  BASE CRÉÉE : {DB_PATH}")
-    size_mb = os.path.getsize(DB_PATH) / (1024 * 1024)
-    print(f"  Taille : {size_mb:.1f} MB")
+    for dept in sorted(bases.conns):
+        chemin = chemin_base(dept)
+        size_mb = os.path.getsize(chemin) / (1024 * 1024)
+        print(f"  BASE CRÉÉE : {chemin} ({size_mb:.1f} MB)")
     print(f"{'=' * 60}")
 
 
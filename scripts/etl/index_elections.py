@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Index des blocs du fichier élections (offsets d'octets)
+
+Le fichier candidats_results.txt est rangé par élection puis par
+département : les lignes d'un couple (id_election, Code du département)
+se suivent. L'index enregistre, pour chaque bloc de lignes consécutives
+d'un même couple, sa plage d'octets [debut, fin) et son nombre de lignes,
+dans data/output/candidats_results_index.db (quelques milliers de lignes).
+
+Il est construit au passage pendant un scan complet (consommateur
+IndexElections du moteur de scan) ; un lecteur qui ne veut que quelques
+départements ou un type d'élection lit ensuite les seules plages utiles
+(plages_index → ScanElections.executer(plages=…)) au lieu des 2 GB.
+
+L'index est ignoré si la taille ou la date du fichier élections ont
+changé depuis sa construction, ou si la source est compressée (les
+offsets d'une source décompressée au vol ne permettent pas de seek).
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/etl/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.elections_scan import ELECTIONS_FILE
+from scripts.etl.sources_compressees import (
+    est_compresse, resoudre_source, signature_source, source_existe)
+
+INDEX_DB = "data/output/candidats_results_index.db"
+
+DDL = """
+CREATE TABLE IF NOT EXISTS blocs (
+    id_election TEXT NOT NULL,
+    departement TEXT NOT NULL,
+    debut INTEGER NOT NULL,
+    fin INTEGER NOT NULL,
+    lignes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blocs_election ON blocs(id_election);
+CREATE INDEX IF NOT EXISTS idx_blocs_departement ON blocs(departement);
+CREATE TABLE IF NOT EXISTS index_source (
+    signature TEXT NOT NULL
+);
+"""
+
+
+class IndexElections:
+    """Consommateur positionné du scan : blocs (élection, département) → plages d'octets.
+
+    Toutes les lignes sont indexées (pas de préfiltre), y compris les
+    lignes incomplètes, pour que les blocs couvrent le fichier sans trou
+    et que leurs nombres de lignes donnent les numéros de ligne. Picklable
+    et fusionnable (mode parallèle).
+    """
+
+    positionne = True
+
+    def __init__(self, source=ELECTIONS_FILE, chemin=INDEX_DB):
+        self.source = source
+        self.chemin = chemin
+        self.blocs = []  # [cle, debut, fin, lignes], dans l'ordre du fichier
+        self.indices = (0, 0)
+
+    def debut(self, headers):
+        col_idx = {h: i for i, h in enumerate(headers)}
+        manquantes = [c for c in ('id_election', 'Code du département') if c not in col_idx]
+        if manquantes:
+            raise ValueError(f"Colonnes manquantes dans le fichier élections : {manquantes}")
+        self.indices = (col_idx['id_election'], col_idx['Code du département'])
+
+    def traiter(self, row, debut, fin):
+        i_election, i_dep = self.indices
+        cle = (row[i_election].strip() if len(row) > i_election else '',
+               row[i_dep].strip() if len(row) > i_dep else '')
+        dernier = self.blocs[-1] if self.blocs else None
+        if dernier is not None and dernier[0] == cle and dernier[2] == debut:
+            dernier[2] = fin
+            dernier[3] += 1
+        else:
+            self.blocs.append([cle, debut, fin, 1])
+
+    def fusionner(self, autre):
+        """Ajoute les blocs de la plage suivante (mode parallèle) ; un bloc coupé est recollé."""
+        blocs = autre.blocs
+        if self.blocs and blocs and self.blocs[-1][0] == blocs[0][0] \
+                and self.blocs[-1][2] == blocs[0][1]:
+            self.blocs[-1][2] = blocs[0][2]
+            self.blocs[-1][3] += blocs[0][3]
+            blocs = blocs[1:]
+        self.blocs.extend(blocs)
+
+    def fin(self):
+        enregistrer_index(self.blocs, self.source, self.chemin)
+
+
+def enregistrer_index(blocs, source=ELECTIONS_FILE, chemin=INDEX_DB):
+    """Écrit les blocs dans la base de l'index (fichier temporaire puis renommage)."""
+    os.makedirs(os.path.dirname(chemin) or '.', exist_ok=True)
+    temporaire = chemin + ".tmp"
+    if os.path.exists(temporaire):
+        os.remove(temporaire)
+
+    conn = sqlite3.connect(temporaire)
+    conn.executescript(DDL)
+    conn.executemany("INSERT INTO blocs VALUES (?, ?, ?, ?, ?)",
+                     ((election, dep, debut, fin, lignes)
+                      for (election, dep), debut, fin, lignes in blocs))
+    conn.execute("INSERT INTO index_source VALUES (?)", (json.dumps(signature_source(source)),))
+    conn.commit()
+    conn.close()
+    os.replace(temporaire, chemin)
+
+    print(f"  ✓ index élections : {len(blocs):,} blocs → {chemin}")
+
+
+def index_disponible(source=ELECTIONS_FILE, chemin=INDEX_DB):
+    """Vrai si l'index existe et correspond au fichier élections (taille et date)."""
+    if not os.path.exists(chemin) or not source_existe(source) \
+            or est_compresse(resoudre_source(source)):
+        return False
+    conn = sqlite3.connect(chemin)
+    try:
+        ligne = conn.execute("SELECT signature FROM index_source").fetchone()
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        conn.close()
+    return ligne is not None and json.loads(ligne[0]) == signature_source(source)
+
+
+def plages_index(departements=None, election=None, source=ELECTIONS_FILE, chemin=INDEX_DB):
+    """Plages [(debut, fin, numero)] des blocs retenus, triées et fusionnées si contiguës.
+
+    departements : codes exacts du département (None = tous)
+    election     : sous-chaîne(s) de l'id_election (str ou liste, None = toutes)
+    numero est le numéro de la première ligne de la plage (0 = première
+    ligne après l'en-tête). Retourne None si l'index n'est pas disponible.
+    """
+    if not index_disponible(source, chemin):
+        return None
+    if isinstance(election, str):
+        election = [election]
+
+    conn = sqlite3.connect(chemin)
+    try:
+        blocs = conn.execute(
+            "SELECT id_election, departement, debut, fin, lignes FROM blocs ORDER BY debut"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    plages = []
+    numero = 0
+    for id_election, dep, debut, fin, lignes in blocs:
+        retenu = ((departements is None or dep in departements)
+                  and (election is None or any(e in id_election for e in election)))
+        if retenu:
+            if plages and plages[-1][1] == debut:
+                plages[-1][1] = fin
+            else:
+                plages.append([debut, fin, numero])
+        numero += lignes
+    return [tuple(p) for p in plages]
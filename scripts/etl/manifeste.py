@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Manifeste des sources de chaque table (ETL incrémental)
+
+Chaque base SQLite de l'ETL contient une table manifeste : pour chaque
+table chargée, les fichiers sources lus et leur signature au moment de
+la lecture (taille, date, empreinte SHA-256 du contenu). Une source
+absente est enregistrée sans signature.
+
+Un ETL --incremental compare ces signatures aux sources actuelles : une
+table dont aucune source n'a changé est gardée telle quelle, les autres
+sont vidées puis rechargées. Comme pour le cache des sources, une source
+dont seule la date a changé (copie, git checkout) est comparée sur son
+empreinte.
+
+Les chargements (to_sql) valident eux-mêmes leurs écritures : l'entrée
+d'une table est donc supprimée et validée avant son rechargement, puis
+réécrite une fois le chargement validé. Un chargement interrompu laisse
+la table sans entrée, donc à reconstruire.
+"""
+
+import os
+import sys
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/etl/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.cache_sources import empreinte_fichier
+from scripts.etl.sources_compressees import resoudre_source, source_existe
+
+DDL = """
+CREATE TABLE IF NOT EXISTS manifeste (
+    nom_table TEXT NOT NULL,
+    source TEXT NOT NULL,
+    taille INTEGER,
+    mtime REAL,
+    empreinte TEXT,
+    PRIMARY KEY (nom_table, source)
+);
+"""
+
+
+def lire_manifeste(conn):
+    """Manifeste d'une base : {table: {source: (taille, mtime, empreinte)}}."""
+    manifeste = {}
+    for nom_table, source, taille, mtime, empreinte in conn.execute(
+            "SELECT nom_table, source, taille, mtime, empreinte FROM manifeste"):
+        manifeste.setdefault(nom_table, {})[source] = (taille, mtime, empreinte)
+    return manifeste
+
+
+def signature_fichier(chemin, ancienne=None):
+    """Signature (taille, mtime, empreinte) de la source, None si elle est absente.
+
+    ancienne : signature enregistrée ; si taille et date n'ont pas changé,
+    son empreinte est reprise sans relire le fichier.
+    """
+    if not source_existe(chemin):
+        return None
+    fichier = resoudre_source(chemin)
+    st = os.stat(fichier)
+    if ancienne is not None and ancienne[:2] == (st.st_size, st.st_mtime):
+        return ancienne
+    return (st.st_size, st.st_mtime, empreinte_fichier(fichier))
+
+
+def sources_inchangees(manifestes, nom_table, sources, actuelles):
+    """Vrai si chaque base a chargé nom_table depuis ces sources, toutes inchangées.
+
+    manifestes : manifeste de chaque base (lire_manifeste). Une base sans
+    entrée pour la table (nouvelle base, chargement interrompu) la rend à
+    reconstruire. actuelles : {source: signature} complété au passage,
+    partagé entre les tables (une empreinte calculée une seule fois).
+    """
+    for manifeste in manifestes:
+        enregistrees = manifeste.get(nom_table)
+        if enregistrees is None or set(enregistrees) != set(sources):
+            return False
+        for source, ancienne in enregistrees.items():
+            if ancienne[0] is None:
+                ancienne = None  # source absente lors du chargement
+            if source not in actuelles:
+                actuelles[source] = signature_fichier(source, ancienne)
+            actuelle = actuelles[source]
+            if (actuelle is None) != (ancienne is None) or (
+                    actuelle is not None and (actuelle[0], actuelle[2]) != (ancienne[0], ancienne[2])):
+                return False  # apparue, disparue, ou contenu différent
+    return bool(manifestes)
+
+
+def invalider_manifeste(conn, nom_table):
+    """Supprime les entrées de nom_table avant son rechargement (pas de commit)."""
+    conn.execute("DELETE FROM manifeste WHERE nom_table = ?", (nom_table,))
+
+
+def enregistrer_manifeste(conn, nom_table, signatures):
+    """Remplace les entrées de nom_table : signatures = {source: signature ou None}.
+
+    À exécuter une fois le chargement de la table validé (pas de commit).
+    """
+    conn.execute("DELETE FROM manifeste WHERE nom_table = ?", (nom_table,))
+    conn.executemany("INSERT INTO manifeste VALUES (?, ?, ?, ?, ?)",
+                     [(nom_table, source) + (signature or (None, None, None))
+                      for source, signature in sorted(signatures.items())])
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Ordonnancement des étapes de l'ETL (graphe de dépendances)
+
+Chaque étape déclare ce qu'elle lit (sources, tables) et les tables
+qu'elle produit. Une étape attend les étapes déclarées avant elle qui
+produisent une table qu'elle lit, ou qui lisent une même source (parsée
+alors une seule fois, la seconde étape la reprend en mémoire : voir
+cache_sources). Les autres étapes s'exécutent en même temps, chacune
+dans un thread : la durée de l'ETL tend vers celle de l'étape la plus longue
+(le scan du fichier élections) au lieu de la somme des étapes.
+
+Lectures et transformations (pandas, pyarrow, openpyxl, scan du fichier
+élections et ses processus workers) tournent dans les threads des étapes.
+Les écritures SQLite passent toutes par un thread unique, le Redacteur,
+qui les exécute dans l'ordre de soumission : une base n'a jamais deux
+transactions concurrentes, et le scan continue de parser pendant
+l'insertion du lot précédent. Une transaction laissée ouverte par une
+étape (table elections, validée à chaque point de reprise) lui appartient :
+les écritures des autres étapes attendent qu'elle soit validée, pour
+qu'aucune ne valide à sa place des lignes d'une tranche inachevée.
+
+La sortie de chaque étape est affichée dans l'ordre des étapes, comme en
+série : la première étape non terminée écrit directement, la sortie des
+suivantes est gardée jusqu'à leur tour.
+"""
+
+import contextlib
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+TAILLE_FILE = 8  # écritures en attente dans la file du Redacteur (mémoire bornée)
+
+
+class Etape:
+    """Étape de l'ETL : fonction sans argument, ce qu'elle lit et les tables qu'elle produit."""
+
+    def __init__(self, nom, fonction, lit=(), produit=()):
+        self.nom = nom
+        self.fonction = fonction
+        self.lit = set(lit)
+        self.produit = set(produit)
+
+    def depend_de(self, autre):
+        """Vrai si l'étape doit attendre autre (déclarée avant elle)."""
+        return bool(self.lit & (autre.lit | autre.produit))
+
+
+class JournalOrdonne:
+    """Remplace sys.stdout pendant l'ordonnancement : sorties des étapes dans leur ordre.
+
+    Le thread qui écrit est rattaché à une étape (attacher) ; le texte d'une
+    étape qui n'est pas la première non terminée est gardé, puis affiché
+    quand son tour vient. Le texte des threads non rattachés passe
+    directement.
+    """
+
+    def __init__(self, console, noms):
+        self.console = console
+        self.ordre = list(noms)
+        self.tampons = {nom: [] for nom in self.ordre}
+        self.terminees = set()
+        self.rang = 0
+        self.verrou = threading.Lock()
+        self.local = threading.local()
+
+    def attacher(self, nom):
+        self.local.etape = nom
+
+    def etape_courante(self):
+        return getattr(self.local, 'etape', None)
+
+    def write(self, texte):
+        etape = self.etape_courante()
+        with self.verrou:
+            if etape is None or self.rang >= len(self.ordre) or etape == self.ordre[self.rang]:
+                return self.console.write(texte)
+            self.tampons[etape].append(texte)
+            return len(texte)
+
+    def flush(self):
+        with self.verrou:
+            self.console.flush()
+
+    def terminer(self, nom):
+        """Marque l'étape terminée ; affiche les sorties gardées des étapes suivantes."""
+        with self.verrou:
+            self.terminees.add(nom)
+            while self.rang < len(self.ordre) and self.ordre[self.rang] in self.terminees:
+                self.rang += 1
+                if self.rang < len(self.ordre):
+                    suivante = self.ordre[self.rang]
+                    self.console.write(''.join(self.tampons[suivante]))
+                    self.tampons[suivante] = []
+            self.console.flush()
+
+    def __getattr__(self, nom):
+        # encoding, isatty, fileno… : ceux de la console
+        return getattr(self.console, nom)
+
+
+def _apres_fork():
+    # Processus worker (pool du scan, classeurs INSEE) créé depuis le thread d'une
+    # étape : il écrit directement sur la console
+    if isinstance(sys.stdout, JournalOrdonne):
+        sys.stdout = sys.stdout.console
+
+
+os.register_at_fork(after_in_child=_apres_fork)
+
+
+class Redacteur:
+    """Thread unique qui exécute les écritures SQLite, dans l'ordre de soumission.
+
+    soumettre(fonction) rend un Future du résultat. La file est bornée
+    (taille_file écritures en attente) : une étape qui produit plus vite que
+    SQLite n'écrit attend. Après une erreur, les écritures suivantes ne sont
+    pas exécutées et leur Future porte l'erreur. La sortie d'une écriture
+    est rattachée à l'étape qui l'a soumise.
+
+    bases : connexions écrites (en_transaction, valider, annuler). Tant
+    qu'une écriture d'une étape laisse une transaction ouverte, les
+    écritures des autres étapes sont mises de côté, puis exécutées dans
+    leur ordre une fois la transaction validée ou annulée.
+    """
+
+    def __init__(self, bases, journal=None, taille_file=TAILLE_FILE):
+        self.bases = bases
+        self.journal = journal
+        self.file = queue.Queue(maxsize=taille_file)
+        self.differees = deque()
+        self.proprietaire = None  # étape dont une transaction est ouverte
+        self.erreur = None
+        self.thread = threading.Thread(target=self._executer, name="redacteur-sqlite",
+                                       daemon=True)
+        self.thread.start()
+
+    def soumettre(self, fonction):
+        futur = Future()
+        etape = self.journal.etape_courante() if self.journal is not None else None
+        self.file.put((fonction, futur, etape))
+        return futur
+
+    def conclure(self, valider=True):
+        """Attend les écritures déjà soumises par l'étape, puis valide (ou annule) ses
+        transactions restées ouvertes ; lève l'erreur éventuelle d'une écriture."""
+        self.soumettre(self.bases.valider if valider else self.bases.annuler).result()
+
+    def _suivant(self):
+        # Écritures mises de côté d'abord : toutes sans propriétaire, sinon les siennes
+        # (une écriture différée peut ouvrir la transaction, les suivantes de son étape
+        # sont déjà de côté)
+        for element in self.differees:
+            if self.proprietaire is None or element[2] == self.proprietaire:
+                self.differees.remove(element)
+                return element
+        return self.file.get()
+
+    def _executer(self):
+        while True:
+            element = self._suivant()
+            if element is None:
+                return
+            fonction, futur, etape = element
+            if self.erreur is not None:
+                futur.set_exception(self.erreur)
+                continue
+            if self.proprietaire is not None and etape != self.proprietaire:
+                self.differees.append(element)
+                continue
+            if self.journal is not None:
+                self.journal.attacher(etape)
+            try:
+                futur.set_result(fonction())
+            except BaseException as e:
+                self.erreur = e
+                futur.set_exception(e)
+            self.proprietaire = (etape if self.erreur is None and self.bases.en_transaction()
+                                 else None)
+
+    def arreter(self):
+        self.file.put(None)
+        self.thread.join()
+
+
+def _lancer(etape, journal, redacteur, terminees):
+    """Thread d'une étape : l'exécute, attend ses écritures, puis se signale dans terminees.
+
+    Une étape interrompue voit ses transactions ouvertes annulées, comme à
+    l'arrêt du processus en série (les lignes d'une tranche inachevée ne
+    sont pas gardées).
+    """
+    journal.attacher(etape.nom)
+    erreur = None
+    try:
+        try:
+            etape.fonction()
+        except BaseException:
+            with contextlib.suppress(Exception):
+                redacteur.conclure(valider=False)
+            raise
+        redacteur.conclure()
+    except BaseException as e:
+        erreur = e
+    finally:
+        journal.terminer(etape.nom)
+        journal.attacher(None)
+        terminees.put((etape, erreur))
+
+
+def executer_etapes(etapes, paralleles, bases):
+    """Exécute les étapes selon leurs dépendances, paralleles à la fois.
+
+    bases : connexions écrites (Bases de etl_pipeline) ; son attribut
+    redacteur reçoit le Redacteur pendant l'exécution, ses écritures
+    passent par lui.
+    Avec paralleles = 1, les étapes s'exécutent en série dans l'ordre, sans
+    thread. La première erreur d'une étape est levée une fois les étapes
+    en cours terminées (les étapes non commencées ne le sont pas). Les
+    threads sont des démons : un Ctrl-C arrête le processus comme en série,
+    les transactions non validées sont perdues.
+    """
+    if paralleles <= 1:
+        for etape in etapes:
+            etape.fonction()
+        return
+
+    console = sys.stdout
+    journal = JournalOrdonne(console, [etape.nom for etape in etapes])
+    redacteur = Redacteur(bases, journal)
+    print(f"\n  Ordonnancement : {len(etapes)} étapes sur {paralleles} threads, "
+          f"écritures SQLite sur un thread")
+    debut = time.time()
+
+    restantes = list(etapes)
+    faites = set()
+    en_cours = set()
+    terminees = queue.Queue()
+    erreur = None
+    bases.redacteur = redacteur
+    sys.stdout = journal
+    try:
+        while True:
+            if erreur is None:
+                for etape in list(restantes):
+                    if len(en_cours) >= paralleles:
+                        break
+                    precedentes = etapes[:etapes.index(etape)]
+                    if all(avant.nom in faites for avant in precedentes
+                           if etape.depend_de(avant)):
+                        restantes.remove(etape)
+                        en_cours.add(etape.nom)
+                        threading.Thread(target=_lancer, name=f"etape-{etape.nom}", daemon=True,
+                                         args=(etape, journal, redacteur, terminees)).start()
+            if not en_cours:
+                break
+            etape, erreur_etape = terminees.get()
+            en_cours.discard(etape.nom)
+            faites.add(etape.nom)
+            if erreur_etape is not None and erreur is None:
+                erreur = erreur_etape
+                print(f"\n  ⚠ Étape {etape.nom} en erreur : {erreur!r}")
+    finally:
+        for etape in restantes:
+            journal.terminer(etape.nom)  # non commencées : sorties suivantes affichées
+        sys.stdout = console
+        bases.redacteur = None
+    redacteur.arreter()
+
+    if erreur is not None:
+        raise erreur
+    print(f"\n  ✓ {len(etapes)} étapes terminées en {time.time() - debut:.1f} s")
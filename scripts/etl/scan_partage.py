@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Scan partagé de candidats_results.txt — un seul passage pour tous les consommateurs
+
+Alimente en une lecture du fichier de 2 GB :
+  - la table elections des bases SQLite (municipales, dept 34 par défaut)
+  - le cube national des voix par camp (data/output/votes_national.db)
+  - la classification Gauche/Droite (annexe des camps + statistiques)
+  - les agrégats des graphiques présidentielles et revenus vs votes
+  - les compteurs de l'exploration du fichier candidats
+  - l'index des blocs (élection, département) du fichier (s'il n'est plus à jour)
+
+Avec --sans-bases, seules la classification, l'exploration et les
+graphiques sont produits (table elections, cube et index inchangés) :
+c'est le scan de python main.py all.
+
+Usage :
+    python scripts/etl/scan_partage.py
+    python scripts/etl/scan_partage.py --departements 34,30
+    python scripts/etl/scan_partage.py --sans-bases
+    python main.py scan
+"""
+
+import argparse
+import os
+import sys
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/etl/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.elections_scan import ScanElections, ELECTIONS_FILE
+from scripts.etl.sources_compressees import est_compresse, source_existe
+from scripts.etl.cube_votes import CubeVotes, enregistrer_cube
+from scripts.etl.index_elections import IndexElections, index_disponible
+from scripts.etl import etl_pipeline
+from scripts.etl.etl_pipeline import (
+    Bases, EcritureElections, ExtraitMunicipal, lire_departements, print_section)
+from scripts.classification.classify_candidats_v2 import (
+    OUTPUT_FILE, ConsommateurClassification, table_camps)
+from scripts.exploration.explore_candidats import ProfilCandidats, rapport
+from scripts.visualisation import visualize_presidentielles, visualize_revenus_vs_votes
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scan unique de candidats_results.txt")
+    parser.add_argument("--fichier-complet", action="store_true",
+                        help="écrire aussi la copie complète candidats_classified.txt "
+                             "(colonne Camp)")
+    parser.add_argument("--sans-graphiques", action="store_true",
+                        help="calculer les agrégats sans générer les graphiques")
+    parser.add_argument("--departements", type=lire_departements,
+                        default={etl_pipeline.DEPT}, metavar="LISTE",
+                        help="départements de la table elections, séparés par des "
+                             "virgules, ou 'all'")
+    parser.add_argument("--sans-bases", action="store_true",
+                        help="ne pas écrire la table elections, le cube national ni l'index "
+                             "(classification, exploration et graphiques seulement)")
+    return parser.parse_args(argv)
+
+
+def ouvrir_ecriture_elections(departements):
+    """Écriture en flux de la table elections, vidée dans la même transaction.
+
+    Les autres tables des bases existantes sont conservées ; rien n'est
+    validé avant la fin du scan (valider dans charger_table_elections).
+    """
+    bases = Bases(departements, reinitialiser=False,
+                  preparation=lambda conn: conn.execute("DELETE FROM elections"))
+    return EcritureElections(bases)
+
+
+def charger_table_elections(ecriture, total_lu):
+    """Valide la table elections de chaque base, remplie pendant le scan."""
+    print_section(f"elections (municipales, {etl_pipeline.libelle_departements()})")
+    ecriture.valider()
+    print(f"  Lignes lues : {total_lu:,}")
+    print(f"  Lignes conservées : {ecriture.inserees:,} ({ecriture.debit():,.0f} lignes/s)")
+    ecriture.bases.print_count('elections')
+    ecriture.bases.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    etl_pipeline.DEPARTEMENTS = args.departements
+
+    print("=" * 70)
+    print("SCAN PARTAGÉ - candidats_results.txt")
+    print("=" * 70)
+
+    if not source_existe(ELECTIONS_FILE):
+        print(f"  ⚠ Fichier manquant : {ELECTIONS_FILE}")
+        return
+
+    # Le camp ne dépend que de (élection, nuance, liste, nom) : table des clés
+    # distinctes partagée par les consommateurs qui en ont besoin (persistée)
+    classifier = table_camps()
+
+    classification = ConsommateurClassification(
+        OUTPUT_FILE if args.fichier_complet else None, classifier, source=ELECTIONS_FILE)
+    presidentielles = visualize_presidentielles.AgregatPresidentielles(classifier)
+    votes_dept = visualize_revenus_vs_votes.AgregatVotesDept('_pres_t1', classifier,
+                                                              par_election=True)
+    profil = ProfilCandidats()
+
+    scan = ScanElections(ELECTIONS_FILE)
+    for consommateur in (classification, presidentielles, votes_dept, profil):
+        scan.ajouter(consommateur)
+    if not args.sans_bases:
+        ecriture = ouvrir_ecriture_elections(args.departements)
+        cube = CubeVotes(classifier)
+        scan.ajouter(ExtraitMunicipal(sortie=ecriture.ajouter)).ajouter(cube)
+        if not est_compresse(scan.chemin) and not index_disponible():
+            scan.ajouter(IndexElections())
+
+    print(f"\nLecture unique de {ELECTIONS_FILE} ({len(scan.consommateurs)} consommateurs)...")
+    scan.executer()
+
+    if not args.sans_bases:
+        charger_table_elections(ecriture, scan.total_lignes)
+        enregistrer_cube(cube.voix)
+    classification.resume()
+    rapport(profil)
+
+    if not args.sans_graphiques:
+        visualize_presidentielles.generer_graphiques(*presidentielles.resultats())
+        dept_revenus = visualize_revenus_vs_votes.load_revenus_by_dept()
+        pct_par_election = votes_dept.pct_par_groupe()
+        visualize_revenus_vs_votes.generer_graphiques(
+            dept_revenus, pct_par_election.pop('_pres_t1'), pct_par_election)
+
+
+if __name__ == "__main__":
+    main()
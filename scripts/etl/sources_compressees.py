@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Lecture transparente des sources compressées (.gz, .zst, .xz)
+
+Les gros fichiers (candidats_results.txt, comptes_communes_*.csv) peuvent
+être stockés compressés : data/input/elections/candidats_results.txt.zst
+est trouvé quand candidats_results.txt est absent.
+
+La décompression tourne dans un thread séparé qui remplit une file de
+blocs d'avance : zlib, lzma et zstandard relâchent le GIL, le parsing
+csv du thread principal n'attend donc pas le décompresseur.
+
+Un flux décompressé ne se relit pas à partir d'un offset : seek n'est
+possible qu'en avant (lecture des octets intermédiaires).
+"""
+
+import glob
+import gzip
+import io
+import lzma
+import os
+import queue
+import threading
+
+# Extensions reconnues, par ordre de préférence quand plusieurs existent
+EXTENSIONS = ('.zst', '.gz', '.xz')
+
+TAILLE_BLOC = 1024 * 1024  # octets décompressés par bloc
+BLOCS_AVANCE = 16          # blocs d'avance dans la file (mémoire bornée)
+
+
+def est_compresse(chemin):
+    """Vrai si le chemin désigne un fichier compressé (d'après l'extension)."""
+    return chemin.endswith(EXTENSIONS)
+
+
+def resoudre_source(chemin):
+    """Chemin réel d'une source : le fichier lui-même, sinon sa version compressée.
+
+    Retourne le chemin demandé s'il n'existe sous aucune forme (le message
+    « Fichier manquant » des appelants reste le même).
+    """
+    if os.path.exists(chemin) or est_compresse(chemin):
+        return chemin
+    for ext in EXTENSIONS:
+        if os.path.exists(chemin + ext):
+            return chemin + ext
+    return chemin
+
+
+def source_existe(chemin):
+    """Vrai si la source existe, compressée ou non."""
+    return os.path.exists(resoudre_source(chemin))
+
+
+def signature_source(chemin):
+    """Identité d'une source (chemin réel, taille, date) : un résultat dérivé n'est
+    valable que si elle n'a pas changé depuis."""
+    chemin = resoudre_source(chemin)
+    st = os.stat(chemin)
+    return {'fichier': chemin, 'taille': st.st_size, 'mtime': st.st_mtime}
+
+
+def lister_sources(motif):
+    """Fichiers correspondant au motif glob, compressés ou non (un seul par fichier).
+
+    Ex. : 'comptes_communes_*.csv' trouve aussi comptes_communes_2020.csv.gz ;
+    si les deux formes existent, le fichier non compressé est gardé.
+    """
+    chemins = {}
+    for chemin in glob.glob(motif):
+        chemins[chemin] = chemin
+    for ext in EXTENSIONS:
+        for chemin in glob.glob(motif + ext):
+            chemins.setdefault(chemin[:-len(ext)], chemin)
+    return [chemins[nom] for nom in sorted(chemins)]
+
+
+def _ouvrir_decompresseur(chemin):
+    """Flux binaire décompressé (lecture séquentielle) selon l'extension."""
+    if chemin.endswith('.gz'):
+        return gzip.open(chemin, 'rb')
+    if chemin.endswith('.xz'):
+        return lzma.open(chemin, 'rb')
+    if chemin.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(f"Lecture de {chemin} : installer zstandard "
+                              "(pip install zstandard)") from None
+        return zstandard.ZstdDecompressor().stream_reader(open(chemin, 'rb'),
+                                                          closefd=True)
+    raise ValueError(f"Extension de compression inconnue : {chemin}")
+
+
+class _FluxDecompresse(io.RawIOBase):
+    """Flux brut alimenté par un thread de décompression (file de blocs bornée)."""
+
+    def __init__(self, chemin, taille_bloc=TAILLE_BLOC, blocs_avance=BLOCS_AVANCE):
+        super().__init__()
+        self._source = _ouvrir_decompresseur(chemin)
+        self._file = queue.Queue(maxsize=blocs_avance)
+        self._taille_bloc = taille_bloc
+        self._bloc = memoryview(b'')
+        self._termine = False
+        self._arret = threading.Event()
+        self._position = 0
+        self._thread = threading.Thread(target=self._decompresser, daemon=True)
+        self._thread.start()
+
+    def _decompresser(self):
+        try:
+            while not self._arret.is_set():
+                bloc = self._source.read(self._taille_bloc)
+                if not bloc:
+                    break
+                self._deposer(bloc)
+        except Exception as e:
+            self._deposer(e)
+        self._deposer(None)
+
+    def _deposer(self, element):
+        # Attente interruptible : close() peut arrêter un producteur bloqué
+        while not self._arret.is_set():
+            try:
+                self._file.put(element, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self):
+        return True
+
+    def readinto(self, tampon):
+        if not self._bloc:
+            if self._termine:
+                return 0
+            element = self._file.get()
+            if element is None:
+                self._termine = True
+                return 0
+            if isinstance(element, Exception):
+                self._termine = True
+                raise element
+            self._bloc = memoryview(element)
+        n = min(len(tampon), len(self._bloc))
+        tampon[:n] = self._bloc[:n]
+        self._bloc = self._bloc[n:]
+        self._position += n
+        return n
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._arret.set()
+            self._thread.join()
+            self._source.close()
+        super().close()
+
+
+class _LecteurAvant(io.BufferedReader):
+    """BufferedReader d'un flux décompressé : tell() exact, seek() en avant seulement."""
+
+    def __init__(self, brut, buffer_size=TAILLE_BLOC):
+        super().__init__(brut, buffer_size)
+        self._position = 0
+
+    def read(self, size=-1):
+        donnees = super().read(size)
+        self._position += len(donnees)
+        return donnees
+
+    def read1(self, size=-1):
+        donnees = super().read1(size)
+        self._position += len(donnees)
+        return donnees
+
+    def readline(self, size=-1):
+        ligne = super().readline(size)
+        self._position += len(ligne)
+        return ligne
+
+    def __next__(self):
+        ligne = self.readline()
+        if not ligne:
+            raise StopIteration
+        return ligne
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence != io.SEEK_SET or offset < self._position:
+            raise io.UnsupportedOperation("flux décompressé : seek en avant uniquement")
+        while self._position < offset:
+            if not self.read(min(offset - self._position, TAILLE_BLOC)):
+                break
+        return self._position
+
+
+def ouvrir_source(chemin):
+    """Ouvre une source en binaire : fichier normal, ou flux décompressé dans un thread."""
+    chemin = resoudre_source(chemin)
+    if not est_compresse(chemin):
+        return open(chemin, 'rb')
+    return _LecteurAvant(_FluxDecompresse(chemin))
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Esquisses (sketches) fusionnables pour profiler un fichier en mémoire bornée
+
+- HyperLogLog : nombre de valeurs distinctes (erreur relative ≈ 1.04/√2^p)
+- CountMin + candidats : valeurs les plus fréquentes (top-k), comptes estimés
+  par excès d'au plus 2·n/largeur avec une forte probabilité
+- KLL : quantiles d'une colonne numérique sur le fichier entier
+- CompteurBorne : Counter exact jusqu'à un seuil de valeurs distinctes,
+  puis esquisse (HyperLogLog + CountMin)
+
+Chaque esquisse occupe une mémoire fixe quel que soit le nombre de lignes
+et se fusionne avec une esquisse de même paramétrage (plages du fichier
+traitées en parallèle). Sans dépendances externes.
+"""
+
+import hashlib
+import math
+import random
+from collections import Counter
+
+def empreinte_64(valeur):
+    """Hachage 64 bits stable d'une chaîne (identique d'un processus à l'autre, contrairement à hash())."""
+    return int.from_bytes(hashlib.blake2b(valeur.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class HyperLogLog:
+    """Estimation du nombre de valeurs distinctes sur 2^p registres d'un octet."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registres = bytearray(self.m)
+
+    def ajouter_empreinte(self, h):
+        reste = h & ((1 << (64 - self.p)) - 1)
+        rang = 64 - self.p - reste.bit_length() + 1
+        i = h >> (64 - self.p)
+        if rang > self.registres[i]:
+            self.registres[i] = rang
+
+    def ajouter(self, valeur):
+        self.ajouter_empreinte(empreinte_64(valeur))
+
+    def fusionner(self, autre):
+        if autre.p != self.p:
+            raise ValueError("HyperLogLog de précisions différentes")
+        self.registres = bytearray(map(max, self.registres, autre.registres))
+
+    def estimation(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        brute = alpha * m * m / sum(2.0 ** -r for r in self.registres)
+        vides = self.registres.count(0)
+        if brute <= 2.5 * m and vides:
+            return round(m * math.log(m / vides))  # comptage linéaire (petites cardinalités)
+        return round(brute)
+
+    def __len__(self):
+        return self.estimation()
+
+
+class CountMin:
+    """Comptes approchés (par excès) sur profondeur × largeur compteurs."""
+
+    def __init__(self, largeur=1 << 14, profondeur=4):
+        self.largeur = largeur
+        self.profondeur = profondeur
+        self.tables = [[0] * largeur for _ in range(profondeur)]
+
+    def _indices(self, h):
+        # Double hachage : h1 + i·h2 sur les deux moitiés de l'empreinte 64 bits
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.largeur for i in range(self.profondeur)]
+
+    def ajouter_empreinte(self, h, n=1):
+        estimation = None
+        for table, j in zip(self.tables, self._indices(h)):
+            table[j] += n
+            if estimation is None or table[j] < estimation:
+                estimation = table[j]
+        return estimation
+
+    def estimer_empreinte(self, h):
+        return min(table[j] for table, j in zip(self.tables, self._indices(h)))
+
+    def fusionner(self, autre):
+        if (autre.largeur, autre.profondeur) != (self.largeur, self.profondeur):
+            raise ValueError("CountMin de dimensions différentes")
+        self.tables = [[a + b for a, b in zip(t, u)] for t, u in zip(self.tables, autre.tables)]
+
+
+class EsquisseColonne:
+    """Profil d'une colonne texte : distincts (HyperLogLog) et top-k (CountMin).
+
+    S'utilise comme le Counter qu'il remplace dans les rapports :
+    len(esquisse) et esquisse.most_common(n). Les candidats au top sont
+    bornés à 2 × capacite, élagués à capacite selon leur compte estimé.
+    """
+
+    def __init__(self, capacite=1000, p=14, largeur=1 << 14, profondeur=4):
+        self.capacite = capacite
+        self.hll = HyperLogLog(p)
+        self.cms = CountMin(largeur, profondeur)
+        self.candidats = {}  # valeur → (empreinte, compte estimé)
+
+    def ajouter(self, valeur, n=1):
+        h = empreinte_64(valeur)
+        self.hll.ajouter_empreinte(h)
+        # Compte estimé sur tout le flux : une valeur élaguée puis revue garde son rang
+        self.candidats[valeur] = (h, self.cms.ajouter_empreinte(h, n))
+        if len(self.candidats) > 2 * self.capacite:
+            self._elaguer()
+
+    def _elaguer(self):
+        gardes = sorted(self.candidats.items(), key=lambda kv: -kv[1][1])[:self.capacite]
+        self.candidats = dict(gardes)
+
+    def fusionner(self, autre):
+        self.hll.fusionner(autre.hll)
+        self.cms.fusionner(autre.cms)
+        # Comptes des candidats des deux côtés réestimés sur l'esquisse fusionnée
+        for valeur, (h, _) in list(autre.candidats.items()) + list(self.candidats.items()):
+            self.candidats[valeur] = (h, self.cms.estimer_empreinte(h))
+        if len(self.candidats) > 2 * self.capacite:
+            self._elaguer()
+
+    def most_common(self, n=None):
+        tries = sorted(((v, c) for v, (_, c) in self.candidats.items()), key=lambda vc: -vc[1])
+        return tries if n is None else tries[:n]
+
+    def __len__(self):
+        return self.hll.estimation()
+
+
+class CompteurBorne:
+    """Counter exact tant que la colonne a peu de valeurs distinctes, esquisse au-delà.
+
+    La plupart des colonnes (codes, années, libellés courts) restent sous le
+    seuil et gardent des comptes exacts ; les autres basculent sur une
+    EsquisseColonne, en mémoire fixe. exact indique si les comptes sont exacts.
+    """
+
+    def __init__(self, seuil=10_000, **parametres):
+        self.seuil = seuil
+        self.parametres = parametres
+        self.compteur = Counter()
+        self.esquisse = None
+
+    @property
+    def exact(self):
+        return self.esquisse is None
+
+    def ajouter(self, valeur):
+        if self.esquisse is not None:
+            self.esquisse.ajouter(valeur)
+            return
+        self.compteur[valeur] += 1
+        if len(self.compteur) > self.seuil:
+            self._basculer()
+
+    def _basculer(self):
+        self.esquisse = EsquisseColonne(**self.parametres)
+        for valeur, n in self.compteur.items():
+            self.esquisse.ajouter(valeur, n)
+        self.compteur = Counter()
+
+    def fusionner(self, autre):
+        if self.esquisse is None and autre.esquisse is None:
+            self.compteur.update(autre.compteur)
+            if len(self.compteur) > self.seuil:
+                self._basculer()
+            return
+        if self.esquisse is None:
+            self._basculer()
+        if autre.esquisse is None:
+            for valeur, n in autre.compteur.items():
+                self.esquisse.ajouter(valeur, n)
+        else:
+            self.esquisse.fusionner(autre.esquisse)
+
+    def most_common(self, n=None):
+        return (self.compteur if self.esquisse is None else self.esquisse).most_common(n)
+
+    def __len__(self):
+        return len(self.compteur) if self.esquisse is None else len(self.esquisse)
+
+
+class KLL:
+    """Esquisse de quantiles KLL (Karnin, Lang, Liberty) : ≈ k/(1-c) valeurs conservées
+    (~600 avec k=200).
+
+    Les niveaux h pèsent 2^h ; un niveau plein est trié puis compacté
+    (une valeur sur deux, décalage aléatoire) vers le niveau supérieur.
+    """
+
+    def __init__(self, k=200, c=2 / 3, graine=0):
+        self.k = k
+        self.c = c
+        self.alea = random.Random(graine)
+        self.niveaux = [[]]
+        self.taille = 0
+        self.taille_max = self._capacite(0)
+
+    def _capacite(self, h):
+        hauteur = len(self.niveaux)
+        return int(math.ceil(self.k * self.c ** (hauteur - h - 1))) + 1
+
+    def ajouter(self, x):
+        self.niveaux[0].append(x)
+        self.taille += 1
+        if self.taille >= self.taille_max:
+            self._compacter()
+
+    def _compacter(self):
+        for h, niveau in enumerate(self.niveaux):
+            if len(niveau) >= self._capacite(h):
+                if h + 1 >= len(self.niveaux):
+                    self.niveaux.append([])
+                niveau.sort()
+                # Nombre pair de valeurs compactées, l'éventuelle dernière reste au niveau
+                pair = len(niveau) - len(niveau) % 2
+                self.niveaux[h + 1].extend(niveau[self.alea.randint(0, 1):pair:2])
+                del niveau[:pair]
+                break
+        self.taille = sum(len(niveau) for niveau in self.niveaux)
+        self.taille_max = sum(self._capacite(h) for h in range(len(self.niveaux)))
+
+    def fusionner(self, autre):
+        while len(self.niveaux) < len(autre.niveaux):
+            self.niveaux.append([])
+        for niveau, sien in zip(self.niveaux, autre.niveaux):
+            niveau.extend(sien)
+        self.taille = sum(len(niveau) for niveau in self.niveaux)
+        self.taille_max = sum(self._capacite(h) for h in range(len(self.niveaux)))
+        while self.taille >= self.taille_max:
+            self._compacter()
+
+    def quantile(self, q):
+        """Valeur de rang ≈ q·n (q entre 0 et 1)."""
+        pondere = sorted((x, 1 << h) for h, niveau in enumerate(self.niveaux) for x in niveau)
+        if not pondere:
+            return None
+        cible = q * sum(poids for _, poids in pondere)
+        cumul = 0
+        for x, poids in pondere:
+            cumul += poids
+            if cumul > cible:
+                return x
+        return pondere[-1][0]
+
+
+class ResumeNumerique:
+    """Compte, total, min, max exacts et quantiles KLL d'une colonne numérique."""
+
+    def __init__(self, k=200, graine=0):
+        self.n = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.kll = KLL(k, graine=graine)
+
+    def ajouter(self, x):
+        self.n += 1
+        self.total += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        self.kll.ajouter(x)
+
+    def fusionner(self, autre):
+        self.n += autre.n
+        self.total += autre.total
+        self.min = min(self.min, autre.min)
+        self.max = max(self.max, autre.max)
+        self.kll.fusionner(autre.kll)
+
+    def quantile(self, q):
+        return self.kll.quantile(q)
+
+    def __len__(self):
+        return self.n
@@ -3,18 +3,197 @@
 Script d'exploration du fichier candidats_results.txt
 Analyse ligne par ligne pour gérer les fichiers volumineux (2.1GB)
 Sans dépendances externes (pas de pandas)
+
+Option --esquisses : profil en mémoire bornée sur le fichier entier
+(HyperLogLog, CountMin, KLL), parallélisable par plages avec --workers.
 """
 
-import csv
-from collections import Counter, defaultdict
+import argparse
+import os
+from collections import Counter
 import sys
 
+# Racine du dépôt dans le path (script lancé directement : python scripts/exploration/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.elections_scan import ScanElections
+from scripts.exploration.esquisses import EsquisseColonne, ResumeNumerique
+
 # Configuration
 FILE_PATH = "../data/input/elections/candidats_results.txt"
 OUTPUT_FILE = "outputs/exploration_candidats_output.txt"
 SEPARATOR = ";"
 
-def main():
+class ProfilCandidats:
+    """Consommateur du scan partagé : compteurs d'exploration du fichier candidats."""
+
+    def __init__(self):
+        # Compteurs globaux
+        self.total_rows = 0
+        self.elections_counter = Counter()
+        self.departements_counter = Counter()
+        self.communes_counter = Counter()
+        self.listes_counter = Counter()
+        self.nuances_counter = Counter()
+        self.tetes_liste_counter = Counter()
+        self.panneau_counter = Counter()
+        self.sexe_counter = Counter()
+
+        # Stats numériques
+        self.voix_values = []
+        self.pct_ins_values = []
+        self.pct_exp_values = []
+
+        # Échantillons
+        self.sample_rows = []
+        self.headers = []
+
+        # Index des colonnes (sera défini après lecture de l'en-tête)
+        self.col_idx = {}
+
+    def debut(self, headers):
+        self.headers = headers
+        self.col_idx = {h: i for i, h in enumerate(headers)}
+
+        # Colonnes comptées : (colonne, compteur)
+        self.comptages = [
+            (self.col_idx[col], counter) for col, counter in [
+                ('id_election', self.elections_counter),
+                ('Code du département', self.departements_counter),
+                ('Code de la commune', self.communes_counter),
+                ('Libellé Abrégé Liste', self.listes_counter),
+                ('Nuance', self.nuances_counter),
+                ('Nom Tête de Liste', self.tetes_liste_counter),
+                ('N°Panneau', self.panneau_counter),
+                ('Sexe', self.sexe_counter),
+            ] if col in self.col_idx
+        ]
+        self.numeriques = [
+            (self.col_idx[col], values) for col, values in [
+                ('Voix', self.voix_values),
+                ('% Voix/Ins', self.pct_ins_values),
+                ('% Voix/Exp', self.pct_exp_values),
+            ] if col in self.col_idx
+        ]
+
+    def traiter(self, row):
+        self.total_rows += 1
+
+        # Garder les 5 premières lignes comme échantillon
+        if self.total_rows <= 5:
+            self.sample_rows.append(dict(zip(self.headers, row)))
+
+        # Vérifier que la ligne a assez de colonnes
+        if len(row) < len(self.headers):
+            return
+
+        # Comptages
+        for idx, counter in self.comptages:
+            val = row[idx].strip()
+            if val:
+                counter[val] += 1
+
+        # Valeurs numériques (échantillonner pour stats)
+        if self.total_rows <= 1_000_000:  # Limiter pour mémoire
+            for idx, values in self.numeriques:
+                try:
+                    values.append(float(row[idx].strip()))
+                except:
+                    pass
+
+    def fin(self):
+        pass
+
+
+class ProfilCandidatsEsquisses(ProfilCandidats):
+    """Profil en mémoire bornée : esquisses fusionnables au lieu des compteurs exacts.
+
+    Les colonnes à forte cardinalité (communes, listes, têtes de liste)
+    passent par EsquisseColonne (distincts et top estimés), les autres
+    restent des Counter exacts. Les statistiques numériques portent sur
+    toutes les lignes (ResumeNumerique : quantiles KLL). Picklable et
+    fusionnable (mode parallèle).
+    """
+
+    esquisses = True
+
+    def __init__(self):
+        super().__init__()
+        self.communes_counter = EsquisseColonne()
+        self.listes_counter = EsquisseColonne()
+        self.tetes_liste_counter = EsquisseColonne()
+        self.voix_values = ResumeNumerique()
+        self.pct_ins_values = ResumeNumerique()
+        self.pct_exp_values = ResumeNumerique()
+
+    def plage(self, debut):
+        # Copie d'un worker : compactions KLL tirées d'une graine propre à la plage
+        self.voix_values = ResumeNumerique(graine=debut)
+        self.pct_ins_values = ResumeNumerique(graine=debut)
+        self.pct_exp_values = ResumeNumerique(graine=debut)
+
+    def debut(self, headers):
+        super().debut(headers)
+        # Méthodes d'ajout résolues une fois : Counter exact ou esquisse
+        self.comptages = [(idx, self._ajout(counter)) for idx, counter in self.comptages]
+
+    @staticmethod
+    def _ajout(counter):
+        if isinstance(counter, Counter):
+            def ajouter(valeur):
+                counter[valeur] += 1
+            return ajouter
+        return counter.ajouter
+
+    def traiter(self, row):
+        self.total_rows += 1
+
+        if self.total_rows <= 5:
+            self.sample_rows.append(dict(zip(self.headers, row)))
+
+        if len(row) < len(self.headers):
+            return
+
+        for idx, ajouter in self.comptages:
+            val = row[idx].strip()
+            if val:
+                ajouter(val)
+
+        # Toutes les lignes : les quantiles ne dépendent pas du début du fichier
+        for idx, values in self.numeriques:
+            try:
+                values.ajouter(float(row[idx].strip()))
+            except ValueError:
+                pass
+
+    def __getstate__(self):
+        # Fonctions locales de debut non picklables : reconstruites par debut dans le worker
+        etat = self.__dict__.copy()
+        etat.pop('comptages', None)
+        return etat
+
+    def fusionner(self, autre):
+        """Ajoute le profil d'une plage traitée par un worker (plages dans l'ordre du fichier)."""
+        self.total_rows += autre.total_rows
+        self.sample_rows.extend(autre.sample_rows[:5 - len(self.sample_rows)])
+        for nom, valeur in vars(self).items():
+            if isinstance(valeur, Counter):
+                valeur.update(getattr(autre, nom))
+            elif isinstance(valeur, (EsquisseColonne, ResumeNumerique)):
+                valeur.fusionner(getattr(autre, nom))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Exploration du fichier candidats_results.txt")
+    parser.add_argument("--esquisses", action="store_true",
+                        help="profil en mémoire bornée sur tout le fichier "
+                             "(distincts, top et quantiles estimés)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processus de lecture avec --esquisses (plages du fichier en parallèle)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     output_lines = []
 
     def log(msg):
@@ -25,120 +204,14 @@ def main():
     log("ANALYSE EXPLORATOIRE - candidats_results.txt")
     log("=" * 80)
 
-    # Compteurs globaux
-    total_rows = 0
-    elections_counter = Counter()
-    departements_counter = Counter()
-    communes_counter = Counter()
-    listes_counter = Counter()
-    nuances_counter = Counter()
-    tetes_liste_counter = Counter()
-    panneau_counter = Counter()
-    sexe_counter = Counter()
-
-    # Stats numériques
-    voix_values = []
-    pct_ins_values = []
-    pct_exp_values = []
-
-    # Échantillons
-    sample_rows = []
-    headers = []
-
-    # Index des colonnes (sera défini après lecture de l'en-tête)
-    col_idx = {}
-
     log("\n[1] Lecture du fichier ligne par ligne...")
 
+    profil = ProfilCandidatsEsquisses() if args.esquisses else ProfilCandidats()
+    workers = args.workers if args.esquisses else 1
     try:
-        with open(FILE_PATH, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f, delimiter=SEPARATOR)
-
-            # Lire l'en-tête
-            headers = next(reader)
-            for i, h in enumerate(headers):
-                col_idx[h] = i
-
-            log(f"  En-tête détecté avec {len(headers)} colonnes")
-
-            for row in reader:
-                total_rows += 1
-
-                if total_rows % 1_000_000 == 0:
-                    print(f"  {total_rows:,} lignes traitées...")
-
-                # Garder les 5 premières lignes comme échantillon
-                if total_rows <= 5:
-                    sample_rows.append(dict(zip(headers, row)))
-
-                # Vérifier que la ligne a assez de colonnes
-                if len(row) < len(headers):
-                    continue
-
-                # Comptages
-                if 'id_election' in col_idx:
-                    val = row[col_idx['id_election']].strip()
-                    if val:
-                        elections_counter[val] += 1
-
-                if 'Code du département' in col_idx:
-                    val = row[col_idx['Code du département']].strip()
-                    if val:
-                        departements_counter[val] += 1
-
-                if 'Code de la commune' in col_idx:
-                    val = row[col_idx['Code de la commune']].strip()
-                    if val:
-                        communes_counter[val] += 1
-
-                if 'Libellé Abrégé Liste' in col_idx:
-                    val = row[col_idx['Libellé Abrégé Liste']].strip()
-                    if val:
-                        listes_counter[val] += 1
-
-                if 'Nuance' in col_idx:
-                    val = row[col_idx['Nuance']].strip()
-                    if val:
-                        nuances_counter[val] += 1
-
-                if 'Nom Tête de Liste' in col_idx:
-                    val = row[col_idx['Nom Tête de Liste']].strip()
-                    if val:
-                        tetes_liste_counter[val] += 1
-
-                if 'N°Panneau' in col_idx:
-                    val = row[col_idx['N°Panneau']].strip()
-                    if val:
-                        panneau_counter[val] += 1
-
-                if 'Sexe' in col_idx:
-                    val = row[col_idx['Sexe']].strip()
-                    if val:
-                        sexe_counter[val] += 1
-
-                # Valeurs numériques (échantillonner pour stats)
-                if total_rows <= 1_000_000:  # Limiter pour mémoire
-                    if 'Voix' in col_idx:
-                        try:
-                            val = float(row[col_idx['Voix']].strip())
-                            voix_values.append(val)
-                        except:
-                            pass
-
-                    if '% Voix/Ins' in col_idx:
-                        try:
-                            val = float(row[col_idx['% Voix/Ins']].strip())
-                            pct_ins_values.append(val)
-                        except:
-                            pass
-
-                    if '% Voix/Exp' in col_idx:
-                        try:
-                            val = float(row[col_idx['% Voix/Exp']].strip())
-                            pct_exp_values.append(val)
-                        except:
-                            pass
-
+        scan = ScanElections(FILE_PATH, SEPARATOR, progression=1_000_000).ajouter(profil)
+        scan.executer(workers=workers)
+        log(f"  En-tête détecté avec {len(profil.headers)} colonnes")
         log(f"\n  => Lecture terminée!")
 
     except Exception as e:
@@ -147,11 +220,51 @@ def main():
         traceback.print_exc()
         sys.exit(1)
 
+    rapport(profil, output_lines)
+
+
+def _resume_numerique(values):
+    """(n, total, min, max, quantile) d'une liste de valeurs ou d'un ResumeNumerique."""
+    if isinstance(values, ResumeNumerique):
+        return values.n, values.total, values.min, values.max, values.quantile
+    values.sort()
+    return (len(values), sum(values), values[0], values[-1],
+            lambda q: values[int(len(values) * q)])
+
+
+def rapport(profil, output_lines=None):
+    """Écrit le rapport d'exploration à partir d'un profil rempli par le scan."""
+    if output_lines is None:
+        output_lines = []
+
+    def log(msg):
+        print(msg)
+        output_lines.append(msg)
+
+    total_rows = profil.total_rows
+    headers = profil.headers
+    elections_counter = profil.elections_counter
+    departements_counter = profil.departements_counter
+    communes_counter = profil.communes_counter
+    listes_counter = profil.listes_counter
+    nuances_counter = profil.nuances_counter
+    tetes_liste_counter = profil.tetes_liste_counter
+    panneau_counter = profil.panneau_counter
+    sexe_counter = profil.sexe_counter
+    voix_values = profil.voix_values
+    pct_ins_values = profil.pct_ins_values
+    pct_exp_values = profil.pct_exp_values
+    sample_rows = profil.sample_rows
+    esquisses = getattr(profil, 'esquisses', False)
+
     # Affichage des résultats
     log("\n" + "=" * 80)
     log("[2] STATISTIQUES GÉNÉRALES")
     log("=" * 80)
     log(f"  Nombre total de lignes (hors en-tête): {total_rows:,}")
+    if esquisses:
+        log("  (Communes, listes, têtes de liste : distincts et top estimés ; "
+            "percentiles estimés sur le fichier entier)")
 
     log("\n" + "-" * 40)
     log("[3] COLONNES")
@@ -234,22 +347,18 @@ def main():
     log("[12] STATISTIQUES SUR LES VOIX")
     log("-" * 40)
     if voix_values:
-        voix_values.sort()
-        log(f"  Basé sur {len(voix_values):,} entrées (échantillon)")
-        log(f"  Total: {sum(voix_values):,.0f}")
-        log(f"  Moyenne: {sum(voix_values)/len(voix_values):,.2f}")
-        log(f"  Min: {voix_values[0]:,.0f}")
-        log(f"  Max: {voix_values[-1]:,.0f}")
-        log(f"  Médiane: {voix_values[len(voix_values)//2]:,.0f}")
+        n, total, vmin, vmax, quantile = _resume_numerique(voix_values)
+        log(f"  Basé sur {n:,} entrées ({'fichier entier' if esquisses else 'échantillon'})")
+        log(f"  Total: {total:,.0f}")
+        log(f"  Moyenne: {total/n:,.2f}")
+        log(f"  Min: {vmin:,.0f}")
+        log(f"  Max: {vmax:,.0f}")
+        log(f"  Médiane: {quantile(0.5):,.0f}")
         # Percentiles
-        p25 = voix_values[int(len(voix_values)*0.25)]
-        p75 = voix_values[int(len(voix_values)*0.75)]
-        p90 = voix_values[int(len(voix_values)*0.90)]
-        p99 = voix_values[int(len(voix_values)*0.99)]
-        log(f"  25e percentile: {p25:,.0f}")
-        log(f"  75e percentile: {p75:,.0f}")
-        log(f"  90e percentile: {p90:,.0f}")
-        log(f"  99e percentile: {p99:,.0f}")
+        log(f"  25e percentile: {quantile(0.25):,.0f}")
+        log(f"  75e percentile: {quantile(0.75):,.0f}")
+        log(f"  90e percentile: {quantile(0.90):,.0f}")
+        log(f"  99e percentile: {quantile(0.99):,.0f}")
     else:
         log("  (Pas de données)")
 
@@ -257,12 +366,12 @@ def main():
     log("[13] STATISTIQUES SUR % Voix/Inscrits")
     log("-" * 40)
     if pct_ins_values:
-        pct_ins_values.sort()
-        log(f"  Basé sur {len(pct_ins_values):,} entrées")
-        log(f"  Moyenne: {sum(pct_ins_values)/len(pct_ins_values):.2f}%")
-        log(f"  Min: {pct_ins_values[0]:.2f}%")
-        log(f"  Max: {pct_ins_values[-1]:.2f}%")
-        log(f"  Médiane: {pct_ins_values[len(pct_ins_values)//2]:.2f}%")
+        n, total, vmin, vmax, quantile = _resume_numerique(pct_ins_values)
+        log(f"  Basé sur {n:,} entrées")
+        log(f"  Moyenne: {total/n:.2f}%")
+        log(f"  Min: {vmin:.2f}%")
+        log(f"  Max: {vmax:.2f}%")
+        log(f"  Médiane: {quantile(0.5):.2f}%")
     else:
         log("  (Pas de données)")
 
@@ -270,12 +379,12 @@ def main():
     log("[14] STATISTIQUES SUR % Voix/Exprimés")
     log("-" * 40)
     if pct_exp_values:
-        pct_exp_values.sort()
-        log(f"  Basé sur {len(pct_exp_values):,} entrées")
-        log(f"  Moyenne: {sum(pct_exp_values)/len(pct_exp_values):.2f}%")
-        log(f"  Min: {pct_exp_values[0]:.2f}%")
-        log(f"  Max: {pct_exp_values[-1]:.2f}%")
-        log(f"  Médiane: {pct_exp_values[len(pct_exp_values)//2]:.2f}%")
+        n, total, vmin, vmax, quantile = _resume_numerique(pct_exp_values)
+        log(f"  Basé sur {n:,} entrées")
+        log(f"  Moyenne: {total/n:.2f}%")
+        log(f"  Min: {vmin:.2f}%")
+        log(f"  Max: {vmax:.2f}%")
+        log(f"  Médiane: {quantile(0.5):.2f}%")
     else:
         log("  (Pas de données)")
 
@@ -3,16 +3,20 @@
 Script d'exploration des fichiers diplômes et formation (INSEE 2022)
 """
 
-import csv
 import os
-from collections import Counter, defaultdict
+import sys
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/exploration/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.exploration.profil_fichiers import profiler
 
 # Configuration
 INPUT_DIR = "data/input/education"
 OUTPUT_FILE = "outputs/exploration_diplomes_output.txt"
 
-def analyze_file(filepath, output_lines, max_rows=100000):
-    """Analyse un fichier CSV"""
+def analyze_file(profil, output_lines):
+    """Affiche le profil d'un fichier CSV (calculé sur toutes ses lignes par profiler)"""
+    filepath = profil.chemin
     filename = os.path.basename(filepath)
     filesize = os.path.getsize(filepath) / (1024 * 1024)  # MB
 
@@ -24,35 +28,13 @@ def analyze_file(filepath, output_lines, max_rows=100000):
     log(f"FICHIER: {filename} ({filesize:.2f} MB)")
     log("=" * 70)
 
-    # Détection du séparateur
-    separators = [';', ',', '\t', '|']
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-
-    detected_sep = None
-    detected_enc = None
-    headers = []
-
-    for enc in encodings:
-        for sep in separators:
-            try:
-                with open(filepath, 'r', encoding=enc) as f:
-                    first_line = f.readline()
-                    if sep in first_line and first_line.count(sep) > 1:
-                        detected_sep = sep
-                        detected_enc = enc
-                        headers = [h.strip().strip('"') for h in first_line.strip().split(sep)]
-                        break
-            except:
-                continue
-        if detected_sep:
-            break
-
-    if not detected_sep:
+    if not profil.separateur:
         log("  ERREUR: Impossible de détecter le format")
         return
 
-    log(f"\n  Encodage: {detected_enc}")
-    log(f"  Séparateur: '{detected_sep}'")
+    headers = profil.headers
+    log(f"\n  Encodage: {profil.encodage}")
+    log(f"  Séparateur: '{profil.separateur}'")
     log(f"  Colonnes: {len(headers)}")
 
     # Afficher les colonnes
@@ -62,47 +44,23 @@ def analyze_file(filepath, output_lines, max_rows=100000):
     if len(headers) > 30:
         log(f"    ... et {len(headers) - 30} autres colonnes")
 
-    # Analyser le contenu
-    total_rows = 0
-    counters = defaultdict(Counter)
-    sample_rows = []
-
-    try:
-        with open(filepath, 'r', encoding=detected_enc) as f:
-            reader = csv.reader(f, delimiter=detected_sep)
-            next(reader)  # Skip header
-
-            for row in reader:
-                total_rows += 1
-
-                if total_rows <= 5:
-                    sample_rows.append(dict(zip(headers, row)))
-
-                if total_rows <= max_rows:
-                    # Compter quelques colonnes clés
-                    for i, val in enumerate(row[:10]):
-                        if i < len(headers):
-                            counters[headers[i]][val.strip()] += 1
-
-        log(f"\n  LIGNES: {total_rows:,}")
-
-    except Exception as e:
-        log(f"  ERREUR: {e}")
-        return
+    log(f"\n  LIGNES: {profil.n_lignes:,}")
 
     # Afficher les distributions pour les colonnes avec peu de valeurs uniques
     log(f"\n  DISTRIBUTIONS (colonnes avec < 50 valeurs uniques):")
-    for col in list(counters.keys())[:10]:
-        n_unique = len(counters[col])
+    for colonne in profil.colonnes[:10]:
+        valeurs = colonne.valeurs
+        n_unique = len(valeurs) + (1 if colonne.vides else 0)
         if n_unique < 50:
-            log(f"\n    {col} ({n_unique} valeurs):")
-            for val, count in counters[col].most_common(10):
+            log(f"\n    {colonne.nom} ({n_unique} valeurs):")
+            comptes = valeurs.most_common(10) + ([('', colonne.vides)] if colonne.vides else [])
+            for val, count in sorted(comptes, key=lambda vc: -vc[1])[:10]:
                 display_val = val[:40] if val else "(vide)"
                 log(f"      - {display_val}: {count:,}")
 
     # Échantillon
     log(f"\n  ÉCHANTILLON (3 premières lignes):")
-    for i, row in enumerate(sample_rows[:3], 1):
+    for i, row in enumerate(profil.echantillon[:3], 1):
         log(f"\n    Ligne {i}:")
         for j, (key, val) in enumerate(row.items()):
             if j < 15:  # Limiter l'affichage
@@ -131,17 +89,14 @@ def main():
         size = os.path.getsize(os.path.join(INPUT_DIR, f)) / (1024 * 1024)
         log(f"  - {f} ({size:.2f} MB)")
 
-    # Analyser d'abord les métadonnées (plus petits)
+    # Métadonnées d'abord (plus petits), puis les fichiers de données
     meta_files = [f for f in files if f.startswith('meta_')]
     data_files = [f for f in files if not f.startswith('meta_')]
 
-    # Analyser les fichiers meta d'abord
-    for f in sorted(meta_files):
-        analyze_file(os.path.join(INPUT_DIR, f), output_lines)
-
-    # Puis les fichiers de données
-    for f in sorted(data_files):
-        analyze_file(os.path.join(INPUT_DIR, f), output_lines)
+    # Tous les fichiers profilés en parallèle, sur toutes leurs lignes
+    chemins = [os.path.join(INPUT_DIR, f) for f in sorted(meta_files) + sorted(data_files)]
+    for profil in profiler(chemins):
+        analyze_file(profil, output_lines)
 
     log("\n" + "=" * 70)
     log("FIN DE L'ANALYSE")
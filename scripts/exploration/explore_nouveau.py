@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Script d'exploration légère des nouveaux fichiers dans data/input/nouveau/
-Lit uniquement les métadonnées et les 30 premières lignes pour éviter les problèmes mémoire.
+Aperçu des 30 premières lignes ; lignes et valeurs uniques sur les fichiers
+entiers via le profileur commun (mémoire bornée, fichiers en parallèle).
 """
 
 import os
@@ -21,6 +22,10 @@ except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "openpyxl"])
     import openpyxl
 
+# Racine du dépôt dans le path (script lancé directement : python scripts/exploration/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.exploration.profil_fichiers import detecter_format, profiler
+
 INPUT_DIR = "data/input/nouveau"
 OUTPUT_FILE = "outputs/exploration_nouveau_output.txt"
 MAX_LIGNES = 30
@@ -31,7 +36,7 @@ def log(msg, output_lines):
     output_lines.append(msg)
 
 
-def explorer_csv(filepath, output_lines):
+def explorer_csv(filepath, output_lines, profil):
     """Explore un fichier CSV sans tout charger en mémoire."""
     filename = os.path.basename(filepath)
     filesize = os.path.getsize(filepath) / (1024 * 1024)
@@ -41,24 +46,8 @@ def explorer_csv(filepath, output_lines):
     log("=" * 70, output_lines)
 
     # Détecter séparateur et encodage
-    for enc in ["utf-8", "latin-1"]:
-        try:
-            with open(filepath, "r", encoding=enc, errors="strict") as f:
-                premiere_ligne = f.readline()
-            encoding = enc
-            break
-        except (UnicodeDecodeError, Exception):
-            encoding = "latin-1"
-            with open(filepath, "r", encoding="latin-1") as f:
-                premiere_ligne = f.readline()
-            break
-
-    if premiere_ligne.count(";") > premiere_ligne.count(","):
-        sep = ";"
-    elif premiere_ligne.count("\t") > premiere_ligne.count(","):
-        sep = "\t"
-    else:
-        sep = ","
+    encoding, sep = detecter_format(filepath)
+    sep = sep or ","
 
     log(f"  Encodage: {encoding}", output_lines)
     log(f"  Séparateur: {repr(sep)}", output_lines)
@@ -70,14 +59,7 @@ def explorer_csv(filepath, output_lines):
         log(f"  ERREUR de lecture: {e}", output_lines)
         return
 
-    # Compter nb total de lignes
-    try:
-        with open(filepath, "r", encoding=encoding, errors="replace") as f:
-            nb_lignes = sum(1 for _ in f) - 1
-    except Exception:
-        nb_lignes = "?"
-
-    log(f"  Lignes totales: {nb_lignes:,}" if isinstance(nb_lignes, int) else f"  Lignes totales: {nb_lignes}", output_lines)
+    log(f"  Lignes totales: {profil.n_lignes:,}", output_lines)
     log(f"  Colonnes ({len(df.columns)}):", output_lines)
     for i, col in enumerate(df.columns, 1):
         dtype = df[col].dtype
@@ -92,22 +74,29 @@ def explorer_csv(filepath, output_lines):
         log(f"    {line}", output_lines)
 
     # Valeurs uniques pour colonnes texte
-    cat_cols = df.select_dtypes(include='object').columns.tolist()
-    if cat_cols:
-        log(f"\n  VALEURS UNIQUES (colonnes texte, sur {MAX_LIGNES} lignes):", output_lines)
-        for col in cat_cols:
-            n_unique = df[col].nunique()
-            if n_unique <= 20:
-                vals = df[col].value_counts().head(10)
-                log(f"    {col} ({n_unique} valeurs):", output_lines)
-                for val, count in vals.items():
-                    log(f"      - {str(val)[:60]}: {count}", output_lines)
-            else:
-                log(f"    {col}: {n_unique} valeurs uniques (trop pour lister)", output_lines)
-
-
-def explorer_xlsx(filepath, output_lines):
-    """Explore un fichier xlsx sans tout charger en mémoire."""
+    log_valeurs_uniques(profil, output_lines, 60)
+
+
+def log_valeurs_uniques(profil, output_lines, largeur):
+    """Valeurs uniques des colonnes texte, sur le fichier (ou l'onglet) entier."""
+    colonnes = [c for c in profil.colonnes if c.type == 'texte']
+    if not colonnes:
+        return
+    log(f"\n  VALEURS UNIQUES (colonnes texte, fichier entier):", output_lines)
+    for colonne in colonnes:
+        n_unique = len(colonne.valeurs)
+        if n_unique <= 20:
+            log(f"    {colonne.nom} ({n_unique} valeurs):", output_lines)
+            for val, count in colonne.valeurs.most_common(10):
+                log(f"      - {str(val)[:largeur]}: {count}", output_lines)
+        else:
+            approx = "" if colonne.valeurs.exact else "≈"
+            log(f"    {colonne.nom}: {approx}{n_unique} valeurs uniques (trop pour lister)",
+                output_lines)
+
+
+def explorer_xlsx(filepath, output_lines, profils):
+    """Explore un fichier xlsx sans tout charger en mémoire (profils : {onglet: profil})."""
     filename = os.path.basename(filepath)
     filesize = os.path.getsize(filepath) / (1024 * 1024)
 
@@ -137,27 +126,17 @@ def explorer_xlsx(filepath, output_lines):
             non_null = df[col].notna().sum()
             log(f"    {i:3}. {str(col):<40} | type: {str(dtype):<10} | non-null: {non_null}/{len(df)}", output_lines)
 
-        ws = wb[sheet_name]
-        total_rows = ws.max_row - 1 if ws.max_row else 0
-        log(f"\n  Lignes totales (estimé): {total_rows:,}", output_lines)
+        profil = profils.get(sheet_name)
+        total_rows = profil.n_lignes if profil else 0
+        log(f"\n  Lignes totales: {total_rows:,}", output_lines)
 
         log(f"\n  APERÇU (5 premières lignes):", output_lines)
         sample = df.head(5).to_string(max_colwidth=50)
         for line in sample.split('\n'):
             log(f"    {line}", output_lines)
 
-        cat_cols = df.select_dtypes(include='object').columns.tolist()
-        if cat_cols:
-            log(f"\n  VALEURS UNIQUES (colonnes texte):", output_lines)
-            for col in cat_cols:
-                n_unique = df[col].nunique()
-                if n_unique <= 20:
-                    vals = df[col].value_counts().head(10)
-                    log(f"    {col} ({n_unique} valeurs):", output_lines)
-                    for val, count in vals.items():
-                        log(f"      - {str(val)[:50]}: {count}", output_lines)
-                else:
-                    log(f"    {col}: {n_unique} valeurs uniques (trop pour lister)", output_lines)
+        if profil:
+            log_valeurs_uniques(profil, output_lines, 50)
 
     wb.close()
 
@@ -181,12 +160,18 @@ def main():
         size = os.path.getsize(os.path.join(INPUT_DIR, f)) / (1024 * 1024)
         log(f"  - {f} ({size:.1f} MB)", output_lines)
 
+    # Fichiers entiers profilés en parallèle (.xls non lisible en streaming : ignoré)
+    chemins = [os.path.join(INPUT_DIR, f) for f in sorted(files) if not f.endswith('.xls')]
+    profils = {}
+    for profil in profiler(chemins):
+        profils.setdefault(profil.chemin, {})[profil.feuille] = profil
+
     for f in sorted(files):
         filepath = os.path.join(INPUT_DIR, f)
         if f.endswith(('.xlsx', '.xls')):
-            explorer_xlsx(filepath, output_lines)
+            explorer_xlsx(filepath, output_lines, profils.get(filepath, {}))
         elif f.endswith(('.csv', '.CSV', '.txt')):
-            explorer_csv(filepath, output_lines)
+            explorer_csv(filepath, output_lines, profils[filepath][None])
 
     log(f"\n{'=' * 70}", output_lines)
     log("FIN DE L'ANALYSE", output_lines)
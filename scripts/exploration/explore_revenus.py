@@ -3,10 +3,13 @@
 Script d'exploration du fichier revenus des Français par commune
 """
 
-import csv
-from collections import Counter, defaultdict
+import os
 import sys
 
+# Racine du dépôt dans le path (script lancé directement : python scripts/exploration/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.exploration.profil_fichiers import profiler
+
 # Configuration
 FILE_PATH = "data/input/economie/revenu-des-francais-a-la-commune-1765372688826.csv"
 OUTPUT_FILE = "outputs/exploration_revenus_output.txt"
@@ -22,33 +25,21 @@ def main():
     log("ANALYSE EXPLORATOIRE - Revenus des Français par commune")
     log("=" * 80)
 
-    # Détection du séparateur et de l'encodage
-    separators = [';', ',', '\t', '|']
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-
-    detected_sep = None
-    detected_enc = None
-    headers = []
-
-    for enc in encodings:
-        for sep in separators:
-            try:
-                with open(FILE_PATH, 'r', encoding=enc) as f:
-                    first_line = f.readline()
-                    if sep in first_line and first_line.count(sep) > 2:
-                        detected_sep = sep
-                        detected_enc = enc
-                        headers = first_line.strip().split(sep)
-                        break
-            except:
-                continue
-        if detected_sep:
-            break
+    # Format détecté et fichier entier profilé par le profileur commun
+    try:
+        profil, = profiler([FILE_PATH])
+    except Exception as e:
+        log(f"\nERREUR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    headers = profil.headers
+    total_rows = profil.n_lignes
 
     log(f"\n[1] DÉTECTION DU FORMAT")
     log("-" * 40)
-    log(f"  Encodage détecté: {detected_enc}")
-    log(f"  Séparateur détecté: '{detected_sep}'")
+    log(f"  Encodage détecté: {profil.encodage}")
+    log(f"  Séparateur détecté: '{profil.separateur}'")
     log(f"  Nombre de colonnes: {len(headers)}")
 
     log(f"\n[2] COLONNES")
@@ -56,66 +47,13 @@ def main():
     for i, col in enumerate(headers, 1):
         log(f"  {i:2}. {col}")
 
-    # Analyse du contenu
-    total_rows = 0
-    col_idx = {h: i for i, h in enumerate(headers)}
-
-    # Compteurs pour différentes colonnes
-    counters = defaultdict(Counter)
-    numeric_stats = defaultdict(list)
-    sample_rows = []
-
-    # Colonnes à analyser (on détectera automatiquement)
-    text_cols = []
-    numeric_cols = []
-
     log(f"\n[3] LECTURE DU FICHIER...")
     log("-" * 40)
-
-    try:
-        with open(FILE_PATH, 'r', encoding=detected_enc) as f:
-            reader = csv.reader(f, delimiter=detected_sep)
-            next(reader)  # Skip header
-
-            for row in reader:
-                total_rows += 1
-
-                # Garder les 10 premières lignes comme échantillon
-                if total_rows <= 10:
-                    sample_rows.append(dict(zip(headers, row)))
-
-                # Analyser chaque colonne
-                for i, val in enumerate(row):
-                    if i >= len(headers):
-                        continue
-                    col_name = headers[i]
-                    val = val.strip()
-
-                    # Essayer de détecter si numérique
-                    try:
-                        # Gérer les nombres avec virgule décimale
-                        num_val = float(val.replace(',', '.').replace(' ', ''))
-                        if total_rows <= 100000:  # Limiter pour mémoire
-                            numeric_stats[col_name].append(num_val)
-                    except:
-                        # C'est du texte
-                        if total_rows <= 100000:
-                            counters[col_name][val] += 1
-
-        log(f"  Total de lignes: {total_rows:,}")
-
-    except Exception as e:
-        log(f"\nERREUR: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+    log(f"  Total de lignes: {total_rows:,}")
 
     # Identifier les types de colonnes
-    for col in headers:
-        if col in numeric_stats and len(numeric_stats[col]) > total_rows * 0.5:
-            numeric_cols.append(col)
-        elif col in counters:
-            text_cols.append(col)
+    numeric_cols = [c for c in profil.colonnes if c.type == 'numérique']
+    text_cols = [c for c in profil.colonnes if c.type == 'texte']
 
     log(f"\n[4] TYPES DE COLONNES DÉTECTÉS")
     log("-" * 40)
@@ -127,31 +65,24 @@ def main():
     log("-" * 40)
 
     for col in numeric_cols[:15]:  # Limiter à 15 colonnes
-        vals = numeric_stats[col]
-        if vals:
-            vals_sorted = sorted(vals)
-            n = len(vals)
-            mean_val = sum(vals) / n
-            min_val = vals_sorted[0]
-            max_val = vals_sorted[-1]
-            median_val = vals_sorted[n // 2]
-
-            log(f"\n  {col}:")
-            log(f"    Count:  {n:,}")
-            log(f"    Min:    {min_val:,.2f}")
-            log(f"    Max:    {max_val:,.2f}")
-            log(f"    Mean:   {mean_val:,.2f}")
-            log(f"    Median: {median_val:,.2f}")
+        vals = col.numeriques
+        if vals.n:
+            log(f"\n  {col.nom}:")
+            log(f"    Count:  {vals.n:,}")
+            log(f"    Min:    {vals.min:,.2f}")
+            log(f"    Max:    {vals.max:,.2f}")
+            log(f"    Mean:   {vals.total / vals.n:,.2f}")
+            log(f"    Median: {vals.quantile(0.5):,.2f}")
 
     # Statistiques sur les colonnes textuelles
     log(f"\n[6] COLONNES TEXTUELLES - VALEURS UNIQUES")
     log("-" * 40)
 
     for col in text_cols[:10]:  # Limiter à 10 colonnes
-        counter = counters[col]
+        counter = col.valeurs
         n_unique = len(counter)
-        log(f"\n  {col}:")
-        log(f"    Valeurs uniques: {n_unique:,}")
+        log(f"\n  {col.nom}:")
+        log(f"    Valeurs uniques: {'' if counter.exact else '≈'}{n_unique:,}")
 
         if n_unique <= 20:
             log(f"    Distribution:")
@@ -167,7 +98,7 @@ def main():
     # Échantillon de données
     log(f"\n[7] ÉCHANTILLON DE DONNÉES (5 premières lignes)")
     log("-" * 40)
-    for i, row in enumerate(sample_rows[:5], 1):
+    for i, row in enumerate(profil.echantillon[:5], 1):
         log(f"\n  Ligne {i}:")
         for key, val in row.items():
             display_val = val[:80] if val else "(vide)"
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Profileur commun des fichiers d'entrée (CSV / TXT / XLSX)
+
+Pour chaque fichier, sur toutes les lignes : type des colonnes, taux de
+valeurs vides, nombre de valeurs distinctes (exact puis estimé au-delà
+d'un seuil), valeurs les plus fréquentes et résumé numérique (min, max,
+moyenne, quantiles).
+
+Les CSV sont découpés en plages d'octets alignées sur les fins de ligne,
+les XLSX en onglets ; toutes les plages de tous les fichiers sont
+réparties sur un pool de processus, puis fusionnées par fichier dans
+l'ordre. Profiler tous les fichiers prend le temps du plus lent.
+
+Un CSV dont une plage contient des guillemets est reprofilé d'un seul
+tenant (un champ entre guillemets peut contenir une fin de ligne, où la
+coupure serait fausse). Chaque plage est décodée strictement : si une
+plage ne se décode pas, tout le fichier est reprofilé avec l'encodage
+suivant (UTF-8, puis cp1252, puis latin-1).
+
+Usage :
+    python scripts/exploration/profil_fichiers.py                  # tout data/input
+    python scripts/exploration/profil_fichiers.py fichier.csv ... --workers 4
+"""
+
+import argparse
+import codecs
+import csv
+import io
+import os
+import sys
+from multiprocessing import Pool
+
+# Racine du dépôt dans le path (script lancé directement : python scripts/exploration/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.elections_scan import decouper_plages
+from scripts.exploration.esquisses import CompteurBorne, ResumeNumerique
+
+# Configuration
+INPUT_DIR = "data/input"
+OUTPUT_FILE = "outputs/profil_fichiers_output.txt"
+EXTENSIONS_CSV = ('.csv', '.txt')
+EXTENSIONS_XLSX = ('.xlsx',)
+SEPARATEURS = [';', ',', '\t', '|']
+ENCODAGES = ['utf-8', 'cp1252', 'latin-1']  # latin-1 décode tout octet : dernier recours
+TAILLE_PLAGE = 16 * 1024 * 1024
+SEUIL_EXACT = 10_000     # valeurs distinctes comptées exactement par colonne
+N_ECHANTILLON = 5
+
+
+def detecter_format(chemin):
+    """(encodage, séparateur) d'un CSV d'après son début.
+
+    UTF-8 (avec ou sans BOM) si le début se décode, sinon le premier
+    d'ENCODAGES qui le décode ; séparateur le plus fréquent de la première
+    ligne parmi ; , tabulation et |. L'encodage n'est qu'une hypothèse :
+    les plages sont ensuite décodées strictement (voir profiler).
+    """
+    with open(chemin, 'rb') as f:
+        debut = f.read(64 * 1024)
+
+    if debut.startswith(codecs.BOM_UTF8):
+        encodage = 'utf-8-sig'
+    else:
+        for encodage in ENCODAGES:
+            try:
+                # Décodeur incrémental : un caractère coupé en fin de bloc n'est pas une erreur
+                codecs.getincrementaldecoder(encodage)().decode(debut, final=False)
+                break
+            except UnicodeDecodeError:
+                continue
+
+    premiere_ligne = debut.split(b'\n', 1)[0].decode(encodage, errors='replace')
+    separateur = max(SEPARATEURS, key=premiere_ligne.count)
+    if not premiere_ligne.count(separateur):
+        separateur = None
+    return encodage, separateur
+
+
+def valeur_numerique(valeur):
+    """float de la valeur ('1 234,5' compris), None si elle n'est pas numérique."""
+    if isinstance(valeur, (int, float)) and not isinstance(valeur, bool):
+        return float(valeur)
+    try:
+        return float(valeur.replace(',', '.').replace(' ', '').replace('\xa0', ''))
+    except (AttributeError, ValueError):
+        return None
+
+
+class ProfilColonne:
+    """Vides, valeurs distinctes et résumé numérique d'une colonne. Fusionnable."""
+
+    def __init__(self, nom, graine=0):
+        self.nom = nom
+        self.n = 0
+        self.vides = 0
+        self.valeurs = CompteurBorne(SEUIL_EXACT, largeur=1 << 12)
+        self.numeriques = ResumeNumerique(graine=graine)
+
+    def ajouter(self, valeur):
+        self.n += 1
+        if valeur is None or valeur == '':
+            self.vides += 1
+            return
+        self.valeurs.ajouter(valeur if isinstance(valeur, str) else str(valeur))
+        nombre = valeur_numerique(valeur)
+        if nombre is not None:
+            self.numeriques.ajouter(nombre)
+
+    def fusionner(self, autre):
+        self.n += autre.n
+        self.vides += autre.vides
+        self.valeurs.fusionner(autre.valeurs)
+        self.numeriques.fusionner(autre.numeriques)
+
+    @property
+    def type(self):
+        """'vide', 'numérique' (plus de la moitié des valeurs renseignées) ou 'texte'."""
+        renseignees = self.n - self.vides
+        if not renseignees:
+            return 'vide'
+        return 'numérique' if self.numeriques.n > renseignees * 0.5 else 'texte'
+
+    @property
+    def taux_vides(self):
+        return self.vides / self.n if self.n else 0.0
+
+
+class ProfilFichier:
+    """Profil d'un fichier (ou d'un onglet XLSX) : colonnes, lignes, échantillon.
+
+    graine : graine des quantiles KLL, propre à chaque plage d'un même fichier.
+    """
+
+    def __init__(self, chemin, headers, feuille=None, encodage=None, separateur=None, graine=0):
+        self.chemin = chemin
+        self.feuille = feuille
+        self.encodage = encodage
+        self.separateur = separateur
+        self.headers = headers
+        self.n_lignes = 0
+        self.colonnes = [ProfilColonne(h, graine) for h in headers]
+        self.echantillon = []
+
+    @property
+    def nom(self):
+        nom = os.path.basename(self.chemin)
+        return f"{nom} [{self.feuille}]" if self.feuille else nom
+
+    def traiter(self, row):
+        self.n_lignes += 1
+        if len(self.echantillon) < N_ECHANTILLON:
+            self.echantillon.append(dict(zip(self.headers, row)))
+        for colonne, valeur in zip(self.colonnes, row):
+            if isinstance(valeur, str):
+                valeur = valeur.strip()
+            colonne.ajouter(valeur)
+        # Colonnes absentes des lignes courtes : comptées vides
+        for colonne in self.colonnes[len(row):]:
+            colonne.ajouter(None)
+
+    def fusionner(self, autre):
+        """Ajoute le profil d'une plage suivante du même fichier."""
+        self.n_lignes += autre.n_lignes
+        self.echantillon.extend(autre.echantillon[:N_ECHANTILLON - len(self.echantillon)])
+        for colonne, sienne in zip(self.colonnes, autre.colonnes):
+            colonne.fusionner(sienne)
+
+
+def lister_entrees(racine=INPUT_DIR):
+    """Fichiers CSV / TXT / XLSX sous racine, triés."""
+    chemins = []
+    for dossier, _, fichiers in os.walk(racine):
+        for f in fichiers:
+            if f.lower().endswith(EXTENSIONS_CSV + EXTENSIONS_XLSX) and not f.startswith('~$'):
+                chemins.append(os.path.join(dossier, f))
+    return sorted(chemins)
+
+
+def _taches_csv(chemin, encodage=None, entier=False):
+    """Plages d'un CSV : (tâches, (encodage, séparateur, headers)).
+
+    encodage : imposé (reprise après un échec de décodage), détecté si None
+    entier   : une seule plage (le fichier contient des guillemets)
+    """
+    encodage_detecte, separateur = detecter_format(chemin)
+    encodage = encodage or encodage_detecte
+    if separateur is None:
+        return [], (encodage, None, [])
+    n_plages = 1 if entier else max(1, -(-os.path.getsize(chemin) // TAILLE_PLAGE))
+    headers, plages = decouper_plages(chemin, n_plages, separateur=separateur,
+                                      encodage=encodage.replace('-sig', ''))
+    headers = [h.strip() for h in headers]
+    entier = len(plages) <= 1
+    taches = [('csv', chemin, None, i, (debut, fin, encodage, separateur, headers, entier))
+              for i, (debut, fin) in enumerate(plages)]
+    return taches, (encodage, separateur, headers)
+
+
+def _encodage_suivant(encodage):
+    """Encodage à essayer après un échec de décodage strict."""
+    return ENCODAGES[ENCODAGES.index(encodage.replace('-sig', '')) + 1]
+
+
+def _taches_xlsx(chemin):
+    import openpyxl
+    wb = openpyxl.load_workbook(chemin, read_only=True)
+    feuilles = wb.sheetnames
+    wb.close()
+    return [('xlsx', chemin, feuille, i, None) for i, feuille in enumerate(feuilles)]
+
+
+def _profiler_tache(tache):
+    """Worker : profil d'une plage de CSV ou d'un onglet XLSX.
+
+    Pour une plage de CSV à refaire, retourne à la place du profil la raison :
+    'guillemets' (coupure peut-être dans un champ) ou 'encodage' (décodage
+    strict impossible).
+    """
+    nature, chemin, feuille, _, parametres = tache
+    if nature == 'csv':
+        debut, fin, encodage, separateur, headers, entier = parametres
+        with open(chemin, 'rb') as f:
+            f.seek(debut)
+            brut = f.read(fin - debut)
+        if not entier and b'"' in brut:
+            return tache[:4], 'guillemets'
+        try:
+            texte = brut.decode(encodage.replace('-sig', ''))
+        except UnicodeDecodeError:
+            return tache[:4], 'encodage'
+        profil = ProfilFichier(chemin, headers, encodage=encodage, separateur=separateur,
+                               graine=debut)
+        for row in csv.reader(io.StringIO(texte, newline=''), delimiter=separateur):
+            profil.traiter(row)
+        return tache[:4], profil
+
+    import openpyxl
+    wb = openpyxl.load_workbook(chemin, read_only=True, data_only=True)
+    try:
+        lignes = wb[feuille].iter_rows(values_only=True)
+        # En-tête : première ligne avec au moins 3 cellules remplies (titres INSEE au-dessus)
+        headers = []
+        for row in lignes:
+            if sum(1 for v in row if v is not None) >= 3:
+                headers = ['' if v is None else str(v).strip() for v in row]
+                break
+        profil = ProfilFichier(chemin, headers, feuille=feuille)
+        for row in lignes:
+            if any(v is not None for v in row):
+                profil.traiter(row)
+    finally:
+        wb.close()
+    return tache[:4], profil
+
+
+def profiler(chemins, workers=None):
+    """Profils des fichiers (un par fichier CSV, un par onglet XLSX), dans l'ordre des chemins.
+
+    Les plages de tous les fichiers sont profilées en parallèle (workers
+    processus, défaut : nombre de CPU), les plus grosses en premier. Les
+    CSV dont une plage est à refaire (guillemets, encodage) sont reprofilés
+    en entier au tour suivant.
+    """
+    workers = workers or os.cpu_count() or 1
+    taches = []
+    formats = {}
+    for chemin in chemins:
+        if chemin.lower().endswith(EXTENSIONS_XLSX):
+            taches.extend(_taches_xlsx(chemin))
+        else:
+            taches_csv, formats[chemin] = _taches_csv(chemin)
+            if formats[chemin][1] is None:
+                print(f"  ⚠ Format non reconnu (séparateur introuvable) : {chemin}")
+            taches.extend(taches_csv)
+
+    # Plus grosses tâches d'abord : le pool se termine avec les petites
+    def taille(tache):
+        if tache[0] == 'csv':
+            return tache[4][1] - tache[4][0]
+        return os.path.getsize(tache[1])
+    taches.sort(key=taille, reverse=True)
+
+    print(f"  {len(chemins)} fichiers, {len(taches)} plages réparties sur {workers} processus...")
+    partiels = {}
+    entiers = set()  # CSV à profiler d'un seul tenant
+    pool = Pool(min(workers, len(taches))) if workers > 1 and len(taches) > 1 else None
+    try:
+        while taches:
+            resultats = (pool.imap_unordered(_profiler_tache, taches) if pool is not None
+                         else map(_profiler_tache, taches))
+            a_refaire = {}
+            for cle, profil in resultats:
+                if isinstance(profil, str):
+                    a_refaire.setdefault(cle[1], set()).add(profil)
+                else:
+                    partiels[cle] = profil
+
+            # Fichiers à refaire : plages déjà profilées jetées, tout le fichier au tour suivant
+            taches = []
+            for chemin, raisons in a_refaire.items():
+                for cle in [cle for cle in partiels if cle[1] == chemin]:
+                    del partiels[cle]
+                encodage = formats[chemin][0]
+                if 'encodage' in raisons:
+                    encodage = _encodage_suivant(encodage)
+                    print(f"  ⚠ {os.path.basename(chemin)} : décodage impossible, essai en {encodage}")
+                if 'guillemets' in raisons:
+                    entiers.add(chemin)
+                taches_csv, formats[chemin] = _taches_csv(chemin, encodage, chemin in entiers)
+                taches.extend(taches_csv)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # Fusion par fichier / onglet, plages dans l'ordre du fichier
+    profils = []
+    for chemin in chemins:
+        cles = sorted((cle for cle in partiels if cle[1] == chemin),
+                      key=lambda cle: (cle[2] is not None, cle[3]))
+        if chemin.lower().endswith(EXTENSIONS_XLSX):
+            profils.extend(partiels[cle] for cle in cles)
+            continue
+        encodage, separateur, headers = formats[chemin]
+        profil = ProfilFichier(chemin, headers, encodage=encodage, separateur=separateur)
+        for cle in cles:
+            profil.fusionner(partiels[cle])
+        profils.append(profil)
+    return profils
+
+
+def rapport(profil, log, max_colonnes=None):
+    """Écrit le profil d'un fichier via log(msg)."""
+    taille = os.path.getsize(profil.chemin) / (1024 * 1024)
+    log(f"\n{'=' * 70}")
+    log(f"FICHIER: {profil.nom} ({taille:.2f} MB)")
+    log("=" * 70)
+    if profil.encodage:
+        log(f"  Encodage: {profil.encodage}")
+        log(f"  Séparateur: {profil.separateur!r}")
+    log(f"  Lignes: {profil.n_lignes:,}")
+    log(f"  Colonnes: {len(profil.colonnes)}")
+
+    colonnes = profil.colonnes if max_colonnes is None else profil.colonnes[:max_colonnes]
+    for i, colonne in enumerate(colonnes, 1):
+        distincts = len(colonne.valeurs)
+        approx = '' if colonne.valeurs.exact else '≈'
+        log(f"\n  {i:3}. {colonne.nom[:50]}")
+        log(f"       type: {colonne.type} | vides: {100 * colonne.taux_vides:.1f}% "
+            f"| distinctes: {approx}{distincts:,}")
+        if colonne.type == 'numérique':
+            resume = colonne.numeriques
+            log(f"       min: {resume.min:,.2f} | max: {resume.max:,.2f} "
+                f"| moyenne: {resume.total / resume.n:,.2f} | médiane: {resume.quantile(0.5):,.2f} "
+                f"| p90: {resume.quantile(0.9):,.2f}")
+        elif colonne.type == 'texte':
+            top = ', '.join(f"{str(v)[:30]} ({n:,})" for v, n in colonne.valeurs.most_common(5))
+            log(f"       top: {top}")
+    if max_colonnes is not None and len(profil.colonnes) > max_colonnes:
+        log(f"\n  ... et {len(profil.colonnes) - max_colonnes} autres colonnes")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Profil de tous les fichiers d'entrée")
+    parser.add_argument("chemins", nargs='*',
+                        help=f"fichiers à profiler (défaut : tous les CSV/TXT/XLSX de {INPUT_DIR})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processus (défaut : nombre de CPU)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output_lines = []
+
+    def log(msg):
+        print(msg)
+        output_lines.append(msg)
+
+    log("=" * 70)
+    log("PROFIL DES FICHIERS D'ENTRÉE")
+    log("=" * 70)
+
+    chemins = args.chemins or lister_entrees()
+    if not chemins:
+        log(f"\nAucun fichier trouvé dans {INPUT_DIR}/")
+        return
+
+    for profil in profiler(chemins, args.workers):
+        rapport(profil, log)
+
+    log("\n" + "=" * 70)
+    log("FIN DE L'ANALYSE")
+    log("=" * 70)
+
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(output_lines))
+
+    print(f"\n=> Résultats sauvegardés dans: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
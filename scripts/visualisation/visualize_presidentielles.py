@@ -4,10 +4,10 @@ Visualisation des tendances électorales - Présidentielles françaises
 Graphiques: Courbe évolution, Carte de France, Heatmap, Barres, Top départements
 """
 
-import csv
 import json
 import os
 import ssl
+import sys
 import urllib.request
 from collections import defaultdict
 
@@ -33,8 +33,16 @@ except ImportError:
     os.system("pip3 install geopandas")
     import geopandas as gpd
 
+# Racine du dépôt dans le path (script lancé directement : python scripts/visualisation/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.elections_scan import ScanElections
+from scripts.etl import cube_votes, elections_parquet
+from scripts.etl.index_elections import plages_index
+from scripts.classification.classify_candidats_v2 import (
+    GAUCHE, charger_camps, classify_frame, classify_row)
+
 # Configuration
-INPUT_FILE = "data/output/candidats_classified.txt"
+INPUT_FILE = "data/input/elections/candidats_results.txt"
 SEPARATOR = ";"
 OUTPUT_DIR = "graphiques/presidentielles"
 
@@ -83,64 +91,145 @@ def download_france_geojson():
     return geojson_path
 
 
+class AgregatPresidentielles:
+    """Consommateur du scan partagé : voix Gauche/Droite des présidentielles T1.
+
+    Le camp est lu, par ordre de priorité :
+      - dans camps (annexe d'un octet par ligne, cf. charger_camps), par numéro de ligne ;
+      - via classifier (fonction election, nuance, libelle, nom → camp), à la volée ;
+      - sinon dans la colonne Camp du fichier classifié complet.
+    """
+
+    def __init__(self, classifier=None, camps=None):
+        self.classifier = classifier
+        self.camps = camps
+        # Numéro de ligne transmis par le scan uniquement si l'annexe est utilisée
+        self.numerote = camps is not None
+        # Structure: {année: {département: {'gauche': voix, 'droite': voix}}}
+        self.data_by_year_dept = defaultdict(lambda: defaultdict(lambda: {'gauche': 0, 'droite': 0}))
+        # Structure: {année: {'gauche': voix, 'droite': voix}}
+        self.data_by_year = defaultdict(lambda: {'gauche': 0, 'droite': 0})
+        self.col_idx = {}
+        self.pres_lines = 0
+        # Rejet sur octets bruts avant parsing csv (filtrage exact dans traiter)
+        self.prefiltre = [('_pres_t1',)]
+
+    def debut(self, headers):
+        self.col_idx = {h: i for i, h in enumerate(headers)}
+        if self.camps is None and self.classifier is None:
+            self.min_len = self.col_idx.get('Camp', 999) + 1
+        else:
+            self.min_len = len(headers)
+
+    def traiter(self, row, numero=None):
+        col_idx = self.col_idx
+
+        if len(row) < self.min_len:
+            return
+
+        # Filtrer sur les présidentielles T1 uniquement (T2 biaisé car Macron/Le Pen = droite)
+        election = row[col_idx['id_election']]
+        if '_pres_t1' not in election:
+            return
+
+        self.pres_lines += 1
+
+        # Extraire l'année
+        year = election.split('_')[0]
+
+        # Extraire département et voix
+        dept = row[col_idx['Code du département']].strip()
+        try:
+            voix = int(row[col_idx['Voix']])
+        except:
+            voix = 0
+
+        if self.camps is not None:
+            camp = "Gauche" if self.camps[numero] == GAUCHE else "Droite"
+        elif self.classifier is None:
+            camp = row[col_idx['Camp']].strip()
+        else:
+            camp = self.classifier(election.strip(), row[col_idx['Nuance']].strip(),
+                                   row[col_idx['Libellé Abrégé Liste']].strip(),
+                                   row[col_idx['Nom']].strip())
+
+        # Agréger
+        if camp == "Gauche":
+            self.data_by_year_dept[year][dept]['gauche'] += voix
+            self.data_by_year[year]['gauche'] += voix
+        else:
+            self.data_by_year_dept[year][dept]['droite'] += voix
+            self.data_by_year[year]['droite'] += voix
+
+    def fin(self):
+        pass
+
+    def resultats(self):
+        return dict(self.data_by_year), dict(self.data_by_year_dept)
+
+
 def load_and_aggregate_data():
     """Charge et agrège les données des présidentielles"""
     print("Chargement et agrégation des données présidentielles...")
 
-    # Structure: {année: {département: {'gauche': voix, 'droite': voix}}}
-    data_by_year_dept = defaultdict(lambda: defaultdict(lambda: {'gauche': 0, 'droite': 0}))
+    if cube_votes.cube_disponible():
+        return _agreger_depuis_cube()
 
-    # Structure: {année: {'gauche': voix, 'droite': voix}}
-    data_by_year = defaultdict(lambda: {'gauche': 0, 'droite': 0})
+    if elections_parquet.dataset_disponible():
+        return _agreger_depuis_parquet()
 
-    col_idx = {}
-    total_lines = 0
-    pres_lines = 0
+    camps = charger_camps(INPUT_FILE)
+    if camps is None:
+        print("  ⚠ Annexe de classification absente ou périmée : classification à la volée")
+        agregat = AgregatPresidentielles(classify_row)
+    else:
+        agregat = AgregatPresidentielles(camps=camps)
+    # Index des blocs à jour : seules les plages des présidentielles T1 sont lues
+    total_lines = ScanElections(INPUT_FILE, SEPARATOR).ajouter(agregat).executer(
+        plages=plages_index(election='_pres_t1', source=INPUT_FILE))
+    print(f"  Total: {total_lines:,} lignes, dont {agregat.pres_lines:,} présidentielles")
+    return agregat.resultats()
 
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f, delimiter=SEPARATOR)
-        headers = next(reader)
 
-        for i, h in enumerate(headers):
-            col_idx[h] = i
+def _agreger_depuis_cube():
+    """Agrège les présidentielles T1 depuis le cube national construit par l'ETL."""
+    print(f"  Lecture du cube national : {cube_votes.CUBE_DB}")
 
-        for row in reader:
-            total_lines += 1
-
-            if total_lines % 5_000_000 == 0:
-                print(f"  {total_lines:,} lignes lues...")
-
-            if len(row) <= col_idx.get('Camp', 999):
-                continue
+    data_by_year_dept = defaultdict(lambda: defaultdict(lambda: {'gauche': 0, 'droite': 0}))
+    data_by_year = defaultdict(lambda: {'gauche': 0, 'droite': 0})
 
-            # Filtrer sur les présidentielles T1 uniquement (T2 biaisé car Macron/Le Pen = droite)
-            election = row[col_idx['id_election']]
-            if '_pres_t1' not in election:
-                continue
+    # T1 uniquement (T2 biaisé car Macron/Le Pen = droite)
+    for election, dept, camp, voix in cube_votes.voix_par_departement('_pres_t1'):
+        year = election.split('_')[0]
+        cle = 'gauche' if camp == "Gauche" else 'droite'
+        data_by_year_dept[year][dept][cle] += voix
+        data_by_year[year][cle] += voix
 
-            pres_lines += 1
+    return dict(data_by_year), dict(data_by_year_dept)
 
-            # Extraire l'année
-            year = election.split('_')[0]
 
-            # Extraire département et voix
-            dept = row[col_idx['Code du département']].strip()
-            try:
-                voix = int(row[col_idx['Voix']])
-            except:
-                voix = 0
+def _agreger_depuis_parquet():
+    """Agrège les présidentielles T1 en ne lisant que les partitions 'pres' du dataset Parquet."""
+    print(f"  Lecture du dataset Parquet : {elections_parquet.PARQUET_DIR}")
 
-            camp = row[col_idx['Camp']].strip()
+    df = elections_parquet.lire_elections(
+        types=['pres'],
+        colonnes=['id_election', 'departement', 'Voix', 'Nuance', 'Libellé Abrégé Liste', 'Nom'])
+    # T1 uniquement (T2 biaisé car Macron/Le Pen = droite)
+    df = df[df['id_election'].str.contains('_pres_t1', regex=False)].copy()
+    df['camp'] = classify_frame(df)
+    df['year'] = df['id_election'].str.split('_').str[0]
+    df['voix'] = df['Voix'].fillna(0).astype(int)
+    print(f"  {len(df):,} lignes présidentielles T1")
 
-            # Agréger
-            if camp == "Gauche":
-                data_by_year_dept[year][dept]['gauche'] += voix
-                data_by_year[year]['gauche'] += voix
-            else:
-                data_by_year_dept[year][dept]['droite'] += voix
-                data_by_year[year]['droite'] += voix
+    data_by_year_dept = defaultdict(lambda: defaultdict(lambda: {'gauche': 0, 'droite': 0}))
+    data_by_year = defaultdict(lambda: {'gauche': 0, 'droite': 0})
 
-    print(f"  Total: {total_lines:,} lignes, dont {pres_lines:,} présidentielles")
+    sommes = df.groupby(['year', 'departement', 'camp'], observed=True)['voix'].sum()
+    for (year, dept, camp), voix in sommes.items():
+        cle = 'gauche' if camp == "Gauche" else 'droite'
+        data_by_year_dept[year][dept][cle] += int(voix)
+        data_by_year[year][cle] += int(voix)
 
     return dict(data_by_year), dict(data_by_year_dept)
 
@@ -433,15 +522,8 @@ def plot_maps(data_by_year_dept):
     print(f"  Cartes sauvegardées dans {OUTPUT_DIR}/")
 
 
-def main():
-    print("=" * 70)
-    print("VISUALISATION DES PRÉSIDENTIELLES FRANÇAISES")
-    print("Gauche vs Droite (LREM classé à droite)")
-    print("=" * 70)
-
-    # Charger et agréger les données
-    data_by_year, data_by_year_dept = load_and_aggregate_data()
-
+def generer_graphiques(data_by_year, data_by_year_dept):
+    """Affiche le résumé et génère tous les graphiques à partir des agrégats."""
     # Afficher un résumé
     print("\nRésumé des données:")
     for year in sorted(data_by_year.keys()):
@@ -456,6 +538,17 @@ def main():
     plot_top_departments(data_by_year_dept)
     plot_maps(data_by_year_dept)
 
+
+def main():
+    print("=" * 70)
+    print("VISUALISATION DES PRÉSIDENTIELLES FRANÇAISES")
+    print("Gauche vs Droite (LREM classé à droite)")
+    print("=" * 70)
+
+    # Charger et agréger les données
+    data_by_year, data_by_year_dept = load_and_aggregate_data()
+    generer_graphiques(data_by_year, data_by_year_dept)
+
     print("\n" + "=" * 70)
     print(f"TERMINÉ ! Tous les graphiques sont dans: {OUTPUT_DIR}/")
     print("=" * 70)
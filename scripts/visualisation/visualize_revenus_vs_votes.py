@@ -7,6 +7,7 @@ Cartes de France côte à côte + corrélation
 import csv
 import os
 import ssl
+import sys
 import urllib.request
 from collections import defaultdict
 
@@ -22,9 +23,17 @@ except ImportError:
     os.system("pip3 install geopandas")
     import geopandas as gpd
 
+# Racine du dépôt dans le path (script lancé directement : python scripts/visualisation/…)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scripts.etl.elections_scan import ScanElections
+from scripts.etl.index_elections import plages_index
+from scripts.etl import cube_votes, elections_parquet
+from scripts.classification.classify_candidats_v2 import (
+    GAUCHE, charger_camps, classify_frame, classify_row)
+
 # Configuration
 REVENUS_FILE = "data/input/economie/revenu-des-francais-a-la-commune-1765372688826.csv"
-ELECTIONS_FILE = "data/output/candidats_classified.txt"
+ELECTIONS_FILE = "data/input/elections/candidats_results.txt"
 OUTPUT_DIR = "graphiques/comparatifs"
 GEOJSON_PATH = "data/output/departements.geojson"
 
@@ -85,50 +94,187 @@ def load_revenus_by_dept():
     return dept_mediane
 
 
-def load_votes_by_dept(election_filter='_pres_t1'):
-    """Charge les votes et agrège par département"""
-    print(f"Chargement des votes ({election_filter})...")
-
-    dept_votes = defaultdict(lambda: {'gauche': 0, 'droite': 0})
+class AgregatVotesDept:
+    """Consommateur du scan partagé : voix Gauche/Droite par département.
+
+    election_filter : sous-chaîne de id_election, ou liste de sous-chaînes ;
+                      une ligne compte pour chaque filtre qu'elle contient
+    par_election    : agréger aussi par id_election (élections retenues par
+                      un filtre) : toutes les années en un seul passage
+
+    Le camp est lu, par ordre de priorité :
+      - dans camps (annexe d'un octet par ligne, cf. charger_camps), par numéro de ligne ;
+      - via classifier (fonction election, nuance, libelle, nom → camp), à la volée ;
+      - sinon dans la colonne Camp du fichier classifié complet.
+    """
+
+    def __init__(self, election_filter='_pres_t1', classifier=None, camps=None,
+                 par_election=False):
+        self.filtres = ([election_filter] if isinstance(election_filter, str)
+                        else list(election_filter))
+        self.par_election = par_election
+        self.classifier = classifier
+        self.camps = camps
+        # Numéro de ligne transmis par le scan uniquement si l'annexe est utilisée
+        self.numerote = camps is not None
+        # Structure: {filtre ou id_election: {département: {'gauche': voix, 'droite': voix}}}
+        self.votes = defaultdict(lambda: defaultdict(lambda: {'gauche': 0, 'droite': 0}))
+        self.col_idx = {}
+        # Rejet sur octets bruts avant parsing csv (filtrage exact dans traiter)
+        self.prefiltre = [tuple(self.filtres)]
+
+    def debut(self, headers):
+        self.col_idx = {h: i for i, h in enumerate(headers)}
+        if self.camps is None and self.classifier is None:
+            self.min_len = self.col_idx.get('Camp', 999) + 1
+        else:
+            self.min_len = len(headers)
+
+    def traiter(self, row, numero=None):
+        col_idx = self.col_idx
+        if len(row) < self.min_len:
+            return
+
+        election = row[col_idx['id_election']]
+        cles = [f for f in self.filtres if f in election]
+        if not cles:
+            return
+        if self.par_election:
+            cles.append(election.strip())
+
+        dept = row[col_idx['Code du département']].strip()
+        try:
+            voix = int(row[col_idx['Voix']])
+        except:
+            voix = 0
+
+        if self.camps is not None:
+            camp = "Gauche" if self.camps[numero] == GAUCHE else "Droite"
+        elif self.classifier is None:
+            camp = row[col_idx['Camp']].strip()
+        else:
+            camp = self.classifier(election.strip(), row[col_idx['Nuance']].strip(),
+                                   row[col_idx['Libellé Abrégé Liste']].strip(),
+                                   row[col_idx['Nom']].strip())
 
-    with open(ELECTIONS_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f, delimiter=';')
-        headers = next(reader)
+        cote = 'gauche' if camp == 'Gauche' else 'droite'
+        for cle in cles:
+            self.votes[cle][dept][cote] += voix
 
-        col_idx = {h: i for i, h in enumerate(headers)}
+    def fin(self):
+        pass
 
-        for row in reader:
-            if len(row) <= col_idx.get('Camp', 999):
-                continue
+    def pct_gauche(self, cle=None):
+        """Retourne {département: % gauche} (cle : filtre ou id_election, défaut : premier filtre)."""
+        cle = self.filtres[0] if cle is None else cle
+        dept_pct_gauche = _pct_gauche(self.votes.get(cle, {}))
+        print(f"  {len(dept_pct_gauche)} départements chargés")
+        return dept_pct_gauche
 
-            election = row[col_idx['id_election']]
-            if election_filter not in election:
-                continue
+    def pct_par_groupe(self):
+        """Retourne {filtre ou id_election: {département: % gauche}}."""
+        return {cle: _pct_gauche(self.votes.get(cle, {}))
+                for cle in self.filtres + sorted(set(self.votes) - set(self.filtres))}
 
-            dept = row[col_idx['Code du département']].strip()
-            try:
-                voix = int(row[col_idx['Voix']])
-            except:
-                voix = 0
 
-            camp = row[col_idx['Camp']].strip()
-
-            if camp == 'Gauche':
-                dept_votes[dept]['gauche'] += voix
-            else:
-                dept_votes[dept]['droite'] += voix
-
-    # Calculer % gauche
+def _pct_gauche(dept_votes):
+    """{département: {'gauche', 'droite'}} → {département: % gauche} (départements sans voix exclus)."""
     dept_pct_gauche = {}
     for dept, votes in dept_votes.items():
         total = votes['gauche'] + votes['droite']
         if total > 0:
             dept_pct_gauche[dept] = 100 * votes['gauche'] / total
+    return dept_pct_gauche
+
 
+def load_votes_by_dept(election_filter='_pres_t1'):
+    """Charge les votes et agrège par département"""
+    dept_pct_gauche = load_votes_by_groups([election_filter])[election_filter]
     print(f"  {len(dept_pct_gauche)} départements chargés")
     return dept_pct_gauche
 
 
+def load_votes_by_groups(election_filters=('_pres_t1',), par_election=False):
+    """% gauche par département pour plusieurs filtres, en un seul passage.
+
+    Retourne {filtre: {département: % gauche}} ; avec par_election, contient
+    aussi une entrée par id_election retenu par un filtre ('2022_pres_t1', …).
+    """
+    election_filters = list(election_filters)
+    print(f"Chargement des votes ({', '.join(election_filters)})...")
+
+    if cube_votes.cube_disponible():
+        return _votes_depuis_cube(election_filters, par_election)
+
+    if elections_parquet.dataset_disponible():
+        return _votes_depuis_parquet(election_filters, par_election)
+
+    camps = charger_camps(ELECTIONS_FILE)
+    if camps is None:
+        print("  ⚠ Annexe de classification absente ou périmée : classification à la volée")
+        agregat = AgregatVotesDept(election_filters, classify_row, par_election=par_election)
+    else:
+        agregat = AgregatVotesDept(election_filters, camps=camps, par_election=par_election)
+    # Index des blocs à jour : seules les plages des élections filtrées sont lues
+    ScanElections(ELECTIONS_FILE, ';', progression=0).ajouter(agregat).executer(
+        plages=plages_index(election=election_filters, source=ELECTIONS_FILE))
+    return agregat.pct_par_groupe()
+
+
+def _votes_depuis_cube(election_filters, par_election):
+    """% gauche par département depuis le cube national construit par l'ETL."""
+    print(f"  Lecture du cube national : {cube_votes.CUBE_DB}")
+
+    votes = defaultdict(lambda: defaultdict(lambda: {'gauche': 0, 'droite': 0}))
+    for filtre in election_filters:
+        for election, dept, camp, voix in cube_votes.voix_par_departement(filtre):
+            cote = 'gauche' if camp == 'Gauche' else 'droite'
+            votes[filtre][dept][cote] += voix
+            if par_election:
+                votes[election][dept][cote] += voix
+
+    return {cle: _pct_gauche(votes[cle])
+            for cle in election_filters + sorted(set(votes) - set(election_filters))}
+
+
+def _votes_depuis_parquet(election_filters, par_election):
+    """% gauche par département depuis le dataset Parquet (partitions des types filtrés uniquement)."""
+    # '_pres_t1' → partitions type_election=pres ; filtre exact appliqué ensuite
+    types = set()
+    for election_filter in election_filters:
+        morceaux = [m for m in election_filter.split('_') if m]
+        type_filtre = [m for m in morceaux if not m.startswith('t') and not m.isdigit()][:1]
+        if not type_filtre:
+            types = None
+            break
+        types.update(type_filtre)
+
+    df = elections_parquet.lire_elections(
+        types=None if types is None else sorted(types),
+        colonnes=['id_election', 'departement', 'Voix', 'Nuance', 'Libellé Abrégé Liste', 'Nom'])
+    df['camp'] = classify_frame(df)
+    df['voix'] = df['Voix'].fillna(0).astype(int)
+    df['gauche'] = df['voix'].where(df['camp'] == 'Gauche', 0)
+
+    resultats = {}
+    retenues = np.zeros(len(df), dtype=bool)
+    for election_filter in election_filters:
+        masque = df['id_election'].str.contains(election_filter, regex=False).to_numpy(dtype=bool)
+        sommes = df[masque].groupby('departement')[['gauche', 'voix']].sum()
+        resultats[election_filter] = {dept: 100 * g / v for dept, (g, v) in sommes.iterrows() if v > 0}
+        retenues |= masque
+
+    if par_election:
+        selection = df[retenues]
+        sommes = selection.groupby(['id_election', 'departement'])[['gauche', 'voix']].sum()
+        for (election, dept), (g, v) in sommes.iterrows():
+            pct = resultats.setdefault(election, {})
+            if v > 0:
+                pct[dept] = 100 * g / v
+
+    return resultats
+
+
 def plot_side_by_side_maps(dept_revenus, dept_pct_gauche, year="Global"):
     """Crée deux cartes côte à côte : revenus vs votes"""
     print(f"\nCréation des cartes comparatives ({year})...")
@@ -339,17 +485,16 @@ def plot_top_bottom_depts(dept_revenus, dept_pct_gauche):
     print(f"  Sauvegardé: {path}")
 
 
-def main():
-    print("=" * 70)
-    print("COMPARAISON REVENUS VS VOTES")
-    print("=" * 70)
-
-    # Charger les données
-    dept_revenus = load_revenus_by_dept()
-    dept_pct_gauche = load_votes_by_dept('_pres_t1')
+def generer_graphiques(dept_revenus, dept_pct_gauche, pct_par_election=None):
+    """Génère les graphiques comparatifs et affiche le résumé.
 
-    # Générer les graphiques
+    pct_par_election : {id_election: {département: % gauche}} (cf.
+    load_votes_by_groups) pour une carte par élection en plus de la carte globale.
+    """
     plot_side_by_side_maps(dept_revenus, dept_pct_gauche, "2002-2022")
+    for election, pct in sorted((pct_par_election or {}).items()):
+        if pct:
+            plot_side_by_side_maps(dept_revenus, pct, election.split('_')[0])
     correlation = plot_correlation(dept_revenus, dept_pct_gauche)
     plot_revenus_by_vote(dept_revenus, dept_pct_gauche)
     plot_top_bottom_depts(dept_revenus, dept_pct_gauche)
@@ -367,5 +512,21 @@ def main():
     print("=" * 70)
 
 
+def main():
+    print("=" * 70)
+    print("COMPARAISON REVENUS VS VOTES")
+    print("=" * 70)
+
+    # Charger les données
+    dept_revenus = load_revenus_by_dept()
+    # Global et par année en un seul passage
+    votes = load_votes_by_groups(['_pres_t1'], par_election=True)
+    dept_pct_gauche = votes.pop('_pres_t1')
+    print(f"  {len(dept_pct_gauche)} départements chargés, {len(votes)} élections")
+
+    # Générer les graphiques
+    generer_graphiques(dept_revenus, dept_pct_gauche, votes)
+
+
 if __name__ == "__main__":
     main()